@@ -3,30 +3,73 @@ import re
 import json
 import time
 import hashlib
+import calendar
+import functools
 import sqlite3
-from datetime import timezone
-from urllib.parse import quote, urlparse
+import struct
+import sys
+import types
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_tz
+from urllib.parse import parse_qs, quote, urlparse
 
 import requests
 import streamlit as st
-from dateutil import parser as date_parser
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from streamlit_autorefresh import st_autorefresh
 
+_RERUN_STARTED = time.perf_counter()  # per-rerun overhead, reported by record_rerun_overhead (see STARTUP)
+
 
 # =========================
 # CONFIG
 # =========================
 AUTO_REFRESH_SECONDS = 30
 MAX_ARTICLE_AGE_HOURS = 24
+TIME_PARSE_MEMO_SIZE = 8192  # distinct publish-time strings memoized by safe_parse_time
 
 RETENTION_DAYS = 30
+GEMINI_CACHE_TTL_SECONDS = int(os.getenv("GEMINI_CACHE_TTL_SECONDS", "21600"))  # identical prompts reuse the answer; 0 disables
+GEMINI_CACHE_MAX_MB = float(os.getenv("GEMINI_CACHE_MAX_MB", "16"))  # least recently hit responses evicted beyond this
+RETENTION_POLICIES = {  # table -> days kept (pruned by run_retention, not on every upsert)
+    "news_items": RETENTION_DAYS,
+    "alerts_seen": float(os.getenv("ALERTS_RETENTION_DAYS", str(RETENTION_DAYS))),
+    "ai_digests": float(os.getenv("DIGEST_RETENTION_DAYS", "90")),
+    "gemini_cache": max(GEMINI_CACHE_TTL_SECONDS, 0) / 86400.0,
+}
+RETENTION_INTERVAL_SECONDS = int(os.getenv("RETENTION_INTERVAL_SECONDS", "3600"))  # once per interval per cluster
+RETENTION_BATCH_ROWS = 2000
+RETENTION_MAX_BATCHES = 200  # per table per run (rest waits for next run)
 AI_DIGEST_EVERY_SECONDS = 3600
 AI_WINDOW_HOURS_RECENT = 24
 AI_CONTEXT_DAYS = 30
 
 DEFAULT_KEYWORDS = ["SPX", "FOMC", "Treasury", "yields", "inflation", "options", "gamma", "EARNINGS", "ENERGY", "liquidity"]
 
-GOOGLE_NEWS_RSS = "https://news.google.com/rss/search?q={q}&hl=en-US&gl=US&ceid=US:en"
+# Feed URL templates are overridable to point at a local stand-in (see feed_replay.py)
+GOOGLE_NEWS_RSS = os.getenv("GOOGLE_NEWS_RSS", "https://news.google.com/rss/search?q={q}&hl=en-US&gl=US&ceid=US:en")
+GOOGLE_QUERY_MAX_TERMS = 10  # keywords per shard query
+GOOGLE_QUERY_MAX_CHARS = 200  # length of the "a OR b OR ..." part per shard
+GOOGLE_MAX_ENTRIES_PER_QUERY = 100
+GOOGLE_SHARD_TIMEOUT_SECONDS = 12
+GOOGLE_SHARD_WORKERS = 16  # per source (google / bing pools): every shard of a full keyword union starts at once
+FEED_CACHE_MAX_URLS = 256  # conditional-GET validator cache (per feed URL)
+BING_NEWS_RSS = os.getenv("BING_NEWS_RSS", "https://www.bing.com/news/search?q={q}&format=rss&setlang=en-US")
+FED_PRESS_RSS = os.getenv("FED_PRESS_RSS", "https://www.federalreserve.gov/feeds/press_all.xml")
+BLS_LATEST_RSS = os.getenv("BLS_LATEST_RSS", "https://www.bls.gov/feed/bls_latest.rss")
+FEED_RECORD_DIR = os.getenv("FEED_RECORD_DIR", "").strip()  # when set, every changed feed body is saved for replay
+BING_MAX_ENTRIES_PER_QUERY = 50
+RSS_MAX_ENTRIES_PER_FEED = 50
+NEWS_SOURCES = {s.strip().lower() for s in os.getenv("NEWS_SOURCES", "google,bing,fed,bls").split(",") if s.strip()}
+SOURCE_BREAKER_FAILURES = int(os.getenv("SOURCE_BREAKER_FAILURES", "3"))  # consecutive failures before a source is skipped
+SOURCE_BREAKER_COOLDOWN_SECONDS = int(os.getenv("SOURCE_BREAKER_COOLDOWN_SECONDS", "300"))
+ALERTS_LRU_SIZE = 5000  # alert hashes known to be seen, kept in-process (no DB lookup)
+ALERTS_RING_SIZE = int(os.getenv("ALERTS_RING_SIZE", "500"))  # alerts kept for the panel, shared by all sessions
 
 HEADERS = {
     "User-Agent": (
@@ -36,8 +79,28 @@ HEADERS = {
 }
 
 DATABASE_URL = os.getenv("DATABASE_URL", "").strip()
+SQLITE_PATH = os.getenv("SQLITE_PATH", "news.db").strip() or "news.db"  # used when DATABASE_URL is empty/unreachable
+PG_POOL_MIN = int(os.getenv("PG_POOL_MIN", "1"))
+PG_POOL_MAX = int(os.getenv("PG_POOL_MAX", "8"))
+PG_HEALTHCHECK_IDLE_SECONDS = 30  # ping pooled connections idle longer than this before reuse
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "").strip()
 
+# AI jobs (see AiJobQueue): Gemini calls run off the script thread
+AI_JOB_WORKERS = int(os.getenv("AI_JOB_WORKERS", "2"))  # concurrent Gemini calls per process
+AI_JOB_MAX_PENDING = int(os.getenv("AI_JOB_MAX_PENDING", "16"))  # queued + running; beyond this submits are refused
+AI_JOBS_KEPT = 64  # finished jobs kept for polling / dedupe
+AI_JOB_POLL_SECONDS = 1  # rerun interval while a session waits on a job (streamed text grows per poll)
+
+# Shared HTTP client (see get_http_session)
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "8"))  # distinct hosts kept pooled
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "16"))  # keep-alive connections per host
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_RETRY_BACKOFF = float(os.getenv("HTTP_RETRY_BACKOFF", "0.5"))
+HTTP_RETRY_AFTER_MAX_SECONDS = float(os.getenv("HTTP_RETRY_AFTER_MAX_SECONDS", "5"))  # cap on a server's Retry-After
+
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9464"))  # Prometheus /metrics; 0 disables
+METRICS_BIND = os.getenv("METRICS_BIND", "127.0.0.1")
+
 
 # =========================
 # FILTERS
@@ -110,6 +173,17 @@ NEGATIVE_KEYWORDS = [
     "brain", "learning", "health", "fitness",
 ]
 
+# All scoring lists, scanned in ONE pass per headline (see KeywordMatcher)
+SCORING_KEYWORD_SETS = (
+    ("inst", tuple(INSTITUTIONAL_KEYWORDS)),
+    ("noise", tuple(NOISE_KEYWORDS)),
+    ("block", tuple(NEGATIVE_KEYWORDS)),
+    ("impact", tuple(HIGH_IMPACT_TRIGGERS)),
+    ("wire", tuple(WIRE_PHRASES)),
+    ("clickbait", tuple(CLICKBAIT_PHRASES)),
+    ("modal", tuple(MODAL_WEAK_WORDS)),
+)
+
 
 # =========================
 # UI
@@ -142,19 +216,120 @@ st_autorefresh(interval=AUTO_REFRESH_SECONDS * 1000, key="auto_refresh_tick")
 # =========================
 if "latest_news" not in st.session_state:
     st.session_state["latest_news"] = []
-if "last_fetch_ts" not in st.session_state:
-    st.session_state["last_fetch_ts"] = 0.0
 if "auto_keywords" not in st.session_state:
     st.session_state["auto_keywords"] = DEFAULT_KEYWORDS
 
 
+# =========================
+# PROCESS RESOURCES
+# =========================
+def _process_store():
+    # Script globals are rebuilt on every rerun; a registered module lives as long as the process
+    fresh = types.ModuleType("_ozytarget_process")
+    fresh.lock = threading.Lock()
+    fresh.values = {}
+    fresh.locks = {}
+    return sys.modules.setdefault("_ozytarget_process", fresh)
+
+
+def process_resource(fn=None, *, max_entries: int | None = None):
+    """
+    One value per process (per positional-args tuple), shared by reruns, sessions AND
+    background threads. st.cache_resource only serves hits inside a script run, so the
+    ingest / fetch threads would otherwise build a new pool, cache or registry on every call.
+    Exceptions are not cached. Editing the function body rebuilds its values.
+    """
+    def deco(f):
+        name = f"{f.__qualname__}:{hashlib.sha1(f.__code__.co_code).hexdigest()[:12]}"
+
+        @functools.wraps(f)
+        def get(*args):
+            store = _process_store()
+            slot = store.values.get(name)
+            if slot is None:
+                with store.lock:
+                    slot = store.values.setdefault(name, OrderedDict())
+            try:
+                value = slot[args]
+            except KeyError:
+                pass
+            else:
+                if max_entries:
+                    with store.lock:
+                        if args in slot:
+                            slot.move_to_end(args)
+                return value
+
+            with store.lock:
+                key_lock = store.locks.setdefault((name, args), threading.RLock())
+            with key_lock:
+                if args in slot:
+                    return slot[args]
+                value = f(*args)
+                with store.lock:
+                    slot[args] = value
+                    while max_entries and len(slot) > max_entries:
+                        slot.popitem(last=False)
+                    store.locks.pop((name, args), None)
+                return value
+
+        def clear():
+            store = _process_store()
+            with store.lock:
+                store.values.pop(name, None)
+
+        get.clear = clear
+        return get
+
+    return deco(fn) if fn is not None else deco
+
+
 # =========================
 # HELPERS
 # =========================
+# Fast paths for the two formats feeds actually send. RFC 822 only with a numeric offset or
+# GMT/UT/UTC/Z (named zones like EST keep going through dateutil, exactly as before).
+_RFC822_RE = re.compile(r"^(?:[A-Za-z]{3},\s*)?\d{1,2}\s+[A-Za-z]{3}\s+\d{4}\s+\d{1,2}:\d{2}(?::\d{2})?(?:\s*(?:[+-]\d{4}|GMT|UTC?|Z))?$")
+_ISO8601_RE = re.compile(r"^\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?)?$")
+
+
+def _parse_time_fast(value: str) -> float | None:
+    if _RFC822_RE.match(value):
+        t = parsedate_tz(value)
+        if t is None:
+            return None
+        try:
+            # naive (no offset) => UTC, same as the dateutil path; invalid dates raise here
+            return datetime(*t[:6], tzinfo=timezone.utc).timestamp() - (t[9] or 0)
+        except ValueError:
+            return None
+    elif _ISO8601_RE.match(value):
+        try:
+            dt = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.timestamp()
+    return None
+
+
+@functools.lru_cache(maxsize=TIME_PARSE_MEMO_SIZE)
 def safe_parse_time(value: str) -> float:
+    """
+    Publish time -> epoch seconds (0.0 if unknown).
+    Tiers: RFC 822 / ISO 8601 fast path, then dateutil. Memoized (feeds repeat the same strings).
+    Entries with feedparser's *_parsed struct never get here (see _ensure_ts).
+    """
     if not value:
         return 0.0
+    value = value.strip()
+    fast = _parse_time_fast(value)
+    if fast is not None:
+        return fast
     try:
+        from dateutil import parser as date_parser  # last resort only: imported on first use
+
         dt = date_parser.parse(value)
         if dt.tzinfo is None:
             dt = dt.replace(tzinfo=timezone.utc)
@@ -173,20 +348,130 @@ def time_ago(ts_seconds: float) -> str:
     return f"{int(diff // 3600)}h"
 
 
+def _is_word_char(ch: str) -> bool:
+    # Same definition as regex \w for str patterns
+    return ch.isalnum() or ch == "_"
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick matcher for several keyword lists at once.
+    One pass over the text returns hit counts per list, with count_hits rules:
+    - phrases with spaces or hyphens match as plain substrings
+    - everything else must sit on word boundaries (like r"\\bkw\\b")
+    Each keyword counts once per text (duplicates inside a list count twice, like before).
+    """
+
+    def __init__(self, keyword_sets: dict[str, list[str]]):
+        self.names = list(keyword_sets.keys())
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[int]] = [[]]
+        self._patterns: list[tuple[str, bool]] = []  # (keyword, needs word boundary)
+        self._weights: list[dict[str, int]] = []  # pattern -> {list name: multiplicity}
+
+        index: dict[str, int] = {}
+        for name, keywords in keyword_sets.items():
+            for kw in keywords:
+                k = (kw or "").strip().lower()
+                if not k:
+                    continue
+                pid = index.get(k)
+                if pid is None:
+                    pid = len(self._patterns)
+                    index[k] = pid
+                    self._patterns.append((k, not ((" " in k) or ("-" in k))))
+                    self._weights.append({})
+                    self._add_pattern(k, pid)
+                w = self._weights[pid]
+                w[name] = w.get(name, 0) + 1
+
+        self._build_links()
+        # Resolved transitions (goto + failure links), filled lazily while scanning
+        self._delta: list[dict[str, int]] = [dict(g) for g in self._goto]
+
+    def _add_pattern(self, k: str, pid: int):
+        node = 0
+        for ch in k:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append(pid)
+
+    def _build_links(self):
+        queue = list(self._goto[0].values())
+        for node in queue:
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                cand = self._goto[f].get(ch, 0)
+                self._fail[nxt] = cand if cand != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def _step(self, node: int, ch: str) -> int:
+        start = node
+        while node and ch not in self._goto[node]:
+            node = self._fail[node]
+        nxt = self._goto[node].get(ch, 0)
+        self._delta[start][ch] = nxt
+        return nxt
+
+    @staticmethod
+    def _on_boundaries(s: str, start: int, end: int, k: str) -> bool:
+        left = _is_word_char(s[start - 1]) if start > 0 else False
+        if left == _is_word_char(k[0]):
+            return False
+        right = _is_word_char(s[end]) if end < len(s) else False
+        return right != _is_word_char(k[-1])
+
+    def count(self, text: str) -> dict[str, int]:
+        s = (text or "").lower()
+        delta, out, patterns = self._delta, self._out, self._patterns
+        found: set[int] = set()
+
+        node = 0
+        for i, ch in enumerate(s):
+            nxt = delta[node].get(ch)
+            node = nxt if nxt is not None else self._step(node, ch)
+            if not out[node]:
+                continue
+            for pid in out[node]:
+                if pid in found:
+                    continue
+                k, bounded = patterns[pid]
+                if bounded and not self._on_boundaries(s, i - len(k) + 1, i + 1, k):
+                    continue
+                found.add(pid)
+
+        counts = dict.fromkeys(self.names, 0)
+        for pid in found:
+            for name, n in self._weights[pid].items():
+                counts[name] += n
+        return counts
+
+
+@process_resource(max_entries=256)
+def get_keyword_matcher(keyword_sets: tuple[tuple[str, tuple[str, ...]], ...]) -> KeywordMatcher:
+    """
+    One compiled matcher per keyword-set version (the tuple content IS the version).
+    Shared across sessions and reruns.
+    """
+    return KeywordMatcher({name: list(kws) for name, kws in keyword_sets})
+
+
+def get_user_keyword_matcher(keywords: list[str]) -> KeywordMatcher:
+    return get_keyword_matcher((("user", tuple(keywords or [])),))
+
+
 def count_hits(text: str, keywords: list[str]) -> int:
-    s = (text or "").lower()
-    hits = 0
-    for kw in keywords:
-        k = (kw or "").strip().lower()
-        if not k:
-            continue
-        if (" " in k) or ("-" in k):
-            if k in s:
-                hits += 1
-            continue
-        if re.search(r"\b" + re.escape(k) + r"\b", s):
-            hits += 1
-    return hits
+    return get_user_keyword_matcher(keywords).count(text)["user"]
 
 
 def score_to_bg_style(score: int, user_kw_hits: int = 0) -> str:
@@ -303,7 +588,7 @@ def filter_institutional(items: list[dict], min_kw: int, max_noise: int) -> list
     now_ts = time.time()
     max_age_sec = float(MAX_ARTICLE_AGE_HOURS) * 3600.0
 
-    hard_block_re = re.compile(r"\b(" + "|".join(map(re.escape, NEGATIVE_KEYWORDS)) + r")\b", re.IGNORECASE)
+    matcher = get_keyword_matcher(SCORING_KEYWORD_SETS)
 
     for a in items:
         title = (a.get("title") or "").strip()
@@ -320,17 +605,18 @@ def filter_institutional(items: list[dict], min_kw: int, max_noise: int) -> list
             continue
 
         blob = f"{title}\n{summary}".strip()
-        if hard_block_re.search(blob):
+        counts = matcher.count(blob)
+        if counts["block"]:
             continue
 
-        blob_l = blob.lower()
-        kw_hits = count_hits(blob_l, INSTITUTIONAL_KEYWORDS)
-        noise_hits = count_hits(blob_l, NOISE_KEYWORDS)
+        kw_hits = counts["inst"]
+        noise_hits = counts["noise"]
 
         if kw_hits >= min_kw and noise_hits <= max_noise:
             b = dict(a)
             b["_kw_hits"] = kw_hits
             b["_noise_hits"] = noise_hits
+            b["_kw_counts"] = counts  # reused by score_bloomberg (same blob)
             out.append(b)
 
     return out
@@ -348,16 +634,20 @@ def score_bloomberg(item: dict) -> dict:
     kw_hits = int(item.get("_kw_hits", 0))
     noise_hits = int(item.get("_noise_hits", 0))
 
+    counts = item.get("_kw_counts")
+    if not isinstance(counts, dict):
+        counts = get_keyword_matcher(SCORING_KEYWORD_SETS).count(blob)
+
     if kw_hits:
         score += min(40, kw_hits * 6)
         reasons.append(f"+inst({kw_hits})")
 
-    hi_hits = count_hits(blob, HIGH_IMPACT_TRIGGERS)
+    hi_hits = counts["impact"]
     if hi_hits:
         score += min(30, hi_hits * 8)
         reasons.append(f"+impact({hi_hits})")
 
-    wire_hits = count_hits(blob, WIRE_PHRASES)
+    wire_hits = counts["wire"]
     if wire_hits:
         score += min(16, wire_hits * 8)
         reasons.append(f"+wire({wire_hits})")
@@ -373,12 +663,12 @@ def score_bloomberg(item: dict) -> dict:
         score -= min(30, noise_hits * 10)
         reasons.append(f"-noise({noise_hits})")
 
-    cb_hits = count_hits(blob, CLICKBAIT_PHRASES)
+    cb_hits = counts["clickbait"]
     if cb_hits:
         score -= min(30, cb_hits * 15)
         reasons.append(f"-clickbait({cb_hits})")
 
-    modal_hits = count_hits(blob, MODAL_WEAK_WORDS)
+    modal_hits = counts["modal"]
     if modal_hits:
         score -= min(18, modal_hits * 6)
         reasons.append(f"-modal({modal_hits})")
@@ -410,31 +700,558 @@ def make_item_hash(title: str, link: str, canonical_link: str = "") -> str:
     return hashlib.sha256(base.encode("utf-8")).hexdigest()
 
 
+# =========================
+# STORY CLUSTERS (near-duplicate headlines)
+# - the same wire story syndicated by several outlets = one cluster
+# - MinHash over title words + LSH buckets: each new headline is compared only with
+#   the clusters it shares a bucket with (no pairwise pass over the window)
+# - process-wide, kept across cycles; cluster ids are stored with news_items.story_id
+# =========================
+STORY_MINHASH_PERMS = 16  # = one 32-byte blake2b digest per word, read as 16 independent 16-bit hashes
+STORY_LSH_ROWS = 4  # 4 bands x 4 rows: titles sharing ~70%+ of their words collide; candidates get the exact Jaccard
+STORY_SIMILARITY = 0.6  # Jaccard on title shingles (words + word pairs) needed to join a cluster
+STORY_MAX_CLUSTERS = int(os.getenv("STORY_MAX_CLUSTERS", "20000"))
+STORY_MAX_MEMBERS = 4 * STORY_MAX_CLUSTERS  # item_hash -> story id (idempotent assignment)
+
+_STORY_SIG = struct.Struct(f">{STORY_MINHASH_PERMS}H")
+_STORY_PREFIX_RE = re.compile(r"^(?:breaking|exclusive|update|updated|live|watch|analysis)\s*[:\-—|]\s*")
+_STORY_TOKEN_RE = re.compile(r"[a-z0-9$%]+(?:[.'][a-z0-9]+)*")
+_STORY_STOPWORDS = frozenset(
+    "a an the of to in on for and or as at by with from into is are was be its it this that after over says say".split()
+)
+
+
+def normalize_story_title(title: str) -> str:
+    """'BREAKING: Fed Holds Rates - Reuters' -> 'fed holds rates' (source suffix, prefixes, punctuation dropped)."""
+    t = (title or "").strip()
+    if " - " in t:
+        head, tail = t.rsplit(" - ", 1)
+        if head.strip() and len(tail) <= 60:
+            t = head
+    t = _STORY_PREFIX_RE.sub("", t.strip().lower())
+    return " ".join(_STORY_TOKEN_RE.findall(t))
+
+
+def _story_words(title: str) -> list[str]:
+    return [w for w in normalize_story_title(title).split() if w not in _STORY_STOPWORDS]
+
+
+def story_shingles(title: str) -> frozenset:
+    """Content words + adjacent word pairs of the normalized title."""
+    words = _story_words(title)
+    return frozenset(words + [f"{a} {b}" for a, b in zip(words, words[1:])])
+
+
+@functools.lru_cache(maxsize=65536)
+def _word_hashes(word: str) -> tuple[int, ...]:
+    # headline vocabulary repeats a lot: most words are hashed once per process
+    return _STORY_SIG.unpack(hashlib.blake2b(word.encode("utf-8"), digest_size=2 * STORY_MINHASH_PERMS).digest())
+
+
+def _minhash(words: set[str]) -> list[int]:
+    # column-wise min over the per-word hash rows (map/min run in C, no per-permutation Python loop)
+    rows = [_word_hashes(w) for w in words]
+    return list(rows[0]) if len(rows) == 1 else list(map(min, *rows))
+
+
+def _jaccard(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    inter = len(a & b)
+    return inter / (len(a) + len(b) - inter)
+
+
+class StoryIndex:
+    """
+    Incremental near-duplicate clustering of headlines (thread-safe, bounded LRU of clusters).
+    Cluster = {"id", "shingles", "bands", "rep", "domains", "size", "first_ts", "last_ts", "alerted"};
+    "rep" is the best-scoring member seen so far, len(domains) the source count.
+    """
+
+    def __init__(self, max_clusters: int, max_members: int):
+        self.max_clusters = max(100, int(max_clusters))
+        self.max_members = max(self.max_clusters, int(max_members))
+        self._lock = threading.Lock()
+        self._clusters: OrderedDict[str, dict] = OrderedDict()
+        self._buckets: dict[tuple, set[str]] = {}  # (band, band values) -> story ids
+        self._members: OrderedDict[str, str] = OrderedDict()  # item_hash -> story id
+
+    def assign(self, item: dict) -> dict:
+        """Puts item in its cluster (joining or founding one), sets item["_story_id"]; returns the cluster."""
+        h = item.get("_item_hash") or make_item_hash((item.get("title") or "").strip(), (item.get("link") or "").strip())
+        words = _story_words(item.get("title") or "")
+        shingles = frozenset(words + [f"{a} {b}" for a, b in zip(words, words[1:])])
+        sig = _minhash(set(words)) if words else []
+        bands = [(i, tuple(sig[i: i + STORY_LSH_ROWS])) for i in range(0, len(sig), STORY_LSH_ROWS)]
+
+        with self._lock:
+            cid = self._members.get(h) or item.get("_story_id") or ""
+            cluster = self._clusters.get(cid) if cid else None
+            if cluster is None and shingles:
+                best = 0.0
+                candidates = set()
+                for band in bands:
+                    candidates.update(self._buckets.get(band, ()))
+                for c in candidates:
+                    sim = _jaccard(shingles, self._clusters[c]["shingles"])
+                    if sim >= STORY_SIMILARITY and sim > best:
+                        best, cluster = sim, self._clusters[c]
+            if cluster is None:
+                cluster = self._found(cid or h[:16], shingles, bands, item)
+            elif h not in self._members:
+                self._join(cluster, item)
+
+            self._clusters.move_to_end(cluster["id"])
+            self._members[h] = cluster["id"]
+            self._members.move_to_end(h)
+            while len(self._members) > self.max_members:
+                self._members.popitem(last=False)
+
+        item["_story_id"] = cluster["id"]
+        return cluster
+
+    def _found(self, cid: str, shingles: frozenset, bands: list[tuple], item: dict) -> dict:
+        ts = float(item.get("_ts") or 0.0)
+        cluster = {
+            "id": cid, "shingles": shingles, "bands": bands, "rep": item,
+            "domains": {item.get("_domain") or ""} - {""}, "size": 1,
+            "first_ts": ts, "last_ts": ts, "alerted": False,
+        }
+        self._clusters[cid] = cluster
+        for band in bands:
+            self._buckets.setdefault(band, set()).add(cid)
+        while len(self._clusters) > self.max_clusters:
+            _, old = self._clusters.popitem(last=False)
+            for band in old["bands"]:
+                ids = self._buckets.get(band)
+                if ids is not None:
+                    ids.discard(old["id"])
+                    if not ids:
+                        del self._buckets[band]
+        return cluster
+
+    def _join(self, cluster: dict, item: dict):
+        ts = float(item.get("_ts") or 0.0)
+        cluster["size"] += 1
+        if item.get("_domain"):
+            cluster["domains"].add(item["_domain"])
+        cluster["first_ts"] = min(cluster["first_ts"], ts) if cluster["first_ts"] else ts
+        cluster["last_ts"] = max(cluster["last_ts"], ts)
+        if int(item.get("_score") or 0) > int(cluster["rep"].get("_score") or 0):
+            cluster["rep"] = item
+
+    def get(self, story_id: str) -> dict | None:
+        with self._lock:
+            return self._clusters.get(story_id)
+
+    def source_count(self, story_id: str) -> int:
+        with self._lock:
+            c = self._clusters.get(story_id)
+            return max(1, len(c["domains"])) if c else 1
+
+    def claim_alert(self, story_id: str) -> bool:
+        """True the first time a story is alerted (later copies from other outlets stay quiet)."""
+        with self._lock:
+            c = self._clusters.get(story_id)
+            if c is None or c["alerted"]:
+                return c is None
+            c["alerted"] = True
+            return True
+
+    def alerted(self, story_id: str) -> bool:
+        with self._lock:
+            c = self._clusters.get(story_id)
+            return bool(c and c["alerted"])
+
+    def stats(self) -> dict:
+        with self._lock:
+            multi = sum(1 for c in self._clusters.values() if len(c["domains"]) > 1)
+            return {"clusters": len(self._clusters), "multi_source": multi, "members": len(self._members)}
+
+
+@process_resource
+def get_story_index() -> StoryIndex:
+    return StoryIndex(STORY_MAX_CLUSTERS, STORY_MAX_MEMBERS)
+
+
+def collapse_stories(items: list[dict], index: StoryIndex | None = None) -> list[dict]:
+    """
+    One entry per story, in first-seen order: the best-scoring member present in items,
+    copied with "_story_sources" (distinct outlets in the whole cluster).
+    index: a private StoryIndex for rows that must stay out of the live one (archive rows);
+    every item is assigned to it, stored story ids only seed the cluster ids.
+    """
+    stories = get_story_index() if index is None else index
+    best: dict[str, dict] = {}
+    for a in items:
+        sid = stories.assign(a)["id"] if index is not None else (a.get("_story_id") or stories.assign(a)["id"])
+        b = best.get(sid)
+        if b is None or int(a.get("_score") or 0) > int(b.get("_score") or 0):
+            best[sid] = a
+    return [dict(a, _story_sources=stories.source_count(sid)) for sid, a in best.items()]
+
+
+# =========================
+# METRICS (Prometheus text format on METRICS_PORT)
+# - recording = a dict update under a lock; text is only rendered when /metrics is scraped
+# =========================
+METRICS_LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class MetricsRegistry:
+    """Counters + histograms keyed by (name, labels). Thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._meta: dict[str, tuple[str, str, tuple]] = {}  # name -> (type, help, buckets)
+        self._counters: dict[tuple, float] = {}
+        self._hists: dict[tuple, list] = {}  # key -> [bucket counts..., +Inf count, sum]
+
+    def describe(self, name: str, kind: str, help_text: str, buckets: tuple = METRICS_LATENCY_BUCKETS):
+        self._meta[name] = (kind, help_text, tuple(buckets))
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        buckets = self._meta.get(name, ("histogram", "", METRICS_LATENCY_BUCKETS))[2]
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            h = self._hists.get(key)
+            if h is None:
+                h = self._hists[key] = [0] * (len(buckets) + 1) + [0.0]
+            for i, le in enumerate(buckets):
+                if value <= le:
+                    h[i] += 1
+            h[len(buckets)] += 1
+            h[-1] += value
+
+    @contextmanager
+    def time(self, name: str, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t0, **labels)
+
+    @staticmethod
+    def _labels(pairs: tuple, extra: str = "") -> str:
+        parts = ['%s="%s"' % (k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")) for k, v in pairs]
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+    def render(self) -> str:
+        with self._lock:
+            counters = dict(self._counters)
+            hists = {k: list(v) for k, v in self._hists.items()}
+
+        lines = []
+        names = sorted({k[0] for k in counters} | {k[0] for k in hists})
+        for name in names:
+            kind, help_text, buckets = self._meta.get(name, ("counter" if any(k[0] == name for k in counters) else "histogram", "", METRICS_LATENCY_BUCKETS))
+            if help_text:
+                lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for (n, labels), v in sorted(counters.items()):
+                if n == name:
+                    lines.append(f"{name}{self._labels(labels)} {v:g}")
+            for (n, labels), h in sorted(hists.items()):
+                if n != name:
+                    continue
+                for i, le in enumerate(buckets):
+                    bucket_labels = self._labels(labels, 'le="%g"' % le)
+                    lines.append(f"{name}_bucket{bucket_labels} {h[i]}")
+                inf_labels = self._labels(labels, 'le="+Inf"')
+                lines.append(f"{name}_bucket{inf_labels} {h[len(buckets)]}")
+                lines.append(f"{name}_sum{self._labels(labels)} {h[-1]:.6f}")
+                lines.append(f"{name}_count{self._labels(labels)} {h[len(buckets)]}")
+        return "\n".join(lines) + "\n"
+
+
+@process_resource
+def get_metrics() -> MetricsRegistry:
+    m = MetricsRegistry()
+    m.describe("ozy_stage_seconds", "histogram", "Time per pipeline stage call (fetch_http, parse, dedupe, filter, score, cluster, db_upsert, alert_dedupe, gemini).")
+    m.describe("ozy_stage_items_total", "counter", "Items handled per pipeline stage.")
+    m.describe("ozy_ingest_cycle_seconds", "histogram", "Full ingestion cycle (all keyword groups).")
+    m.describe("ozy_ingest_failures_total", "counter", "Ingestion cycles that crashed (run_once raised), by exception type.")
+    m.describe("ozy_feed_requests_total", "counter", "Feed GETs by result (changed, unchanged, not_modified, error, cancelled / timeout = shard dropped at the deadline).")
+    m.describe("ozy_source_fetch_seconds", "histogram", "Per-source fetch latency (incl. retries).")
+    m.describe("ozy_source_failures_total", "counter", "Per-source failed or skipped (circuit open) fetches.")
+    m.describe("ozy_db_query_seconds", "histogram", "DB call latency by query.")
+    m.describe("ozy_gemini_request_seconds", "histogram", "Gemini HTTP call latency by mode / model / status.")
+    m.describe("ozy_gemini_success_attempt", "histogram", "Attempt number that produced text (1 = first try; prompts are budgeted, so no retries).", buckets=(1, 2, 3, 4))
+    m.describe("ozy_gemini_failures_total", "counter", "Gemini calls that produced no usable output.")
+    m.describe("ozy_gemini_cache_total", "counter", "Gemini response cache lookups / stores by mode and result (hit, miss, store).")
+    m.describe("ozy_gemini_cache_tokens_saved_total", "counter", "Tokens (usageMetadata.totalTokenCount) not re-billed thanks to cache hits.")
+    m.describe("ozy_gemini_cache_evictions_total", "counter", "Cached Gemini responses evicted to stay under GEMINI_CACHE_MAX_MB.")
+    m.describe("ozy_gemini_first_token_seconds", "histogram", "Streaming: time from request to the first text chunk (what users perceive as speed).")
+    m.describe("ozy_gemini_prompt_tokens", "histogram", "Prompt size in tokens: estimate_tokens() vs usageMetadata.promptTokenCount.", buckets=(250, 500, 1000, 2000, 4000, 6000, 8000, 12000, 16000, 32000))
+    m.describe("ozy_ai_jobs_total", "counter", "AI jobs by kind and result (submitted, deduped, rejected, done, error, cancelled).")
+    m.describe("ozy_ai_job_seconds", "histogram", "AI job time by kind and phase (wait = queued, run = Gemini call).")
+    m.describe("ozy_cold_start_seconds", "histogram", "One-time process initialization (app_startup).")
+    m.describe("ozy_rerun_seconds", "histogram", "Script rerun time by phase (pre_render = overhead before the tape, total).")
+    m.describe("ozy_cache_calls_total", "counter", "Calls to st.cache_data functions.")
+    m.describe("ozy_cache_misses_total", "counter", "st.cache_data calls that ran the function body (hit ratio = 1 - misses / calls).")
+    return m
+
+
+def timed(metric: str, **labels):
+    """Decorator: observe the call duration in `metric` (histogram)."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with get_metrics().time(metric, **labels):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+def metered_cache_data(**cache_kwargs):
+    """st.cache_data that also counts calls vs. body executions (cache hit ratio)."""
+    def deco(fn):
+        name = fn.__name__
+
+        @functools.wraps(fn)
+        def body(*args, **kwargs):
+            get_metrics().inc("ozy_cache_misses_total", fn=name)
+            return fn(*args, **kwargs)
+
+        cached = st.cache_data(**cache_kwargs)(body)
+
+        @functools.wraps(fn)
+        def call(*args, **kwargs):
+            get_metrics().inc("ozy_cache_calls_total", fn=name)
+            return cached(*args, **kwargs)
+
+        call.clear = cached.clear
+        return call
+    return deco
+
+
+@process_resource
+def start_metrics_server():
+    """One /metrics listener per process (None when disabled or the port is taken)."""
+    if METRICS_PORT <= 0:
+        return None
+
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = get_metrics().render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, fmt, *args):
+            pass
+
+    try:
+        server = ThreadingHTTPServer((METRICS_BIND, METRICS_PORT), MetricsHandler)
+    except OSError:
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="ozy-metrics", daemon=True).start()
+    return server
+
+
+# =========================
+# HTTP (one pooled keep-alive client per process)
+# - per-host connection pools reused by RSS + Gemini calls (no TLS handshake per call)
+# - gzip/deflate handled by requests (Accept-Encoding default)
+# - retries: connect errors for all methods; 429/5xx only for idempotent GET/HEAD
+# =========================
+class CappedRetry(Retry):
+    """Retry-After honoured up to HTTP_RETRY_AFTER_MAX_SECONDS: a 429/503 asking for minutes must not park a fetch thread."""
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, HTTP_RETRY_AFTER_MAX_SECONDS)
+
+
+@process_resource
+def get_http_session() -> requests.Session:
+    retry = CappedRetry(
+        total=HTTP_RETRIES,
+        connect=HTTP_RETRIES,
+        read=HTTP_RETRIES,
+        status=HTTP_RETRIES,
+        backoff_factor=HTTP_RETRY_BACKOFF,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Accept-Encoding": "gzip, deflate"})
+    return session
+
+
 # =========================
 # DB (Postgres or SQLite)
 # =========================
+class SqlitePool:
+    """
+    WAL-mode SQLite: ONE writer connection (serialized by a lock) + one reader connection per thread.
+    Readers never wait for the writer (WAL), and sessions stop sharing a single cursor.
+    """
+
+    kind = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._write_lock = threading.Lock()
+        self._local = threading.local()
+        self._writer = self._open()
+        self._writer.execute("PRAGMA journal_mode=WAL;")
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL;")  # safe with WAL, far fewer fsyncs
+        conn.execute("PRAGMA busy_timeout=5000;")
+        conn.execute("PRAGMA temp_store=MEMORY;")
+        conn.execute("PRAGMA cache_size=-16000;")  # ~16 MB page cache per connection
+        return conn
+
+    @contextmanager
+    def connection(self, write: bool):
+        if write:
+            with self._write_lock:
+                try:
+                    yield self._writer
+                except Exception:
+                    self._writer.rollback()
+                    raise
+            return
+
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn  # closed when the thread goes away
+        yield conn
+
+
+class PostgresPool:
+    """
+    psycopg2 ThreadedConnectionPool with:
+      - blocking checkout (semaphore) instead of PoolError when exhausted
+      - health check on connections idle for a while; broken ones are closed + replaced
+      - every connection returned clean (rollback ends read transactions)
+    """
+
+    kind = "postgres"
+
+    def __init__(self, dsn: str, minconn: int, maxconn: int):
+        import psycopg2
+        from psycopg2 import pool
+
+        self._errors = (psycopg2.OperationalError, psycopg2.InterfaceError)
+        self._pool = pool.ThreadedConnectionPool(minconn, maxconn, dsn)
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._last_used: dict[int, float] = {}
+
+    def _healthy(self, conn) -> bool:
+        if conn.closed:
+            return False
+        if (time.time() - self._last_used.get(id(conn), 0.0)) < PG_HEALTHCHECK_IDLE_SECONDS:
+            return True
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT 1;")
+            cur.fetchone()
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _checkout(self):
+        for _ in range(3):
+            conn = self._pool.getconn()
+            if self._healthy(conn):
+                return conn
+            self._last_used.pop(id(conn), None)
+            self._pool.putconn(conn, close=True)  # reconnect: pool opens a fresh one next time
+        return self._pool.getconn()
+
+    @contextmanager
+    def connection(self, write: bool):
+        self._slots.acquire()
+        conn = None
+        broken = False
+        try:
+            conn = self._checkout()
+            yield conn
+        except self._errors:
+            broken = True
+            raise
+        except Exception:
+            if conn is not None and not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            if conn is not None:
+                broken = broken or bool(conn.closed)
+                if not broken:
+                    try:
+                        conn.rollback()
+                    except Exception:
+                        broken = True
+                if broken:
+                    self._last_used.pop(id(conn), None)
+                else:
+                    self._last_used[id(conn)] = time.time()
+                self._pool.putconn(conn, close=broken)
+            self._slots.release()
+
+
 def db_connect():
     if DATABASE_URL:
         try:
-            import psycopg2  # psycopg2-binary
-            conn = psycopg2.connect(DATABASE_URL)
-            return "postgres", conn
+            return PostgresPool(DATABASE_URL, PG_POOL_MIN, PG_POOL_MAX)
         except Exception:
             pass
 
-    conn = sqlite3.connect("news.db", check_same_thread=False)
-    return "sqlite", conn
+    return SqlitePool(SQLITE_PATH)
 
 
-@st.cache_resource
-def get_db():
+@process_resource
+def get_db_pool():
     return db_connect()
 
 
-def db_init():
-    kind, conn = get_db()
-    cur = conn.cursor()
+@contextmanager
+def db_conn(write: bool = False):
+    """Borrow a pooled connection: `with db_conn(write=True) as (kind, conn): ...` (caller commits)."""
+    pool = get_db_pool()
+    with pool.connection(write) as conn:
+        yield pool.kind, conn
+
 
+# =========================
+# SCHEMA MIGRATIONS (versioned, run once per process)
+# - schema_version records what is applied; each step has SQLite + Postgres DDL
+# - append new steps at the end, never edit applied ones
+# =========================
+def _migration_base_tables(kind: str, cur):
     if kind == "postgres":
         cur.execute("""
         CREATE TABLE IF NOT EXISTS news_items (
@@ -460,10 +1277,21 @@ def db_init():
             content_json TEXT
         );
         """)
-        # Add digest_hour column if it doesn't exist (migration)
+        # Add digest_hour column if it doesn't exist (pre-migration databases)
         cur.execute("""
         ALTER TABLE ai_digests ADD COLUMN IF NOT EXISTS digest_hour TEXT;
         """)
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS alerts_seen (
+            id BIGSERIAL PRIMARY KEY,
+            alert_hash TEXT UNIQUE,
+            ts DOUBLE PRECISION,
+            title TEXT,
+            link TEXT,
+            domain TEXT,
+            score INTEGER
+        );
+        """)
     else:
         cur.execute("""
         CREATE TABLE IF NOT EXISTS news_items (
@@ -489,36 +1317,243 @@ def db_init():
             content_json TEXT
         );
         """)
-        # SQLite: Add digest_hour column if missing (migration)
+        # SQLite: Add digest_hour column if missing (pre-migration databases)
         cur.execute("PRAGMA table_info(ai_digests)")
         columns = [col[1] for col in cur.fetchall()]
         if "digest_hour" not in columns:
             cur.execute("ALTER TABLE ai_digests ADD COLUMN digest_hour TEXT;")
-    
-    conn.commit()
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS alerts_seen (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            alert_hash TEXT UNIQUE,
+            ts REAL,
+            title TEXT,
+            link TEXT,
+            domain TEXT,
+            score INTEGER
+        );
+        """)
+
 
+def _migration_maintenance_runs(kind: str, cur):
+    ts_type = "DOUBLE PRECISION" if kind == "postgres" else "REAL"
+    cur.execute(f"""
+    CREATE TABLE IF NOT EXISTS maintenance_runs (
+        task TEXT PRIMARY KEY,
+        last_run_ts {ts_type}
+    );
+    """)
 
-def db_prune_old():
-    kind, conn = get_db()
-    cutoff_ts = time.time() - (RETENTION_DAYS * 86400.0)
-    cur = conn.cursor()
+
+def _migration_query_indexes(kind: str, cur):
+    # Same DDL on both backends
+    # news_items(ts): db_get_news_since / hash seeding / retention
+    # news_items(score, ts): score-ranked digest context
+    # alerts_seen(ts), ai_digests(ts): retention + latest digest
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_news_items_ts ON news_items (ts);")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_news_items_score_ts ON news_items (score, ts);")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_alerts_seen_ts ON alerts_seen (ts);")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_ai_digests_ts ON ai_digests (ts);")
+
+
+def _migration_story_ids(kind: str, cur):
+    # news_items.story_id: near-duplicate cluster (see StoryIndex); NULL on older rows
     if kind == "postgres":
-        cur.execute("DELETE FROM news_items WHERE ts < %s;", (cutoff_ts,))
+        cur.execute("ALTER TABLE news_items ADD COLUMN IF NOT EXISTS story_id TEXT;")
     else:
-        cur.execute("DELETE FROM news_items WHERE ts < ?;", (cutoff_ts,))
-    conn.commit()
+        cur.execute("PRAGMA table_info(news_items)")
+        if "story_id" not in [col[1] for col in cur.fetchall()]:
+            cur.execute("ALTER TABLE news_items ADD COLUMN story_id TEXT;")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_news_items_story_id ON news_items (story_id);")
 
 
-def db_upsert_many(items: list[dict]):
-    kind, conn = get_db()
-    cur = conn.cursor()
+def _migration_search_index(kind: str, cur):
+    if kind == "postgres":
+        # Generated column: every INSERT (db_upsert_many) maintains it; deletes drop it with the row
+        cur.execute("""
+        ALTER TABLE news_items ADD COLUMN IF NOT EXISTS search_tsv tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(summary, '')), 'B')
+        ) STORED;
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_news_items_search ON news_items USING GIN (search_tsv);")
+        return
+    try:
+        # External-content FTS5 index over news_items(title, summary): rows are added by
+        # db_upsert_many, removed by the delete trigger (retention)
+        cur.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS news_fts USING fts5(
+            title, summary, content='news_items', content_rowid='id', tokenize='porter unicode61'
+        );
+        """)
+    except sqlite3.OperationalError:
+        return  # SQLite built without FTS5: db_search_news falls back to LIKE
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS news_items_fts_delete AFTER DELETE ON news_items BEGIN
+        INSERT INTO news_fts (news_fts, rowid, title, summary) VALUES ('delete', old.id, old.title, old.summary);
+    END;
+    """)
+    cur.execute("INSERT INTO news_fts (news_fts) VALUES ('rebuild');")
+
+
+def _migration_gemini_cache(kind: str, cur):
+    # Gemini responses keyed by sha256(mode, model, prompt, generationConfig); see gemini_cache_get
+    if kind == "postgres":
+        id_col, ts_type = "id BIGSERIAL PRIMARY KEY", "DOUBLE PRECISION"
+    else:
+        id_col, ts_type = "id INTEGER PRIMARY KEY AUTOINCREMENT", "REAL"
+    cur.execute(f"""
+    CREATE TABLE IF NOT EXISTS gemini_cache (
+        {id_col},
+        cache_key TEXT UNIQUE,
+        ts {ts_type},
+        last_hit_ts {ts_type},
+        hits INTEGER DEFAULT 0,
+        mode TEXT,
+        model TEXT,
+        tokens INTEGER,
+        size_bytes INTEGER,
+        response TEXT
+    );
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_gemini_cache_ts ON gemini_cache (ts);")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_gemini_cache_last_hit ON gemini_cache (last_hit_ts);")
+
+
+MIGRATIONS = [
+    (1, "base tables (news_items, ai_digests, alerts_seen)", _migration_base_tables),
+    (2, "maintenance_runs (retention slots)", _migration_maintenance_runs),
+    (3, "indexes on ts / score", _migration_query_indexes),
+    (4, "news_items.story_id (near-duplicate clusters)", _migration_story_ids),
+    (5, "full-text search (FTS5 / tsvector + GIN)", _migration_search_index),
+    (6, "gemini_cache (content-addressed AI responses)", _migration_gemini_cache),
+]
+
+MIGRATION_LOCK_ID = 482_117_001  # Postgres advisory lock: one migrator per cluster
+
+
+def db_migrate() -> int:
+    """Applies pending MIGRATIONS in order; returns the resulting schema version."""
+    with db_conn(write=True) as (kind, conn):
+        cur = conn.cursor()
+
+        if kind == "postgres":
+            cur.execute("SELECT pg_advisory_lock(%s);", (MIGRATION_LOCK_ID,))
+        try:
+            ts_type = "DOUBLE PRECISION" if kind == "postgres" else "REAL"
+            cur.execute(f"""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description TEXT,
+                applied_ts {ts_type}
+            );
+            """)
+            conn.commit()
+
+            cur.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version;")
+            current = int(cur.fetchone()[0])
+
+            p = "%s" if kind == "postgres" else "?"
+            for version, description, apply in MIGRATIONS:
+                if version <= current:
+                    continue
+                try:
+                    apply(kind, cur)
+                    cur.execute(
+                        f"INSERT INTO schema_version (version, description, applied_ts) VALUES ({p},{p},{p});",
+                        (version, description, time.time()),
+                    )
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                current = version
+            return current
+        finally:
+            if kind == "postgres":
+                conn.rollback()  # no-op unless a step failed mid-transaction
+                cur.execute("SELECT pg_advisory_unlock(%s);", (MIGRATION_LOCK_ID,))
+                conn.commit()
+
+
+@process_resource
+def ensure_schema() -> int:
+    # Once per process (not on every Streamlit rerun)
+    return db_migrate()
+
+
+# =========================
+# RETENTION (scheduled, batched; never inline with upserts)
+# =========================
+@timed("ozy_db_query_seconds", query="maintenance_slot")
+def db_acquire_maintenance_slot(task: str, interval_seconds: float) -> bool:
+    """
+    Cluster-wide "at most once per interval": one row per task in maintenance_runs.
+    The conditional UPDATE succeeds for exactly one instance per interval.
+    """
+    with db_conn(write=True) as (kind, conn):
+        cur = conn.cursor()
+        now = time.time()
+        if kind == "postgres":
+            cur.execute("INSERT INTO maintenance_runs (task, last_run_ts) VALUES (%s, 0) ON CONFLICT (task) DO NOTHING;", (task,))
+            cur.execute("UPDATE maintenance_runs SET last_run_ts = %s WHERE task = %s AND last_run_ts < %s;", (now, task, now - interval_seconds))
+        else:
+            cur.execute("INSERT OR IGNORE INTO maintenance_runs (task, last_run_ts) VALUES (?, 0);", (task,))
+            cur.execute("UPDATE maintenance_runs SET last_run_ts = ? WHERE task = ? AND last_run_ts < ?;", (now, task, now - interval_seconds))
+        acquired = cur.rowcount == 1
+        conn.commit()
+        return acquired
+
+
+@timed("ozy_db_query_seconds", query="prune")
+def db_prune_table(table: str, retention_days: float, batch_rows: int, max_batches: int) -> int:
+    """Deletes rows older than retention in bounded batches (one short transaction each)."""
+    cutoff_ts = time.time() - (float(retention_days) * 86400.0)
+    removed = 0
+    for _ in range(max_batches):
+        # Writer is released between batches so ingestion never waits behind a long prune
+        with db_conn(write=True) as (kind, conn):
+            p = "%s" if kind == "postgres" else "?"
+            cur = conn.cursor()
+            cur.execute(
+                f"DELETE FROM {table} WHERE id IN (SELECT id FROM {table} WHERE ts < {p} LIMIT {p});",
+                (cutoff_ts, batch_rows),
+            )
+            n = max(0, cur.rowcount)
+            conn.commit()
+        removed += n
+        if n < batch_rows:
+            break
+    return removed
+
+
+def run_retention(force: bool = False) -> dict | None:
+    """
+    Prunes every table in RETENTION_POLICIES if this instance wins the interval slot.
+    Returns a report {"tables": {table: rows_removed}, "seconds": ..., "ts": ...} or None if skipped.
+    """
+    if not force and not db_acquire_maintenance_slot("retention", RETENTION_INTERVAL_SECONDS):
+        return None
+
+    started = time.time()
+    removed = {}
+    for table, days in RETENTION_POLICIES.items():
+        try:
+            removed[table] = db_prune_table(table, days, RETENTION_BATCH_ROWS, RETENTION_MAX_BATCHES)
+        except Exception as e:
+            removed[table] = f"error: {type(e).__name__}"
+    return {"tables": removed, "seconds": round(time.time() - started, 3), "ts": time.time()}
 
+
+@timed("ozy_db_query_seconds", query="upsert_news")
+def db_upsert_many(items: list[dict]):
     rows = []
     for a in items:
         title = (a.get("title") or "").strip()
         link = (a.get("link") or "").strip()
         canonical_link = (a.get("_canonical_link") or "").strip()
-        item_hash = make_item_hash(title, link, canonical_link=canonical_link)
+        item_hash = a.get("_item_hash") or make_item_hash(title, link, canonical_link=canonical_link)
 
         rows.append((
             item_hash,
@@ -531,114 +1566,362 @@ def db_upsert_many(items: list[dict]):
             int(a.get("_score") or 0),
             int(a.get("_kw_hits") or 0),
             int(a.get("_noise_hits") or 0),
+            (a.get("_story_id") or None),
         ))
 
     if not rows:
         return
 
-    if kind == "postgres":
-        cur.executemany("""
-            INSERT INTO news_items
-            (item_hash, ts, source, domain, title, summary, link, score, kw_hits, noise_hits)
-            VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
-            ON CONFLICT (item_hash) DO NOTHING;
-        """, rows)
-    else:
-        cur.executemany("""
-            INSERT OR IGNORE INTO news_items
-            (item_hash, ts, source, domain, title, summary, link, score, kw_hits, noise_hits)
-            VALUES (?,?,?,?,?,?,?,?,?,?);
-        """, rows)
+    with db_conn(write=True) as (kind, conn):
+        cur = conn.cursor()
+        if kind == "postgres":
+            cur.executemany("""
+                INSERT INTO news_items
+                (item_hash, ts, source, domain, title, summary, link, score, kw_hits, noise_hits, story_id)
+                VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
+                ON CONFLICT (item_hash) DO NOTHING;
+            """, rows)
+        else:
+            # Single writer: ids above the current max are exactly the rows this batch inserts
+            cur.execute("SELECT COALESCE(MAX(id), 0) FROM news_items;")
+            max_id = int(cur.fetchone()[0])
+            cur.executemany("""
+                INSERT OR IGNORE INTO news_items
+                (item_hash, ts, source, domain, title, summary, link, score, kw_hits, noise_hits, story_id)
+                VALUES (?,?,?,?,?,?,?,?,?,?,?);
+            """, rows)
+            if has_sqlite_fts(cur):
+                cur.execute(
+                    "INSERT INTO news_fts (rowid, title, summary) SELECT id, title, summary FROM news_items WHERE id > ?;",
+                    (max_id,),
+                )
+
+        conn.commit()
+
+
+@timed("ozy_db_query_seconds", query="news_since")
+def db_get_news_since(hours: int, limit: int = 500) -> list[dict]:
+    with db_conn(write=False) as (kind, conn):
+        since_ts = time.time() - (hours * 3600.0)
+        cur = conn.cursor()
+
+        if kind == "postgres":
+            cur.execute("""
+                SELECT ts, source, domain, title, summary, link, score, kw_hits, noise_hits, item_hash, story_id
+                FROM news_items
+                WHERE ts >= %s
+                ORDER BY ts DESC
+                LIMIT %s;
+            """, (since_ts, limit))
+        else:
+            cur.execute("""
+                SELECT ts, source, domain, title, summary, link, score, kw_hits, noise_hits, item_hash, story_id
+                FROM news_items
+                WHERE ts >= ?
+                ORDER BY ts DESC
+                LIMIT ?;
+            """, (since_ts, limit))
+
+        rows = cur.fetchall()
+        out = []
+        for r in rows:
+            out.append({
+                "_ts": float(r[0]),
+                "source": r[1],
+                "_domain": r[2],
+                "title": r[3],
+                "summary": r[4],
+                "link": r[5],
+                "_score": int(r[6]),
+                "_kw_hits": int(r[7]),
+                "_noise_hits": int(r[8]),
+                "_item_hash": r[9] or "",
+                "_story_id": r[10] or "",
+            })
+        return out
 
-    conn.commit()
-    db_prune_old()
 
+@timed("ozy_db_query_seconds", query="item_hashes_since")
+def db_get_item_hashes_since(hours: int, limit: int = 20000) -> list[str]:
+    with db_conn(write=False) as (kind, conn):
+        since_ts = time.time() - (hours * 3600.0)
+        cur = conn.cursor()
+        if kind == "postgres":
+            cur.execute("SELECT item_hash FROM news_items WHERE ts >= %s ORDER BY ts DESC LIMIT %s;", (since_ts, limit))
+        else:
+            cur.execute("SELECT item_hash FROM news_items WHERE ts >= ? ORDER BY ts DESC LIMIT ?;", (since_ts, limit))
+        return [r[0] for r in cur.fetchall() if r[0]]
+
+
+SEARCH_PAGE_SIZE = 20
+SEARCH_RANK_WINDOW = 1000  # matches ranked per step (newest first): bounded work per page
+_SEARCH_TOKEN_RE = re.compile(r"\w+")
+_SEARCH_COLUMNS = "n.id, n.ts, n.source, n.domain, n.title, n.summary, n.link, n.score, n.kw_hits, n.noise_hits, n.item_hash, n.story_id"
+
+
+@process_resource
+def get_fts_state() -> dict:
+    return {"sqlite": None}  # None = not checked yet
 
-def db_get_news_since(hours: int, limit: int = 500) -> list[dict]:
-    kind, conn = get_db()
-    since_ts = time.time() - (hours * 3600.0)
-    cur = conn.cursor()
 
+def has_sqlite_fts(cur) -> bool:
+    """news_fts exists (migration 5 on an FTS5-enabled SQLite); checked once per process."""
+    state = get_fts_state()
+    if state["sqlite"] is None:
+        cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'news_fts';")
+        state["sqlite"] = cur.fetchone() is not None
+    return state["sqlite"]
+
+
+def fts5_query(text: str) -> str:
+    """
+    Search box text -> FTS5 MATCH expression (never a syntax error):
+    words are AND-ed prefix terms, "quoted phrases" stay phrases, OR and -word are honoured.
+    """
+    terms: list[str] = []
+    excluded: list[str] = []
+    for phrase, word in re.findall(r'"([^"]*)"|(\S+)', text or ""):
+        if word == "OR":
+            if terms and terms[-1] != "OR":
+                terms.append("OR")
+            continue
+        negate = word.startswith("-")
+        tokens = _SEARCH_TOKEN_RE.findall((phrase or word).lower())
+        if not tokens:
+            continue
+        term = '"' + " ".join(tokens) + '"' + ("" if phrase else "*")
+        (excluded if negate else terms).append(term)
+    while terms and terms[-1] == "OR":
+        terms.pop()
+    if not terms:
+        return ""
+    expr = " ".join(terms)
+    return f"({expr}) NOT " + " NOT ".join(excluded) if excluded else expr
+
+
+def _search_window(kind: str, cur, query: str, ceil_id: int) -> list[tuple[int, float]]:
+    """Newest SEARCH_RANK_WINDOW matches with id <= ceil_id as (id, relevance); higher relevance = better."""
     if kind == "postgres":
         cur.execute("""
-            SELECT ts, source, domain, title, summary, link, score, kw_hits, noise_hits
-            FROM news_items
-            WHERE ts >= %s
-            ORDER BY ts DESC
-            LIMIT %s;
-        """, (since_ts, limit))
-    else:
+            SELECT id, ts_rank_cd(search_tsv, q)
+            FROM news_items, websearch_to_tsquery('english', %s) q
+            WHERE search_tsv @@ q AND id <= %s
+            ORDER BY id DESC LIMIT %s;
+        """, (query, ceil_id, SEARCH_RANK_WINDOW))
+    elif has_sqlite_fts(cur):
+        # bm25 is lower-is-better; title hits weigh 4x summary hits
         cur.execute("""
-            SELECT ts, source, domain, title, summary, link, score, kw_hits, noise_hits
-            FROM news_items
-            WHERE ts >= ?
-            ORDER BY ts DESC
-            LIMIT ?;
-        """, (since_ts, limit))
-
-    rows = cur.fetchall()
+            SELECT rowid, -bm25(news_fts, 4.0, 1.0) FROM news_fts
+            WHERE news_fts MATCH ? AND rowid <= ?
+            ORDER BY rowid DESC LIMIT ?;
+        """, (fts5_query(query), ceil_id, SEARCH_RANK_WINDOW))
+    else:
+        # SQLite built without FTS5: unranked substring match
+        words = [w for w in _SEARCH_TOKEN_RE.findall(query.lower()) if w != "or"] or [query.lower()]
+        where = " AND ".join(["(lower(title) LIKE ? OR lower(summary) LIKE ?)"] * len(words))
+        cur.execute(
+            f"SELECT id, 0.0 FROM news_items WHERE {where} AND id <= ? ORDER BY id DESC LIMIT ?;",
+            [f"%{w}%" for w in words for _ in (0, 1)] + [ceil_id, SEARCH_RANK_WINDOW],
+        )
+    return [(int(r[0]), float(r[1])) for r in cur.fetchall()]
+
+
+@timed("ozy_db_query_seconds", query="search")
+def db_search_news(query: str, limit: int = SEARCH_PAGE_SIZE, after: tuple | None = None, since_hours: float | None = None) -> tuple[list[dict], tuple | None]:
+    """
+    Ranked full-text search over title + summary (whole retention window).
+    Matches are ranked SEARCH_RANK_WINDOW at a time, newest window first, so a page costs
+    the same whatever the archive size. Pass the returned cursor (next window ceiling,
+    ids still to show from the ranked windows) as `after` for the next page; None means last page.
+    The first page pins the window ceiling to MAX(id), and each window is ranked only once:
+    rows ingested while the user pages change neither the windows nor their order.
+    """
+    query = (query or "").strip()
+    if not _SEARCH_TOKEN_RE.search(query):
+        return [], None
+    since_ts = time.time() - float(since_hours) * 3600.0 if since_hours else 0.0
+
+    picked: list[int] = list(after[1]) if after else []  # ids in page order
+    with db_conn(write=False) as (kind, conn):
+        cur = conn.cursor()
+        p = "%s" if kind == "postgres" else "?"
+        if kind != "postgres" and has_sqlite_fts(cur) and not fts5_query(query):
+            return [], None  # e.g. only excluded words
+
+        if after:
+            ceil_id = int(after[0])
+        else:
+            # Pin the newest id now: rows ingested while the user pages must not shift the windows
+            cur.execute("SELECT COALESCE(MAX(id), 0) FROM news_items;")
+            ceil_id = int(cur.fetchone()[0])
+        # live scores drift as rows arrive (IDF, doc length), so a ranked window is never re-ranked:
+        # its unshown ids travel in the cursor and ceil_id already points below it
+        while len(picked) <= limit and ceil_id > 0:
+            window = _search_window(kind, cur, query, ceil_id)
+            if not window:
+                ceil_id = 0
+                break
+            ranked = window
+            if since_ts:
+                ids = [i for i, _ in window]
+                cur.execute(f"SELECT id, ts FROM news_items WHERE id IN ({','.join([p] * len(ids))});", ids)
+                ts_by_id = {int(r[0]): float(r[1] or 0.0) for r in cur.fetchall()}
+                ranked = [w for w in window if ts_by_id.get(w[0], 0.0) >= since_ts]
+                if not ranked and max(ts_by_id.values(), default=0.0) < since_ts:
+                    ceil_id = 0
+                    break  # ids follow ingestion order: older windows only get older
+            picked += [i for i, _ in sorted(ranked, key=lambda w: (-w[1], -w[0]))]
+            ceil_id = window[-1][0] - 1 if len(window) == SEARCH_RANK_WINDOW else 0
+
+        page = picked[:limit]
+        rows = []
+        if page:
+            cur.execute(f"SELECT {_SEARCH_COLUMNS} FROM news_items n WHERE n.id IN ({','.join([p] * len(page))});", page)
+            rows = cur.fetchall()
+
+    by_id = {int(r[0]): r for r in rows}
     out = []
-    for r in rows:
+    for i in page:
+        r = by_id.get(i)
+        if r is None:
+            continue  # pruned between the two queries
         out.append({
-            "_ts": float(r[0]),
-            "source": r[1],
-            "_domain": r[2],
-            "title": r[3],
-            "summary": r[4],
-            "link": r[5],
-            "_score": int(r[6]),
-            "_kw_hits": int(r[7]),
-            "_noise_hits": int(r[8]),
+            "_ts": float(r[1] or 0.0),
+            "source": r[2],
+            "_domain": r[3],
+            "title": r[4],
+            "summary": r[5],
+            "link": r[6],
+            "_score": int(r[7] or 0),
+            "_kw_hits": int(r[8] or 0),
+            "_noise_hits": int(r[9] or 0),
+            "_item_hash": r[10] or "",
+            "_story_id": r[11] or "",
         })
-    return out
+    rest = tuple(picked[limit:])
+    return out, ((ceil_id, rest) if rest or ceil_id > 0 else None)
 
 
+@timed("ozy_db_query_seconds", query="latest_digest")
 def db_get_latest_digest() -> dict | None:
-    kind, conn = get_db()
-    cur = conn.cursor()
-    cur.execute("SELECT ts, content_json FROM ai_digests ORDER BY ts DESC LIMIT 1;")
-    row = cur.fetchone()
-    if not row:
-        return None
-    try:
-        return {"ts": float(row[0]), "content": json.loads(row[1])}
-    except Exception:
-        return None
+    with db_conn(write=False) as (kind, conn):
+        cur = conn.cursor()
+        cur.execute("SELECT ts, content_json FROM ai_digests ORDER BY ts DESC LIMIT 1;")
+        row = cur.fetchone()
+        if not row:
+            return None
+        try:
+            return {"ts": float(row[0]), "content": json.loads(row[1])}
+        except Exception:
+            return None
 
 
+@timed("ozy_db_query_seconds", query="save_digest")
 def db_save_digest(content: dict, window_hours: int):
     """
     Idempotent: at most ONE digest per UTC hour.
     Prevents duplicates across Streamlit reruns / Railway multi-instances.
     """
-    kind, conn = get_db()
-    cur = conn.cursor()
+    with db_conn(write=True) as (kind, conn):
+        cur = conn.cursor()
+
+        ts = time.time()
+        payload = json.dumps(content, ensure_ascii=False)
+
+        # e.g. "2026-01-18T21" (UTC hour key)
+        digest_hour = time.strftime("%Y-%m-%dT%H", time.gmtime(ts))
+
+        if kind == "postgres":
+            cur.execute(
+                """
+                INSERT INTO ai_digests (ts, window_hours, digest_hour, content_json)
+                VALUES (%s,%s,%s,%s)
+                ON CONFLICT (digest_hour) DO NOTHING;
+                """,
+                (ts, window_hours, digest_hour, payload),
+            )
+        else:
+            cur.execute(
+                """
+                INSERT OR IGNORE INTO ai_digests (ts, window_hours, digest_hour, content_json)
+                VALUES (?,?,?,?);
+                """,
+                (ts, window_hours, digest_hour, payload),
+            )
 
-    ts = time.time()
-    payload = json.dumps(content, ensure_ascii=False)
+        conn.commit()
 
-    # e.g. "2026-01-18T21" (UTC hour key)
-    digest_hour = time.strftime("%Y-%m-%dT%H", time.gmtime(ts))
 
-    if kind == "postgres":
-        cur.execute(
-            """
-            INSERT INTO ai_digests (ts, window_hours, digest_hour, content_json)
-            VALUES (%s,%s,%s,%s)
-            ON CONFLICT (digest_hour) DO NOTHING;
-            """,
-            (ts, window_hours, digest_hour, payload),
-        )
-    else:
+@timed("ozy_db_query_seconds", query="gemini_cache_get")
+def db_get_gemini_cache(cache_key: str, ttl_seconds: float) -> tuple[str, int] | None:
+    """(response, tokens) if a live entry exists; the hit refreshes its LRU position."""
+    with db_conn(write=False) as (kind, conn):
+        p = "%s" if kind == "postgres" else "?"
+        cur = conn.cursor()
         cur.execute(
-            """
-            INSERT OR IGNORE INTO ai_digests (ts, window_hours, digest_hour, content_json)
-            VALUES (?,?,?,?);
-            """,
-            (ts, window_hours, digest_hour, payload),
+            f"SELECT id, response, tokens FROM gemini_cache WHERE cache_key = {p} AND ts >= {p};",
+            (cache_key, time.time() - ttl_seconds),
         )
+        row = cur.fetchone()
+    if not row:
+        return None
+    with db_conn(write=True) as (kind, conn):
+        p = "%s" if kind == "postgres" else "?"
+        cur = conn.cursor()
+        cur.execute(f"UPDATE gemini_cache SET last_hit_ts = {p}, hits = hits + 1 WHERE id = {p};", (time.time(), row[0]))
+        conn.commit()
+    return row[1], int(row[2] or 0)
+
+
+@timed("ozy_db_query_seconds", query="gemini_cache_put")
+def db_put_gemini_cache(cache_key: str, mode: str, model: str, response: str, tokens: int, max_bytes: int) -> int:
+    """
+    Stores (or refreshes) one response, then evicts least recently hit rows until the
+    table is back under max_bytes. Returns the number of rows evicted.
+    """
+    now = time.time()
+    size = len(response.encode("utf-8"))
+    row = (cache_key, now, now, mode, model, int(tokens or 0), size, response)
+    with db_conn(write=True) as (kind, conn):
+        cur = conn.cursor()
+        if kind == "postgres":
+            cur.execute(
+                """
+                INSERT INTO gemini_cache (cache_key, ts, last_hit_ts, mode, model, tokens, size_bytes, response)
+                VALUES (%s,%s,%s,%s,%s,%s,%s,%s)
+                ON CONFLICT (cache_key) DO UPDATE SET
+                    ts = EXCLUDED.ts, last_hit_ts = EXCLUDED.last_hit_ts, tokens = EXCLUDED.tokens,
+                    size_bytes = EXCLUDED.size_bytes, response = EXCLUDED.response;
+                """,
+                row,
+            )
+        else:
+            cur.execute(
+                """
+                INSERT OR REPLACE INTO gemini_cache (cache_key, ts, last_hit_ts, mode, model, tokens, size_bytes, response)
+                VALUES (?,?,?,?,?,?,?,?);
+                """,
+                row,
+            )
 
-    conn.commit()
+        evicted = 0
+        cur.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM gemini_cache;")
+        excess = int(cur.fetchone()[0]) - max_bytes
+        if excess > 0:
+            # Oldest hits first; evict a little extra so the next store doesn't evict again
+            excess += max_bytes // 10
+            cur.execute("SELECT id, size_bytes FROM gemini_cache ORDER BY last_hit_ts ASC;")
+            victims = []
+            for row_id, row_size in cur.fetchall():
+                if excess <= 0:
+                    break
+                victims.append((row_id,))
+                excess -= int(row_size or 0)
+            p = "%s" if kind == "postgres" else "?"
+            cur.executemany(f"DELETE FROM gemini_cache WHERE id = {p};", victims)
+            evicted = len(victims)
+        conn.commit()
+        return evicted
 
 
 # =========================
@@ -670,93 +1953,131 @@ def _alert_hash(item: dict) -> str:
     return hashlib.sha256(base.encode("utf-8")).hexdigest()
 
 
-def db_init_alerts():
-    kind, conn = get_db()
-    cur = conn.cursor()
+class RecentHashes:
+    """Process-local bounded LRU set of hashes (thread-safe)."""
 
-    if kind == "postgres":
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS alerts_seen (
-            id BIGSERIAL PRIMARY KEY,
-            alert_hash TEXT UNIQUE,
-            ts DOUBLE PRECISION,
-            title TEXT,
-            link TEXT,
-            domain TEXT,
-            score INTEGER
-        );
-        """)
-    else:
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS alerts_seen (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            alert_hash TEXT UNIQUE,
-            ts REAL,
-            title TEXT,
-            link TEXT,
-            domain TEXT,
-            score INTEGER
-        );
-        """)
+    def __init__(self, max_items: int):
+        self.max_items = max(1, int(max_items))
+        self._lock = threading.Lock()
+        self._items: OrderedDict[str, None] = OrderedDict()
 
-    conn.commit()
+    def __contains__(self, h: str) -> bool:
+        with self._lock:
+            if h in self._items:
+                self._items.move_to_end(h)
+                return True
+            return False
 
+    def add_many(self, hashes: list[str]):
+        with self._lock:
+            for h in hashes:
+                self._items[h] = None
+                self._items.move_to_end(h)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
 
-def db_alert_already_seen(alert_hash: str) -> bool:
-    kind, conn = get_db()
-    cur = conn.cursor()
-    if kind == "postgres":
-        cur.execute("SELECT 1 FROM alerts_seen WHERE alert_hash = %s LIMIT 1;", (alert_hash,))
-    else:
-        cur.execute("SELECT 1 FROM alerts_seen WHERE alert_hash = ? LIMIT 1;", (alert_hash,))
-    return cur.fetchone() is not None
 
+@process_resource
+def get_recent_alert_hashes() -> RecentHashes:
+    return RecentHashes(ALERTS_LRU_SIZE)
 
-def db_mark_alert_seen(item: dict, alert_hash: str):
-    kind, conn = get_db()
-    cur = conn.cursor()
 
-    ts = float(item.get("_ts") or time.time())
-    title = (item.get("title") or "")[:400]
-    link = (item.get("link") or "")[:900]
-    domain = (item.get("_domain") or "")[:160]
-    score = int(item.get("_score") or 0)
+def _alert_row(item: dict, alert_hash: str) -> tuple:
+    return (
+        alert_hash,
+        float(item.get("_ts") or time.time()),
+        (item.get("title") or "")[:400],
+        (item.get("link") or "")[:900],
+        (item.get("_domain") or "")[:160],
+        int(item.get("_score") or 0),
+    )
 
-    if kind == "postgres":
-        cur.execute("""
-            INSERT INTO alerts_seen (alert_hash, ts, title, link, domain, score)
-            VALUES (%s,%s,%s,%s,%s,%s)
-            ON CONFLICT (alert_hash) DO NOTHING;
-        """, (alert_hash, ts, title, link, domain, score))
-    else:
-        cur.execute("""
-            INSERT OR IGNORE INTO alerts_seen (alert_hash, ts, title, link, domain, score)
-            VALUES (?,?,?,?,?,?);
-        """, (alert_hash, ts, title, link, domain, score))
 
-    conn.commit()
+@timed("ozy_db_query_seconds", query="claim_alerts")
+def db_claim_new_alerts(candidates: list[tuple[str, dict]], limit: int) -> tuple[list[tuple[str, dict]], list[str]]:
+    """
+    One transaction for the whole batch:
+      1) which candidate hashes are already in alerts_seen (single query)
+      2) mark up to `limit` new ones as seen
+    Returns (claimed (hash, item) pairs in input order, hashes that were already seen).
+    """
+    if not candidates:
+        return [], []
+
+    with db_conn(write=True) as (kind, conn):
+        cur = conn.cursor()
+        hashes = [h for h, _ in candidates]
+
+        if kind == "postgres":
+            cur.execute("SELECT alert_hash FROM alerts_seen WHERE alert_hash = ANY(%s);", (hashes,))
+        else:
+            marks = ",".join("?" * len(hashes))
+            cur.execute(f"SELECT alert_hash FROM alerts_seen WHERE alert_hash IN ({marks});", hashes)
+        already = {r[0] for r in cur.fetchall()}
+
+        wanted = [(h, it) for h, it in candidates if h not in already][:max(0, int(limit))]
+        if not wanted:
+            conn.commit()
+            return [], list(already)
+
+        rows = [_alert_row(it, h) for h, it in wanted]
+        if kind == "postgres":
+            from psycopg2.extras import execute_values
+            inserted = execute_values(cur, """
+                INSERT INTO alerts_seen (alert_hash, ts, title, link, domain, score)
+                VALUES %s
+                ON CONFLICT (alert_hash) DO NOTHING
+                RETURNING alert_hash;
+            """, rows, fetch=True)
+            # another instance may have claimed some in between: only fire what WE inserted
+            won = {r[0] for r in inserted}
+            claimed = [(h, it) for h, it in wanted if h in won]
+            already |= {h for h, _ in wanted if h not in won}
+        else:
+            cur.executemany("""
+                INSERT OR IGNORE INTO alerts_seen (alert_hash, ts, title, link, domain, score)
+                VALUES (?,?,?,?,?,?);
+            """, rows)
+            claimed = wanted
+
+        conn.commit()
+        return claimed, list(already)
 
 
-def alert_on_new_items(items: list[dict], max_alerts_per_run: int = 6):
+def alert_on_new_items(items: list[dict], max_alerts_per_run: int = 6) -> list[dict]:
     """
-    Fires a Streamlit toast for each NEW item (deduped by DB).
-    Also stores a small feed in session_state to display in UI if desired.
+    Returns alert entries for NEW items (deduped by DB), newest batch first.
+    Hot hashes are answered by a process-local LRU; the rest is resolved + marked in ONE DB batch.
+    No Streamlit calls here: runs inside the ingestion worker thread.
+    Sessions pick the entries up later from the shared AlertRing (toast via pull_new_alerts(), panel).
     """
-    if "alerts_feed" not in st.session_state:
-        st.session_state["alerts_feed"] = []
-
-    fired = 0
+    recent = get_recent_alert_hashes()
+    stories = get_story_index()
+    candidates = []
+    queued = set()
+    queued_stories = set()
     for it in items:
-        if fired >= max_alerts_per_run:
-            break
-
         ah = _alert_hash(it)
-        if db_alert_already_seen(ah):
+        if ah in queued or ah in recent:
             continue
-
-        # mark first to avoid duplicates on rerun/flicker
-        db_mark_alert_seen(it, ah)
-
+        # one alert per story: syndicated copies of an alerted headline stay quiet
+        sid = it.get("_story_id") or ""
+        if sid and (sid in queued_stories or stories.alerted(sid)):
+            continue
+        queued.add(ah)
+        if sid:
+            queued_stories.add(sid)
+        candidates.append((ah, it))
+
+    # mark first to avoid duplicates on rerun/flicker
+    claimed, already = db_claim_new_alerts(candidates, limit=max_alerts_per_run)
+    recent.add_many(already + [h for h, _ in claimed])
+    for _, it in claimed:
+        if it.get("_story_id"):
+            stories.claim_alert(it["_story_id"])
+
+    alerts = []
+    for _, it in claimed:
         title = (it.get("title") or "").strip()
         dom = (it.get("_domain") or "").strip()
         score = int(it.get("_score") or 0)
@@ -767,25 +2088,86 @@ def alert_on_new_items(items: list[dict], max_alerts_per_run: int = 6):
             title = title.rsplit(" - ", 1)[0].strip()
 
         msg = f"NEW: [Ozytarget.com] score={score} — {title[:140]}"
-        st.toast(msg)
-
-        st.session_state["alerts_feed"].insert(0, {
+        alerts.append({
             "ts": time.time(),
             "msg": msg,
             "link": link,
             "score": score,
         })
-        st.session_state["alerts_feed"] = st.session_state["alerts_feed"][:500]
 
-        fired += 1
+    return alerts
+
+
+class AlertRing:
+    """
+    Process-wide bounded ring of published alerts with monotonic sequence numbers (1, 2, ...).
+    Sessions only keep a cursor (last seq seen); the oldest entry is overwritten in place.
+    Each slot also carries the alert's panel HTML, built once at publish time.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, int(capacity))
+        self._lock = threading.Lock()
+        self._slots: list[tuple | None] = [None] * self.capacity  # seq % capacity -> (seq, alert, (head, tail))
+        self._seq = 0
+
+    @property
+    def last_seq(self) -> int:
+        return self._seq
+
+    def publish(self, alerts: list[dict]) -> int:
+        parts = [_alert_panel_parts(a) for a in alerts]  # outside the lock
+        with self._lock:
+            for a, p in zip(alerts, parts):
+                self._seq += 1
+                self._slots[self._seq % self.capacity] = (self._seq, a, p)
+            return self._seq
+
+    def since(self, cursor: int, limit: int | None = None) -> tuple[list[dict], int]:
+        """Alerts with seq > cursor still in the ring (oldest -> newest, at most `limit` newest), last seq."""
+        with self._lock:
+            first = max(int(cursor) + 1, self._seq - self.capacity + 1, 1)
+            if limit is not None:
+                first = max(first, self._seq - limit + 1)
+            return [self._slots[s % self.capacity][1] for s in range(first, self._seq + 1)], self._seq
+
+    def newest(self) -> tuple[list[tuple], int]:
+        """Ring contents newest first as (seq, alert, panel parts), last seq."""
+        with self._lock:
+            first = max(1, self._seq - self.capacity + 1)
+            return [self._slots[s % self.capacity] for s in range(self._seq, first - 1, -1)], self._seq
+
+
+@process_resource
+def get_alert_ring() -> AlertRing:
+    return AlertRing(ALERTS_RING_SIZE)
+
+
+def pull_new_alerts(max_toasts: int = 6):
+    """
+    Session side of alerts: toasts what the worker published since this session last looked.
+    First visit only sets the cursor (no toast storm for old alerts).
+    The session stores nothing but the cursor; the panel reads the shared ring.
+    """
+    first_visit = "alerts_cursor" not in st.session_state
+    cursor = int(st.session_state.get("alerts_cursor", 0))
+    ring = get_alert_ring()
+    if first_visit:
+        st.session_state["alerts_cursor"] = ring.last_seq
+        return
+
+    fresh, cursor = ring.since(cursor, limit=max_toasts)
+    st.session_state["alerts_cursor"] = cursor
+    for a in fresh:
+        st.toast(a["msg"])
 
 
-def format_alert_time(ts: float) -> str:
+def format_alert_time(ts: float, now: float | None = None) -> str:
     """
     Format alert timestamp to human-readable relative time.
     "NEW" for < 1 minute, "5m ago", "1h ago", etc.
     """
-    now = time.time()
+    now = time.time() if now is None else now
     diff_seconds = int(now - ts)
     
     if diff_seconds < 60:
@@ -801,49 +2183,277 @@ def format_alert_time(ts: float) -> str:
         return f"{days}d ago"
 
 
+def _alert_panel_parts(a: dict) -> tuple[str, str]:
+    """Panel HTML for one alert, split around the time label (which replaces "NEW:")."""
+    msg = a.get("msg", "")
+    link = a.get("link", "")
+    score = int(a.get("score", 0))
+    
+    # Color background based on score: red >= 12, yellow > 8, transparent otherwise
+    if score >= 12:
+        bg_color = "rgba(255, 0, 0, 0.2)"  # Red semitransparent
+    elif score > 8:
+        bg_color = "rgba(255, 255, 0, 0.2)"  # Yellow semitransparent
+    else:
+        bg_color = "transparent"
+    
+    before, sep, after = msg.partition("NEW:")
+    if not sep:
+        before, after = "", " " + msg
+    
+    if link:
+        # Link is invisible but clickable - entire text is the link
+        head = f'<p style="background-color: {bg_color}; padding: 8px; border-radius: 4px;"><a href="{link}" target="_blank" style="text-decoration: none; color: inherit;"><strong>{before}'
+        tail = f'{after}</strong></a></p>'
+    else:
+        head = f'<p style="background-color: {bg_color}; padding: 8px; border-radius: 4px;"><strong>{before}'
+        tail = f'{after}</strong></p>'
+    return head, tail
+
+
+_ALERTS_PANEL_OPEN = """
+        <div style="max-height: 400px; overflow-y: auto; border: 1px solid #ddd; border-radius: 5px; padding: 10px;">
+        """
+_ALERTS_PANEL_CLOSE = """
+        </div>
+        """
+
+
+@process_resource
+def get_alerts_panel_memo() -> dict:
+    """Last rendered panel, shared by every session: {"key": (last seq, minute), "html": str}."""
+    return {"lock": threading.Lock(), "key": None, "html": ""}
+
+
+def alerts_panel_html() -> str:
+    """
+    Panel HTML from the ring's prebuilt fragments. Time labels are minute-granular, so the
+    join runs at most once per (new alert, minute) for the whole process; every other
+    rerun of every session is a lookup, whatever the history length.
+    """
+    ring = get_alert_ring()
+    memo = get_alerts_panel_memo()
+    now = time.time()
+    minute = now - now % 60
+    key = (ring.last_seq, minute)
+    with memo["lock"]:
+        if memo["key"] == key:
+            return memo["html"]
+
+    entries, last_seq = ring.newest()
+    parts = [_ALERTS_PANEL_OPEN]
+    for _, a, (head, tail) in entries:
+        parts.append(head)
+        parts.append(format_alert_time(a.get("ts", now), now=now))
+        parts.append(tail)
+    parts.append(_ALERTS_PANEL_CLOSE)
+    html = "".join(parts)
+
+    with memo["lock"]:
+        memo["key"] = (last_seq, minute)
+        memo["html"] = html
+    return html
+
+
 def render_alerts_panel():
     """
     Optional UI panel (last alerts). Call where you want in RENDER.
     """
-    feed = st.session_state.get("alerts_feed") or []
-    if not feed:
+    if not get_alert_ring().last_seq:
         return
     
     with st.expander("🚨 Alerts (new headlines)", expanded=False):
-        # Create scrollable container with all alerts
-        alerts_html = """
-        <div style="max-height: 400px; overflow-y: auto; border: 1px solid #ddd; border-radius: 5px; padding: 10px;">
-        """
-        
-        for i, a in enumerate(feed):
-            msg = a.get("msg", "")
-            link = a.get("link", "")
-            ts = a.get("ts", time.time())
-            score = int(a.get("score", 0))
-            time_label = format_alert_time(ts)
-            
-            # Replace "NEW:" with time label
-            msg_updated = msg.replace("NEW:", time_label)
-            
-            # Color background based on score: red >= 12, yellow > 8, transparent otherwise
-            if score >= 12:
-                bg_color = "rgba(255, 0, 0, 0.2)"  # Red semitransparent
-            elif score > 8:
-                bg_color = "rgba(255, 255, 0, 0.2)"  # Yellow semitransparent
-            else:
-                bg_color = "transparent"
-            
-            if link:
-                # Link is invisible but clickable - entire text is the link
-                alerts_html += f'<p style="background-color: {bg_color}; padding: 8px; border-radius: 4px;"><a href="{link}" target="_blank" style="text-decoration: none; color: inherit;"><strong>{msg_updated}</strong></a></p>'
-            else:
-                alerts_html += f'<p style="background-color: {bg_color}; padding: 8px; border-radius: 4px;"><strong>{msg_updated}</strong></p>'
-        
-        alerts_html += """
-        </div>
-        """
-        
-        st.markdown(alerts_html, unsafe_allow_html=True)
+        st.markdown(alerts_panel_html(), unsafe_allow_html=True)
+
+
+# =========================
+# TAPE (headline cards)
+# - card HTML cached per (item hash, user keyword set, story source count): built once, not every rerun
+# - one markdown block per page; ages are minute-granular so an unchanged page is
+#   byte-identical within the minute (Streamlit then only re-sends the message hash)
+# =========================
+TAPE_PAGE_SIZE = 40
+TAPE_CARD_CACHE_SIZE = 5000
+
+
+class CardHtmlCache:
+    """Bounded LRU: (item_hash, keyword tuple, story sources) -> (html before age, html after age). Thread-safe."""
+
+    def __init__(self, max_items: int):
+        self.max_items = max(1, int(max_items))
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple, tuple[str, str]] = OrderedDict()
+
+    def get(self, key: tuple) -> tuple[str, str] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: tuple, parts: tuple[str, str]):
+        with self._lock:
+            self._entries[key] = parts
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+
+
+@process_resource
+def get_card_cache() -> CardHtmlCache:
+    return CardHtmlCache(TAPE_CARD_CACHE_SIZE)
+
+
+def _tape_age(ts: float, ref_ts: float) -> str:
+    diff = max(0, int(ref_ts - ts))
+    if diff < 60:
+        return "<1m"
+    if diff < 3600:
+        return f"{diff // 60}m"
+    return f"{diff // 3600}h"
+
+
+def _card_parts(a: dict, user_matcher: KeywordMatcher) -> tuple[str, str]:
+    score = int(a.get('_score', 0))
+
+    # Check if article contains user's keywords (from keyword input)
+    title = (a.get('title', '')).lower()
+    summary = (a.get('summary', '')).lower()
+    user_kw_hits = user_matcher.count(f"{title} {summary}")["user"]
+
+    # Apply color based on score bands (BREAKING > HIGH > MED > WATCH > NEUTRAL > LOW)
+    bg_style = score_to_bg_style(score, user_kw_hits=user_kw_hits)
+    n_src = int(a.get("_story_sources") or 1)
+    sources = f'\n    <span class="badge">{n_src} sources</span>' if n_src > 1 else ""
+    head = f"""
+<div class="card" style="{bg_style}">
+  <div class="meta">
+    <span class="source">{a.get('source','')}</span>
+    <span>"""
+    tail = f""" ago</span>
+    <span class="badge">score={score}</span>
+    <span class="badge">kw={a.get('_kw_hits', 0)}</span>
+    <span class="badge">noise={a.get('_noise_hits', 0)}</span>
+    <span class="badge">{a.get('_domain','')}</span>{sources}
+    <span style="margin-left:10px;">| {a.get('time','')}</span>
+  </div>
+  <div class="title">
+    <a href="{a.get('link','')}" target="_blank" style="color:#e6edf3; text-decoration:none;">
+      {a.get('title','')}
+    </a>
+    <span class="badge" style="margin-left:8px;">{a.get('_reasons','')}</span>
+  </div>
+</div>
+"""
+    return head, tail
+
+
+def render_tape_html(items: list[dict], user_keywords: list[str], ref_ts: float) -> str:
+    """HTML for a page of cards; only cards not seen before with this keyword set are built."""
+    kw_version = tuple(user_keywords or [])
+    cache = get_card_cache()
+    matcher = None
+    out = []
+    for a in items:
+        h = a.get("_item_hash") or make_item_hash((a.get("title") or "").strip(), (a.get("link") or "").strip())
+        key = (h, kw_version, int(a.get("_story_sources") or 1))
+        parts = cache.get(key)
+        if parts is None:
+            if matcher is None:
+                matcher = get_user_keyword_matcher(list(kw_version))
+            parts = _card_parts(a, matcher)
+            cache.put(key, parts)
+        out.append(parts[0] + _tape_age(float(a.get("_ts", 0.0) or 0.0), ref_ts) + parts[1])
+    return "".join(out)
+
+
+def render_tape(news: list[dict]):
+    """Paginated tape: one st.markdown per page (instead of one per card), newest first."""
+    pages = max(1, -(-len(news) // TAPE_PAGE_SIZE))
+    page = min(max(1, int(st.session_state.get("tape_page", 1))), pages)
+
+    col_prev, col_info, col_next = st.columns([1, 3, 1])
+    with col_prev:
+        if st.button("◀ Newer", use_container_width=True, key="tape_newer", disabled=page <= 1):
+            page -= 1
+    with col_next:
+        if st.button("Older ▶", use_container_width=True, key="tape_older", disabled=page >= pages):
+            page += 1
+    page = min(max(1, page), pages)
+    st.session_state["tape_page"] = page
+    with col_info:
+        st.caption(f"Page {page}/{pages} · {len(news)} headlines")
+
+    visible = news[(page - 1) * TAPE_PAGE_SIZE: page * TAPE_PAGE_SIZE]
+    user_keywords = st.session_state.get("auto_keywords", [])
+    now_ts = time.time()
+    ref_ts = now_ts - (now_ts % 60)  # minute clock: same page => same bytes within the minute
+
+    signature = (tuple((a.get("_item_hash", ""), a.get("_story_sources", 1)) for a in visible), tuple(user_keywords), ref_ts)
+    if st.session_state.get("tape_signature") != signature:
+        st.session_state["tape_html"] = render_tape_html(visible, user_keywords, ref_ts)
+        st.session_state["tape_signature"] = signature
+    st.markdown(st.session_state["tape_html"], unsafe_allow_html=True)
+
+
+SEARCH_WINDOWS = {"30 days": None, "7 days": 7 * 24, "24 hours": 24}  # label -> since_hours
+
+
+def _search_page(delta: int, next_cursor: tuple | None = None):
+    cursors = st.session_state.get("search_cursors") or [None]
+    if delta > 0 and next_cursor is not None:
+        cursors.append(next_cursor)
+    elif delta < 0 and len(cursors) > 1:
+        cursors.pop()
+    st.session_state["search_cursors"] = cursors
+
+
+def render_search_panel():
+    """Archive search: ranked results, keyset-paginated (the session keeps only the cursor stack)."""
+    with st.expander(f"🔎 Search archive ({int(RETENTION_DAYS)} days)", expanded=bool(st.session_state.get("search_query"))):
+        col_q, col_w = st.columns([4, 1])
+        with col_q:
+            query = st.text_input(
+                "Search headlines", key="search_query", label_visibility="collapsed",
+                placeholder='e.g. sofr repo   "rate cut" OR hike   fed -ecb',
+            )
+        with col_w:
+            window = st.selectbox("Window", list(SEARCH_WINDOWS), key="search_window", label_visibility="collapsed")
+        if not (query or "").strip():
+            return
+
+        signature = ((query or "").strip(), window)
+        if st.session_state.get("search_signature") != signature:
+            st.session_state["search_signature"] = signature
+            st.session_state["search_cursors"] = [None]
+        cursors = st.session_state["search_cursors"]
+
+        started = time.perf_counter()
+        try:
+            results, next_cursor = db_search_news(query, after=cursors[-1], since_hours=SEARCH_WINDOWS[window])
+        except Exception as e:
+            st.warning(f"Search error: {type(e).__name__}: {str(e)[:160]}")
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000.0
+
+        col_prev, col_info, col_next = st.columns([1, 3, 1])
+        with col_prev:
+            st.button("◀ Back", key="search_prev", use_container_width=True, disabled=len(cursors) <= 1,
+                      on_click=_search_page, args=(-1,))
+        with col_next:
+            st.button("More ▶", key="search_next", use_container_width=True, disabled=next_cursor is None,
+                      on_click=_search_page, args=(1, next_cursor))
+        with col_info:
+            st.caption(f"Page {len(cursors)} · {len(results)} results · {elapsed_ms:.1f} ms")
+
+        if not results:
+            st.info("No stored headlines match.")
+            return
+        now_ts = time.time()
+        st.markdown(
+            render_tape_html(results, st.session_state.get("auto_keywords", []), now_ts - (now_ts % 60)),
+            unsafe_allow_html=True,
+        )
 
 
 # =========================
@@ -853,8 +2463,75 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "").strip()
 
 GEMINI_BASE = "https://generativelanguage.googleapis.com/v1beta"
 
+# Prompts are packed to a token budget BEFORE the request (see PROMPT BUDGET): one round trip
+GEMINI_INPUT_TOKEN_BUDGET = int(os.getenv("GEMINI_INPUT_TOKEN_BUDGET", "6000"))
+GEMINI_OUTPUT_TOKEN_BUDGET = int(os.getenv("GEMINI_OUTPUT_TOKEN_BUDGET", "3500"))  # visible answer
+GEMINI_THINKING_TOKEN_BUDGET = int(os.getenv("GEMINI_THINKING_TOKEN_BUDGET", "1024"))  # 2.5 models think inside maxOutputTokens
+
+
+def gemini_generation_config(model: str, temperature: float, **extra) -> dict:
+    """
+    maxOutputTokens = the answer budget. 2.5 models spend "thinking" tokens out of the same
+    limit (MAX_TOKENS with no text), so they get a capped thinking budget on top.
+    """
+    cfg = {"temperature": temperature, "maxOutputTokens": GEMINI_OUTPUT_TOKEN_BUDGET, **extra}
+    if model.startswith("gemini-2.5"):
+        cfg["maxOutputTokens"] += GEMINI_THINKING_TOKEN_BUDGET
+        cfg["thinkingConfig"] = {"thinkingBudget": GEMINI_THINKING_TOKEN_BUDGET}
+    return cfg
+
+
+def _observe_prompt_tokens(prompt: str, data: dict, mode: str):
+    # estimated vs billed prompt size: keeps estimate_tokens() honest
+    metrics = get_metrics()
+    metrics.observe("ozy_gemini_prompt_tokens", estimate_tokens(prompt), mode=mode, kind="estimated")
+    actual = ((data or {}).get("usageMetadata") or {}).get("promptTokenCount")
+    if isinstance(actual, int):
+        metrics.observe("ozy_gemini_prompt_tokens", actual, mode=mode, kind="actual")
+
+
+def gemini_cache_key(mode: str, model: str, prompt: str, generation_config: dict) -> str:
+    """Content address of one request: same model + prompt + config => same answer."""
+    payload = json.dumps(
+        {"mode": mode, "model": model, "prompt": prompt, "config": generation_config},
+        sort_keys=True, ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def gemini_cache_get(cache_key: str, mode: str) -> str | None:
+    """Cached response text, or None (miss, expired, cache disabled or DB unavailable)."""
+    if GEMINI_CACHE_TTL_SECONDS <= 0:
+        return None
+    try:
+        hit = db_get_gemini_cache(cache_key, GEMINI_CACHE_TTL_SECONDS)
+    except Exception:
+        hit = None  # best effort: a broken cache only costs the API call
+    metrics = get_metrics()
+    metrics.inc("ozy_gemini_cache_total", mode=mode, result="hit" if hit else "miss")
+    if not hit:
+        return None
+    if hit[1]:
+        metrics.inc("ozy_gemini_cache_tokens_saved_total", hit[1], mode=mode)
+    return hit[0]
+
+
+def gemini_cache_put(cache_key: str, mode: str, model: str, response: str, data: dict):
+    # Only usable answers are stored (callers skip empty / unparseable output)
+    if GEMINI_CACHE_TTL_SECONDS <= 0 or not response:
+        return
+    tokens = ((data or {}).get("usageMetadata") or {}).get("totalTokenCount") or 0
+    try:
+        evicted = db_put_gemini_cache(cache_key, mode, model, response, tokens, int(GEMINI_CACHE_MAX_MB * 1024 * 1024))
+    except Exception:
+        return
+    metrics = get_metrics()
+    metrics.inc("ozy_gemini_cache_total", mode=mode, result="store")
+    if evicted:
+        metrics.inc("ozy_gemini_cache_evictions_total", evicted)
+
 
-@st.cache_data(ttl=3600, show_spinner=False)
+@metered_cache_data(ttl=3600, show_spinner=False)
 def gemini_list_models() -> list[str]:
     """
     Returns a list of model names available to this API key.
@@ -866,7 +2543,7 @@ def gemini_list_models() -> list[str]:
     url = f"{GEMINI_BASE}/models"
     headers = {"x-goog-api-key": GEMINI_API_KEY}
     try:
-        r = requests.get(url, headers=headers, timeout=20)
+        r = get_http_session().get(url, headers=headers, timeout=20)
         r.raise_for_status()
         data = r.json()
         models = []
@@ -879,13 +2556,34 @@ def gemini_list_models() -> list[str]:
         return []
 
 
-@st.cache_data(ttl=3600, show_spinner=False)
+GEMINI_MODEL_TTL_SECONDS = 3600
+
+
+@process_resource
+def get_gemini_model_state() -> dict:
+    return {"model": None, "ts": 0.0, "lock": threading.Lock()}
+
+
 def gemini_pick_model() -> str | None:
+    """
+    Model discovered once per process (refreshed hourly), from any thread.
+    App startup runs the first discovery in the background.
+    """
+    state = get_gemini_model_state()
+    if state["model"] and (time.time() - state["ts"]) < GEMINI_MODEL_TTL_SECONDS:
+        return state["model"]
+    with state["lock"]:
+        if not state["model"] or (time.time() - state["ts"]) >= GEMINI_MODEL_TTL_SECONDS:
+            state["model"] = _pick_model(gemini_list_models())
+            state["ts"] = time.time()
+        return state["model"]
+
+
+def _pick_model(models: list[str]) -> str:
     """
     Picks best available model automatically.
     If listModels fails, falls back to a safe default order (may still 404, but UI won't break).
     """
-    models = gemini_list_models()
 
     preferred = [
         "gemini-2.5-pro",
@@ -921,6 +2619,7 @@ def gemini_generate_json(prompt: str, debug: bool = False) -> dict:
     """
     Generate JSON from Gemini. Never breaks the UI.
     LOCAL debug: shows raw Gemini output if parsing fails.
+    Parsed answers are cached (gemini_cache); a hit is re-parsed without an API call.
     """
 
     def _default(caption_msg: str, reasoning_msg: str, raw: str = "") -> dict:
@@ -1037,84 +2736,105 @@ def gemini_generate_json(prompt: str, debug: bool = False) -> dict:
     if not GEMINI_API_KEY:
         return _default("AI disabled (set GEMINI_API_KEY).", "No API key configured.")
 
+    metrics = get_metrics()
+
+    def _fail(*args, **kwargs) -> dict:
+        metrics.inc("ozy_gemini_failures_total", mode="json")
+        return _default(*args, **kwargs)
+
     model = gemini_pick_model() or "gemini-2.5-flash"
     url = f"{GEMINI_BASE}/models/{model}:generateContent"
     headers = {"x-goog-api-key": GEMINI_API_KEY}
 
+    prompt = clip_to_tokens((prompt or "").strip(), GEMINI_INPUT_TOKEN_BUDGET)
     body = {
         "contents": [{"parts": [{"text": prompt}]}],
-        "generationConfig": {
-            "temperature": 0.20,
-            "maxOutputTokens": 4500,
-            "responseMimeType": "application/json",
-        },
+        "generationConfig": gemini_generation_config(model, 0.20, responseMimeType="application/json"),
     }
+    cache_key = gemini_cache_key("json", model, prompt, body["generationConfig"])
 
-    try:
-        r = requests.post(url, headers=headers, json=body, timeout=70)
-        if r.status_code == 404:
-            return _default(f"AI error: model not found ({model})", "Rotate key or check enabled models.")
+    def _ok(obj: dict, raw_text: str, data: dict | None) -> dict:
+        if data is not None:
+            metrics.observe("ozy_gemini_success_attempt", 1, mode="json")
+            gemini_cache_put(cache_key, "json", model, raw_text, data)
+        return _normalize_digest(obj, raw=raw_text)
 
-        r.raise_for_status()
-        data = r.json()
+    try:
+        raw_text = gemini_cache_get(cache_key, "json")
+        data = None  # None = served from cache (nothing new to store)
+        if raw_text is None:
+            with metrics.time("ozy_stage_seconds", stage="gemini"):
+                t0 = time.perf_counter()
+                r = get_http_session().post(url, headers=headers, json=body, timeout=70)
+            metrics.observe("ozy_gemini_request_seconds", time.perf_counter() - t0, mode="json", model=model, status=r.status_code)
+            if r.status_code == 404:
+                return _fail(f"AI error: model not found ({model})", "Rotate key or check enabled models.")
+
+            r.raise_for_status()
+            data = r.json()
+            _observe_prompt_tokens(prompt, data, "json")
 
-        raw_text = ""
-        try:
-            raw_text = data["candidates"][0]["content"]["parts"][0]["text"] or ""
-        except Exception:
-            raw_text = ""
+            try:
+                raw_text = data["candidates"][0]["content"]["parts"][0]["text"] or ""
+            except Exception:
+                raw_text = ""
 
         raw_text = raw_text.strip()
         if debug:
             with st.expander("🧪 Gemini RAW (debug)", expanded=True):
                 st.write(raw_text if raw_text else "(empty raw text)")
-                st.write({"model": model, "has_candidates": bool(data.get("candidates"))})
+                st.write({"model": model, "cached": data is None, "has_candidates": bool((data or {}).get("candidates"))})
 
         if not raw_text:
-            return _default("AI returned empty response.", "Empty text from generateContent.")
+            return _fail("AI returned empty response.", "Empty text from generateContent.")
 
         # Try parse as JSON directly
         try:
             obj = json.loads(_strip_json_fences(raw_text))
-            return _normalize_digest(obj, raw=raw_text)
         except Exception:
-            pass
+            obj = None
+        if obj is not None:
+            return _ok(obj, raw_text, data)
 
         # Extract first {...} and parse
         extracted = _extract_first_json_object(raw_text)
         if extracted:
             try:
                 obj = json.loads(extracted)
-                return _normalize_digest(obj, raw=raw_text)
             except Exception:
-                return _default("AI parse error.", "Extracted JSON still invalid.", raw=raw_text)
+                return _fail("AI parse error.", "Extracted JSON still invalid.", raw=raw_text)
+            return _ok(obj, raw_text, data)
 
-        return _default("AI parse error.", "Could not extract JSON object from Gemini output.", raw=raw_text)
+        return _fail("AI parse error.", "Could not extract JSON object from Gemini output.", raw=raw_text)
 
     except Exception as e:
-        return _default("AI error.", f"Exception during Gemini call: {type(e).__name__}: {str(e)[:180]}")
+        return _fail("AI error.", f"Exception during Gemini call: {type(e).__name__}: {str(e)[:180]}")
+
+
+GEMINI_DISABLED_TEXT = "CAPTION:\nAI disabled (set GEMINI_API_KEY)\n\nREASONING:\n- Claim: No API key | Evidence: — | Why: Configure env\n- \n- \n\nSCENARIOS:\nBASE: n/a\nBULL: n/a\nBEAR: n/a\n\nWATCHLIST:\n- Set GEMINI_API_KEY"
+
+
+def gemini_no_text_fallback(msg: str) -> str:
+    return (
+        f"CAPTION:\n{msg}\n\nREASONING:\n"
+        "- Claim: Model returned no text | Evidence: — | Why: see finishReason above\n"
+        "- Claim: MAX_TOKENS => raise GEMINI_OUTPUT_TOKEN_BUDGET | Evidence: — | Why: answer did not fit\n"
+        "- Claim: SAFETY / RECITATION => rephrase the input | Evidence: — | Why: blocked by the model\n\n"
+        "SCENARIOS:\nBASE: n/a\nBULL: n/a\nBEAR: n/a\n\nWATCHLIST:\n"
+        "- Check finishReason\n- Adjust budgets\n- Retry"
+    )
 
 
-def gemini_generate_text(prompt: str, debug: bool = False) -> str:
+def gemini_generate_text(prompt: str, debug: bool = False, trace: dict | None = None) -> str:
     """
-    Plain text mode (no JSON).
-    Fixes: MAX_TOKENS (no parts/text) by:
-      - truncating prompt hard
-      - increasing maxOutputTokens
-      - retrying with a smaller model if needed
+    Plain text mode (no JSON). ONE request: prompts arrive packed to GEMINI_INPUT_TOKEN_BUDGET
+    (see PROMPT BUDGET) and the output budget reserves room for 2.5 "thinking", so there is
+    no shrink-and-retry ladder. Anything else is clipped here as a guard.
+    Identical requests within GEMINI_CACHE_TTL_SECONDS are answered from gemini_cache.
+    trace (dict) receives what debug would display, for callers off the script thread (AI jobs).
     """
     if not GEMINI_API_KEY:
-        return "CAPTION:\nAI disabled (set GEMINI_API_KEY)\n\nREASONING:\n- Claim: No API key | Evidence: — | Why: Configure env\n- \n- \n\nSCENARIOS:\nBASE: n/a\nBULL: n/a\nBEAR: n/a\n\nWATCHLIST:\n- Set GEMINI_API_KEY"
-
-    def _fallback(msg: str) -> str:
-        return (
-            f"CAPTION:\n{msg}\n\nREASONING:\n"
-            "- Claim: Model returned no text (likely MAX_TOKENS) | Evidence: — | Why: prompt too large\n"
-            "- Claim: Reduce context (24h only) / fewer headlines | Evidence: — | Why: shrink promptTokenCount\n"
-            "- Claim: Use flash for speed/short output | Evidence: — | Why: more reliable\n\n"
-            "SCENARIOS:\nBASE: n/a\nBULL: n/a\nBEAR: n/a\n\nWATCHLIST:\n"
-            "- Reduce prompt size\n- Increase maxOutputTokens\n- Retry"
-        )
+        return GEMINI_DISABLED_TEXT
 
     def _extract_text(data: dict) -> str:
         # Standard: candidates[0].content.parts[0].text
@@ -1136,23 +2856,28 @@ def gemini_generate_text(prompt: str, debug: bool = False) -> str:
         except Exception:
             return ""
 
-    def _post(model_name: str, prompt_text: str, max_out: int) -> tuple[str, dict]:
+    metrics = get_metrics()
+
+    def _post(model_name: str, prompt_text: str, generation_config: dict) -> tuple[str, dict]:
         url = f"{GEMINI_BASE}/models/{model_name}:generateContent"
         headers = {"x-goog-api-key": GEMINI_API_KEY, "Content-Type": "application/json"}
         body = {
             "contents": [{"parts": [{"text": prompt_text}]}],
-            "generationConfig": {
-                "temperature": 0.25,
-                "maxOutputTokens": int(max_out),
-            },
+            "generationConfig": generation_config,
         }
-        r = requests.post(url, headers=headers, json=body, timeout=70)
+        with metrics.time("ozy_stage_seconds", stage="gemini"):
+            t0 = time.perf_counter()
+            r = get_http_session().post(url, headers=headers, json=body, timeout=70)
+        metrics.observe("ozy_gemini_request_seconds", time.perf_counter() - t0, mode="text", model=model_name, status=r.status_code)
         data = {}
         try:
             data = r.json()
         except Exception:
             data = {"_raw": r.text[:2000], "_status": r.status_code}
+        _observe_prompt_tokens(prompt_text, data, "text")
 
+        if trace is not None:
+            trace.update(model=model_name, status=r.status_code, cached=False, response=data)
         if debug:
             with st.expander("🧪 Full Gemini Response (debug)", expanded=True):
                 st.json(data)
@@ -1167,46 +2892,195 @@ def gemini_generate_text(prompt: str, debug: bool = False) -> str:
         txt = _extract_text(data).strip()
         return txt, data
 
-    # ---- HARD TRUNCATION: keep prompt small & safe ----
-    # Keep last chunk (usually includes headline packs) and cap size in chars.
-    # This prevents promptTokenCount exploding.
-    prompt = (prompt or "").strip()
-    MAX_CHARS = 10000  # reduced from 18000; prevents MAX_TOKENS error
-    if len(prompt) > MAX_CHARS:
-        prompt = prompt[-MAX_CHARS:]
+    prompt = clip_to_tokens((prompt or "").strip(), GEMINI_INPUT_TOKEN_BUDGET)
+    model = gemini_pick_model() or "gemini-2.5-flash"
+    generation_config = gemini_generation_config(model, 0.25)
+    cache_key = gemini_cache_key("text", model, prompt, generation_config)
 
-    # Primary model: pick, but avoid pro for manual if prompt is large
-    primary = gemini_pick_model() or "gemini-2.5-flash"
+    cached = gemini_cache_get(cache_key, "text")
+    if cached is not None:
+        if trace is not None:
+            trace.update(model=model, cached=True, cache_key=cache_key[:16])
+        if debug:
+            with st.expander("🧪 Full Gemini Response (debug)", expanded=True):
+                st.write({"model": model, "cached": True, "cache_key": cache_key[:16]})
+        return cached
 
-    # Try 1: primary, bigger output
-    txt, data = _post(primary, prompt, max_out=3500)
+    txt, data = _post(model, prompt, generation_config)
     if txt:
+        metrics.observe("ozy_gemini_success_attempt", 1, mode="text")
+        gemini_cache_put(cache_key, "text", model, txt, data)
         return txt
 
-    # If finishReason says MAX_TOKENS or no parts/text, retry with smaller prompt + flash
     finish = ""
     try:
         finish = ((data.get("candidates") or [{}])[0].get("finishReason") or "")
     except Exception:
         finish = ""
+    if not finish and isinstance(data, dict) and data.get("error"):
+        finish = str(data.get("error"))
 
-    # Shrink prompt harder and retry
-    prompt2 = prompt[-9000:] if len(prompt) > 9000 else prompt
+    metrics.inc("ozy_gemini_failures_total", mode="text")
+    reason = finish or "NO_TEXT"
+    return gemini_no_text_fallback(f"AI produced no text (finishReason={reason}).")
+
+
+def _sse_events(r):
+    """JSON payloads of a server-sent event stream ("data: {...}" lines; comments / keep-alives skipped)."""
+    r.encoding = "utf-8"
+    for line in r.iter_lines(chunk_size=None, decode_unicode=True):
+        if not line or not line.startswith("data:"):
+            continue
+        try:
+            yield json.loads(line[5:].strip())
+        except ValueError:
+            continue
 
-    # Try 2: force flash (more reliable + faster)
-    txt2, data2 = _post("gemini-2.5-flash", prompt2, max_out=3500)
-    if txt2:
-        return txt2
 
-    # Try 3: flash with even smaller prompt
-    prompt3 = prompt2[-5000:] if len(prompt2) > 5000 else prompt2
-    txt3, data3 = _post("gemini-2.5-flash", prompt3, max_out=3000)
-    if txt3:
-        return txt3
+def gemini_stream_text(prompt: str, trace: dict | None = None):
+    """
+    Streaming twin of gemini_generate_text (streamGenerateContent?alt=sse): yields text chunks
+    as they arrive, so the first words show up after the first token, not the whole answer.
+    - cached answers come back as one chunk; only complete answers (finishReason=STOP) are cached
+    - a stream that breaks or stops early keeps what arrived and ends with a one-line note
+    - trace gets model / status / finish_reason / error / first_token_seconds
+    """
+    if not GEMINI_API_KEY:
+        yield GEMINI_DISABLED_TEXT
+        return
+
+    metrics = get_metrics()
+    prompt = clip_to_tokens((prompt or "").strip(), GEMINI_INPUT_TOKEN_BUDGET)
+    model = gemini_pick_model() or "gemini-2.5-flash"
+    generation_config = gemini_generation_config(model, 0.25)
+    # Same key as the non-streaming call: both modes share cached answers
+    cache_key = gemini_cache_key("text", model, prompt, generation_config)
+    trace = {} if trace is None else trace
+    trace.update(model=model, cached=False, finish_reason="", error="")
+
+    cached = gemini_cache_get(cache_key, "text")
+    if cached is not None:
+        trace.update(cached=True, cache_key=cache_key[:16], finish_reason="STOP")
+        yield cached
+        return
+
+    url = f"{GEMINI_BASE}/models/{model}:streamGenerateContent?alt=sse"
+    # identity: a gzipped event stream is buffered by the decoder instead of arriving per event
+    headers = {"x-goog-api-key": GEMINI_API_KEY, "Content-Type": "application/json", "Accept-Encoding": "identity"}
+    body = {"contents": [{"parts": [{"text": prompt}]}], "generationConfig": generation_config}
+
+    parts: list[str] = []
+    last: dict = {}
+    t0 = time.perf_counter()
+    status = 0
+    try:
+        with get_http_session().post(url, headers=headers, json=body, timeout=70, stream=True) as r:
+            status = r.status_code
+            trace["status"] = status
+            if status >= 400:
+                try:
+                    trace["error"] = str((r.json().get("error") or {}).get("message") or f"http_{status}")[:300]
+                except Exception:
+                    trace["error"] = f"http_{status}"
+            else:
+                for event in _sse_events(r):
+                    if event.get("error"):
+                        trace["error"] = str(event["error"].get("message") or event["error"])[:300]
+                        break
+                    last = event
+                    cand = (event.get("candidates") or [{}])[0] or {}
+                    text = "".join(p.get("text") or "" for p in (cand.get("content") or {}).get("parts") or [] if isinstance(p, dict))
+                    if cand.get("finishReason"):
+                        trace["finish_reason"] = cand["finishReason"]
+                    if text:
+                        if not parts:
+                            trace["first_token_seconds"] = round(time.perf_counter() - t0, 3)
+                            metrics.observe("ozy_gemini_first_token_seconds", trace["first_token_seconds"], model=model)
+                        parts.append(text)
+                        yield text
+    except Exception as e:
+        trace["error"] = f"{type(e).__name__}: {str(e)[:180]}"  # connection dropped / read timeout mid-answer
+    finally:
+        metrics.observe("ozy_gemini_request_seconds", time.perf_counter() - t0, mode="stream", model=model, status=status)
+
+    _observe_prompt_tokens(prompt, last, "stream")
+    text = "".join(parts).strip()
+    finish = trace["finish_reason"]
+    if text and finish == "STOP" and not trace["error"]:
+        metrics.observe("ozy_gemini_success_attempt", 1, mode="stream")
+        gemini_cache_put(cache_key, "text", model, text, last)
+        return
+
+    metrics.inc("ozy_gemini_failures_total", mode="stream")
+    reason = trace["error"] or finish or ("stream ended without finishReason" if text else "NO_TEXT")
+    if text:
+        yield f"\n\n[… output incomplete: {reason}]"
+    else:
+        yield gemini_no_text_fallback(f"AI produced no text (finishReason={reason}).")
+
+
+# =========================
+# PROMPT BUDGET
+# - local token estimate; headlines are chosen by priority until the input budget is full
+# - the first request fits, so AI latency is one round trip
+# =========================
+_TOKEN_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Conservative estimate of Gemini (SentencePiece) tokens without a tokenizer:
+    1 per 4 chars of each ASCII word, 1 per punctuation mark, 1 per non-ASCII char.
+    """
+    n = 0
+    for piece in _TOKEN_PIECE_RE.findall(text or ""):
+        n += 1 + (len(piece) - 1) // 4 if piece.isascii() else len(piece)
+    return n
+
+
+def clip_to_tokens(text: str, budget: int, marker: str = "\n[… truncated to fit the prompt budget]") -> str:
+    """Keeps whole lines from the top (instructions first, then data) while they fit the budget."""
+    if estimate_tokens(text) <= budget:
+        return text
+    used = estimate_tokens(marker)
+    out = []
+    for line in text.splitlines():
+        n = estimate_tokens(line) + 1
+        if used + n > budget:
+            if not out:
+                out.append(line[: max(0, budget - used) * 3])  # one huge line: cut by characters
+            break
+        out.append(line)
+        used += n
+    return "\n".join(out) + marker
+
+
+def headline_priority(a: dict, now_ts: float) -> float:
+    """Score first, then freshness (-1 per 6h old), then how many outlets ran the story."""
+    age_h = max(0.0, (now_ts - float(a.get("_ts") or now_ts)) / 3600.0)
+    return int(a.get("_score") or 0) - age_h / 6.0 + 3.0 * min(4, int(a.get("_story_sources") or 1) - 1)
 
-    # Final fallback message (include finish reason to teach what happened)
-    reason = finish or "NO_TEXT"
-    return _fallback(f"AI produced no text (finishReason={reason}). Prompt too large / MAX_TOKENS.")
+
+def pack_headlines(items: list[dict], render, budget: int, max_items: int, start: int = 1, index: StoryIndex | None = None) -> tuple[list[str], int]:
+    """
+    One line per story (cluster representative), highest headline_priority first, while
+    the estimated tokens fit `budget`. render(item, number) -> line. Returns (lines, tokens used).
+    index: see collapse_stories (None = the live story index).
+    """
+    now_ts = time.time()
+    ranked = sorted(collapse_stories(items, index=index), key=lambda a: headline_priority(a, now_ts), reverse=True)
+    lines: list[str] = []
+    used = 0
+    for a in ranked:
+        if len(lines) >= max_items:
+            break
+        line = render(a, start + len(lines))
+        n = estimate_tokens(line) + 1
+        if used + n > budget:
+            continue  # a shorter headline may still fit
+        lines.append(line)
+        used += n
+    return lines, used
 
 
 def _pack(items: list[dict], n: int) -> str:
@@ -1216,21 +3090,25 @@ def _pack(items: list[dict], n: int) -> str:
     return "\n".join(lines)
 
 
-def build_digest_prompt(recent_24h: list[dict], context_30d: list[dict]) -> str:
-    def _pack_with_ids(items: list[dict], n: int) -> str:
-        lines = []
-        for i, a in enumerate(items[:n], start=1):
-            dom = a.get("_domain", "")
-            title = (a.get("title", "") or "").strip().replace("\n", " ")
-            score = a.get("_score", 0)
-            link = a.get("link", "")
-            lines.append(f"[H{i}] ({dom}) score={score} | {title} | {link}")
-        return "\n".join(lines)
-
-    recent_txt = _pack_with_ids(recent_24h, 20)
-    context_txt = _pack_with_ids(context_30d, 20)
-
-    return f"""
+DIGEST_MAX_RECENT = 40  # headline lines per digest section (the token budget usually binds first)
+DIGEST_MAX_CONTEXT = 20
+MANUAL_MAX_HEADLINES = 30
+
+
+def build_digest_prompt(recent_24h: list[dict], context_30d: list[dict], budget: int | None = None) -> str:
+    budget = GEMINI_INPUT_TOKEN_BUDGET if budget is None else budget
+
+    def _line(a: dict, i: int) -> str:
+        dom = a.get("_domain", "")
+        title = (a.get("title", "") or "").strip().replace("\n", " ")
+        score = a.get("_score", 0)
+        link = a.get("link", "")
+        n_src = int(a.get("_story_sources") or 1)
+        sources = f" sources={n_src}" if n_src > 1 else ""
+        return f"[H{i}] ({dom}) score={score}{sources} | {title} | {link}"
+
+    def _prompt(recent_txt: str, context_txt: str) -> str:
+        return f"""
 You are a Bloomberg-style markets editor. Output ONLY valid JSON (no markdown).
 
 JSON SCHEMA:
@@ -1249,7 +3127,7 @@ JSON SCHEMA:
 
 RULES:
 - Do NOT invent facts.
-- Use only headlines H1-H20.
+- Use only the H# headlines listed below.
 - Output ONLY valid JSON, nothing else.
 
 24H HEADLINES:
@@ -1259,19 +3137,30 @@ RULES:
 {context_txt}
 """.strip()
 
-
-def build_manual_ai_prompt_from_latest(latest_items: list[dict]) -> str:
-    def pack(items: list[dict], n: int = 12) -> str:
-        lines = []
-        for i, a in enumerate(items[:n], start=1):
-            dom = a.get("_domain", "")
-            title = (a.get("title", "") or "").strip().replace("\n", " ")
-            score = a.get("_score", 0)
-            # NO metas link entero (consume tokens). Solo dominio+título.
-            lines.append(f"[N{i}] ({dom}) score={score} | {title}")
-        return "\n".join(lines)
-
-    return f"""
+    # one line per story, best first; the 24h block gets ~2/3 of what the template leaves
+    room = max(0, budget - estimate_tokens(_prompt("", "")))
+    # DB rows are clustered in throwaway indexes: building a prompt must not touch the live stories
+    recent, used = pack_headlines(recent_24h, _line, room * 2 // 3, DIGEST_MAX_RECENT,
+                                  index=StoryIndex(len(recent_24h), len(recent_24h)))
+    context, _ = pack_headlines(context_30d, _line, room - used, DIGEST_MAX_CONTEXT, start=len(recent) + 1,
+                                index=StoryIndex(len(context_30d), len(context_30d)))
+    return _prompt("\n".join(recent), "\n".join(context))
+
+
+def build_manual_ai_prompt_from_latest(latest_items: list[dict], budget: int | None = None) -> str:
+    budget = GEMINI_INPUT_TOKEN_BUDGET if budget is None else budget
+
+    def _line(a: dict, i: int) -> str:
+        dom = a.get("_domain", "")
+        title = (a.get("title", "") or "").strip().replace("\n", " ")
+        score = a.get("_score", 0)
+        n_src = int(a.get("_story_sources") or 1)
+        sources = f" sources={n_src}" if n_src > 1 else ""
+        # NO metas link entero (consume tokens). Solo dominio+título.
+        return f"[N{i}] ({dom}) score={score}{sources} | {title}"
+
+    def _prompt(headlines_txt: str) -> str:
+        return f"""
 You are a Bloomberg-style markets editor.
 
 Return ONLY plain text. No JSON. No markdown.
@@ -1310,9 +3199,54 @@ WATCHLIST (next 24h; 6 items):
 ═══════════════════════════════════════════════════════════════
 
 HEADLINES:
-{pack(latest_items, 12)}
+{headlines_txt}
+""".strip()
+
+    lines, _ = pack_headlines(latest_items, _line, max(0, budget - estimate_tokens(_prompt(""))), MANUAL_MAX_HEADLINES)
+    return _prompt("\n".join(lines))
+
+
+def build_custom_ai_prompt(custom_input: str, budget: int | None = None) -> str:
+    budget = GEMINI_INPUT_TOKEN_BUDGET if budget is None else budget
+
+    def _prompt(input_txt: str) -> str:
+        return f"""
+You are a Bloomberg-style markets analyst.
+
+Return ONLY plain text. No JSON. No markdown.
+
+CAPTION:
+<1-2 lines terminal-style summary>
+
+REASONING (3 bullets):
+- Claim: ... | Evidence: From input | Why: ...
+- Claim: ... | Evidence: From input | Why: ...
+- Claim: ... | Evidence: From input | Why: ...
+
+═══════════════════════════════════════════════════════════════
+
+📈 BULLISH RECOMMENDATIONS (1-7 DAYS):
+- Asset 1 | Ticker: <SPY/QQQ/etc> | Why: <reason from input>
+- Asset 2 | Ticker: <sector/ticker> | Why: <reason from input>
+- Asset 3 | Ticker: <sector/ticker> | Why: <reason from input>
+
+═══════════════════════════════════════════════════════════════
+
+📉 BEARISH / SHORT CANDIDATES (1-7 DAYS):
+- Asset 1 | Ticker: <sector/ticker> | Why: <risk from input>
+- Asset 2 | Ticker: <sector/ticker> | Why: <risk from input>
+- Asset 3 | Ticker: <sector/ticker> | Why: <risk from input>
+
+═══════════════════════════════════════════════════════════════
+
+INPUT DATA:
+{input_txt}
 """.strip()
 
+    # pasted input keeps its first lines (the instructions above always survive)
+    room = max(0, budget - estimate_tokens(_prompt("")))
+    return _prompt(clip_to_tokens((custom_input or "").strip(), room))
+
 
 def run_manual_ai_analysis(latest_items: list[dict], debug: bool = False) -> str:
     if not latest_items:
@@ -1322,96 +3256,1152 @@ def run_manual_ai_analysis(latest_items: list[dict], debug: bool = False) -> str
     return gemini_generate_text(prompt, debug=debug)
 
 
+@process_resource
+def get_digest_memo() -> dict:
+    # Latest digest kept in-process: reruns skip the ai_digests query until a new one is due
+    return {"ts": 0.0, "content": None, "job": None}
+
+
+def _generate_digest(prompt: str) -> dict:
+    # AI job body (worker thread): no st.* calls here
+    content = gemini_generate_json(prompt)
+    db_save_digest(content, window_hours=AI_WINDOW_HOURS_RECENT)
+    get_digest_memo().update(ts=time.time(), content=content)
+    return content
+
+
 def maybe_generate_ai_digest() -> dict | None:
     """
     Stores digest as TEXT inside ai_digests.content_json (string).
     This avoids JSON parsing instability entirely.
+    A due digest is generated by an AI job; until it lands the previous one (or None) is returned.
     """
-    latest = db_get_latest_digest()
+    memo = get_digest_memo()
     now_ts = time.time()
-    if latest and (now_ts - latest["ts"]) < AI_DIGEST_EVERY_SECONDS:
-        c = latest["content"]
-        if isinstance(c, dict):
-            return c
-        return {"caption": str(c)}
+    if memo["content"] is not None and (now_ts - memo["ts"]) < AI_DIGEST_EVERY_SECONDS:
+        return memo["content"]
+
+    jobs = get_ai_jobs()
+    pending = jobs.get(memo["job"]) if memo.get("job") else None
+    if pending and pending["status"] in AI_JOB_ACTIVE:
+        return memo["content"]
+
+    latest = db_get_latest_digest()
+    if latest and (now_ts - latest["ts"]) < AI_DIGEST_EVERY_SECONDS:
+        c = latest["content"]
+        if not isinstance(c, dict):
+            c = {"caption": str(c)}
+        memo.update(ts=latest["ts"], content=c)
+        return c
 
     recent_24h = db_get_news_since(hours=AI_WINDOW_HOURS_RECENT, limit=600)
     context_30d = db_get_news_since(hours=AI_CONTEXT_DAYS * 24, limit=1000)
     context_30d.sort(key=lambda x: (x.get("_score", 0), x.get("_ts", 0.0)), reverse=True)
 
     prompt = build_digest_prompt(recent_24h, context_30d)
-    debug = st.session_state.get("debug_ai", False)
-    content = gemini_generate_json(prompt, debug=debug)
-    db_save_digest(content, window_hours=AI_WINDOW_HOURS_RECENT)
-    return content
+    # a quiet hour can repeat last hour's prompt: that digest must still be saved again
+    memo["job"] = jobs.submit("digest", prompt, _generate_digest, prompt, reuse_done=False)
+    return memo["content"]
+
+
+# =========================
+# AI JOBS
+# - Gemini calls run on a bounded pool, never inside the script run
+# - a session keeps only job ids and polls; identical prompts share one job
+# =========================
+AI_JOB_ACTIVE = ("queued", "running")
+
+
+class AiJobQueue:
+    """
+    Jobs keyed by sha256(kind, prompt). Submitting a prompt that is already queued, running
+    or (unless reuse_done=False) done returns the existing job. A job is cancelled once every submitter released it
+    (a running Gemini call cannot be interrupted: its result is dropped, the response cache keeps it).
+    """
+
+    def __init__(self, workers: int, max_pending: int, kept: int):
+        self.max_pending = max(1, int(max_pending))
+        self.kept = max(1, int(kept))
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, int(workers)), thread_name_prefix="ozy-ai")
+        self._jobs: OrderedDict[str, dict] = OrderedDict()  # job id -> job, submission order
+        self._by_key: dict[str, str] = {}  # prompt hash -> job id (not failed / cancelled)
+        self._seq = 0
+
+    @staticmethod
+    def job_key(kind: str, prompt: str) -> str:
+        return hashlib.sha256(f"{kind}\0{prompt}".encode("utf-8")).hexdigest()
+
+    def submit(self, kind: str, prompt: str, fn, *args, progress: bool = False, reuse_done: bool = True) -> str | None:
+        """
+        Job id (new or shared), or None when the queue is full.
+        progress=True: fn is also given on_text(text) to publish partial output (job["partial"]).
+        reuse_done=False: a finished job with the same prompt runs again (fn has side effects).
+        """
+        metrics = get_metrics()
+        key = self.job_key(kind, prompt)
+        with self._lock:
+            job = self._jobs.get(self._by_key.get(key, ""))
+            if job is not None and (reuse_done or job["status"] in AI_JOB_ACTIVE):
+                job["holders"] += 1
+                metrics.inc("ozy_ai_jobs_total", kind=kind, result="deduped")
+                return job["id"]
+            if sum(1 for j in self._jobs.values() if j["status"] in AI_JOB_ACTIVE) >= self.max_pending:
+                metrics.inc("ozy_ai_jobs_total", kind=kind, result="rejected")
+                return None
+            self._seq += 1
+            job = {
+                "id": f"{kind}-{self._seq}", "key": key, "kind": kind, "status": "queued", "holders": 1,
+                "submitted_ts": time.time(), "started_ts": 0.0, "finished_ts": 0.0,
+                "result": None, "error": "", "partial": "", "future": None,
+            }
+            self._jobs[job["id"]] = job
+            self._by_key[key] = job["id"]
+            self._trim()
+            job["future"] = self._executor.submit(self._run, job, fn, args, progress)
+        metrics.inc("ozy_ai_jobs_total", kind=kind, result="submitted")
+        return job["id"]
+
+    def _run(self, job: dict, fn, args: tuple, progress: bool):
+        with self._lock:
+            if job["status"] != "queued":
+                return
+            job["status"] = "running"
+            job["started_ts"] = time.time()
+        metrics = get_metrics()
+        metrics.observe("ozy_ai_job_seconds", job["started_ts"] - job["submitted_ts"], kind=job["kind"], phase="wait")
+        kwargs = {"on_text": lambda text: self._publish(job, text)} if progress else {}
+        try:
+            result, error, status = fn(*args, **kwargs), "", "done"
+        except Exception as e:
+            result, error, status = None, f"{type(e).__name__}: {str(e)[:180]}", "error"
+        with self._lock:
+            cancelled = job["status"] == "cancelled"  # released while running: result dropped
+            if not cancelled:
+                job.update(status=status, result=result, error=error, finished_ts=time.time())
+                if status == "error" and self._by_key.get(job["key"]) == job["id"]:
+                    del self._by_key[job["key"]]  # a failed prompt may be resubmitted
+            self._trim()
+        metrics.observe("ozy_ai_job_seconds", time.time() - job["started_ts"], kind=job["kind"], phase="run")
+        if not cancelled:
+            metrics.inc("ozy_ai_jobs_total", kind=job["kind"], result=status)
+
+    def _publish(self, job: dict, text: str):
+        with self._lock:
+            if job["status"] == "running":
+                job["partial"] = text
+
+    def _trim(self):
+        # Oldest finished jobs go first; active ones are never dropped (bounded by max_pending)
+        finished = [j for j in self._jobs.values() if j["status"] not in AI_JOB_ACTIVE]
+        for job in finished[: max(0, len(finished) - self.kept)]:
+            del self._jobs[job["id"]]
+            if self._by_key.get(job["key"]) == job["id"]:
+                del self._by_key[job["key"]]
+
+    def get(self, job_id: str) -> dict | None:
+        """Copy of the job (without the future) plus its queue position; None if unknown / trimmed."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            out = {k: v for k, v in job.items() if k != "future"}
+            out["position"] = 0
+            if job["status"] == "queued":
+                ahead = [j for j in self._jobs.values() if j["status"] in AI_JOB_ACTIVE and j["submitted_ts"] < job["submitted_ts"]]
+                out["position"] = len(ahead) + 1
+            return out
+
+    def release(self, job_id: str):
+        """Drops one submitter's interest; the last one out cancels a job that has not finished."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] not in AI_JOB_ACTIVE:
+                return
+            job["holders"] -= 1
+            if job["holders"] > 0:
+                return
+            if job["status"] == "queued":
+                job["future"].cancel()
+            job.update(status="cancelled", finished_ts=time.time())
+            if self._by_key.get(job["key"]) == job_id:
+                del self._by_key[job["key"]]
+        get_metrics().inc("ozy_ai_jobs_total", kind=job["kind"], result="cancelled")
+
+    def stats(self) -> dict:
+        with self._lock:
+            queued = sum(1 for j in self._jobs.values() if j["status"] == "queued")
+            running = sum(1 for j in self._jobs.values() if j["status"] == "running")
+        return {"queued": queued, "running": running}
+
+
+@process_resource
+def get_ai_jobs() -> AiJobQueue:
+    return AiJobQueue(AI_JOB_WORKERS, AI_JOB_MAX_PENDING, AI_JOBS_KEPT)
+
+
+def run_ai_text_job(prompt: str, on_text=None) -> dict:
+    # AI job body for the manual / custom analyses: streamed, so pollers see the answer grow;
+    # debug output travels in the result
+    trace: dict = {}
+    text = ""
+    for chunk in gemini_stream_text(prompt, trace=trace):
+        text += chunk
+        if on_text is not None:
+            on_text(text)
+    return {"text": text, "trace": trace}
+
+
+def submit_session_ai_job(slot: str, prompt: str) -> str | None:
+    """One job per session slot ("manual" / "custom"); a new prompt releases the previous job."""
+    jobs = get_ai_jobs()
+    slots = st.session_state.setdefault("ai_jobs", {})
+    prev = slots.pop(slot, None)
+    job_id = jobs.submit(slot, prompt, run_ai_text_job, prompt, progress=True)
+    if prev:
+        jobs.release(prev)
+    if job_id:
+        slots[slot] = job_id
+    return job_id
+
+
+def cancel_session_ai_job(slot: str):
+    # on_click callback: runs before the rerun, so the slot is already free when the page renders
+    job_id = st.session_state.get("ai_jobs", {}).pop(slot, None)
+    if job_id:
+        get_ai_jobs().release(job_id)
+
+
+def poll_session_ai_job(slot: str) -> dict | None:
+    """The slot's job; once it has finished it is returned one last time and the slot is freed."""
+    slots = st.session_state.get("ai_jobs", {})
+    job_id = slots.get(slot)
+    if not job_id:
+        return None
+    job = get_ai_jobs().get(job_id)
+    if job is None or job["status"] not in AI_JOB_ACTIVE:
+        slots.pop(slot, None)
+    return job
+
+
+def ai_job_text(job: dict) -> str:
+    if job["status"] == "done":
+        return (job["result"] or {}).get("text") or ""
+    return f"CAPTION:\nAI ERROR\n\nREASONING:\n- Claim: Job {job['status']} | Evidence: — | Why: {job['error'] or 'no result'}"
+
+
+AI_QUEUE_FULL_TEXT = (
+    "CAPTION:\nAI BUSY\n\nREASONING:\n"
+    f"- Claim: AI queue full | Evidence: — | Why: {AI_JOB_MAX_PENDING} analyses already pending, retry shortly"
+)
+
+
+def render_ai_job_progress(slot: str, job: dict):
+    col_status, col_cancel = st.columns([4, 1])
+    with col_status:
+        if job["status"] == "queued":
+            load = get_ai_jobs().stats()
+            st.info(f"⏳ Queued (position {job['position']}, {load['running']} running) · {job['id']}")
+        elif job["partial"]:
+            st.info(f"✍️ Writing… {time.time() - job['started_ts']:.0f}s · {job['id']}")
+        else:
+            st.info(f"⚙️ Analyzing… {time.time() - job['started_ts']:.0f}s · {job['id']}")
+    with col_cancel:
+        st.button("✖ Cancel", key=f"cancel_ai_{slot}", on_click=cancel_session_ai_job, args=(slot,), use_container_width=True)
+    if job["partial"]:
+        st.text(job["partial"])
 
 
 # =========================
 # FETCHERS
 # =========================
-def fetch_google_news(keywords: list[str]) -> list[dict]:
-    base = " OR ".join(keywords) if keywords else "SPY"
+def shard_keywords(keywords: list[str]) -> list[list[str]]:
+    """
+    Splits keywords into bounded groups (≤ GOOGLE_QUERY_MAX_TERMS terms / GOOGLE_QUERY_MAX_CHARS chars
+    of "a OR b OR ..."). Case-insensitive dedupe, order kept.
+    """
+    shards: list[list[str]] = []
+    current: list[str] = []
+    seen = set()
+    for kw in keywords or []:
+        k = (kw or "").strip()
+        if not k or k.lower() in seen:
+            continue
+        seen.add(k.lower())
+        too_long = len(" OR ".join(current + [k])) > GOOGLE_QUERY_MAX_CHARS
+        if current and (too_long or len(current) >= GOOGLE_QUERY_MAX_TERMS):
+            shards.append(current)
+            current = []
+        current.append(k)
+    if current:
+        shards.append(current)
+    if not shards:
+        shards = [["SPY"]]
+    return shards
+
+
+def plan_google_queries(keywords: list[str]) -> list[str]:
+    """
+    Splits the active keywords into several bounded-length Google News queries
+    (one giant OR query gets truncated to its first entries and loses most stories).
+    Every shard keeps the same freshness window + negative keywords.
+    """
     when = "when:1d" if MAX_ARTICLE_AGE_HOURS <= 24 else "when:2d"
     negative = " ".join([f"-{w}" for w in NEGATIVE_KEYWORDS])
-    query = f"({base}) {when} {negative}"
+    return [f"({' OR '.join(terms)}) {when} {negative}" for terms in shard_keywords(keywords)]
+
+
+@process_resource
+def get_fetch_executor(pool: str) -> ThreadPoolExecutor:
+    # One pool per source: Google shards never queue behind Bing's (threads start lazily)
+    return ThreadPoolExecutor(max_workers=GOOGLE_SHARD_WORKERS, thread_name_prefix=f"ozy-fetch-{pool}")
+
+
+class FeedValidatorCache:
+    """
+    Per-URL conditional GET state: ETag / Last-Modified + last parsed items.
+    body_hash is the fallback for servers that ignore validators (Google News):
+    same body => reuse parsed items, skip feedparser.
+    Bounded LRU; thread-safe (shards fetch concurrently).
+    """
+
+    def __init__(self, max_urls: int):
+        self.max_urls = max(1, int(max_urls))
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, dict] = OrderedDict()
+
+    def get(self, url: str) -> dict | None:
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                self._entries.move_to_end(url)
+            return entry
+
+    def put(self, url: str, entry: dict):
+        with self._lock:
+            self._entries[url] = entry
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.max_urls:
+                self._entries.popitem(last=False)
+
+
+@process_resource
+def get_feed_cache() -> FeedValidatorCache:
+    return FeedValidatorCache(FEED_CACHE_MAX_URLS)
 
-    feed = requests.get(GOOGLE_NEWS_RSS.format(q=quote(query)), headers=HEADERS, timeout=12)
-    feed.raise_for_status()
 
-    import feedparser
-    parsed = feedparser.parse(feed.content)
+# Volatile tags that change on every response even when the items did not
+_FEED_VOLATILE_RE = re.compile(rb"<(lastBuildDate|pubDate|updated)>[^<]*</\1>", re.IGNORECASE)
 
+
+def _feed_body_hash(content: bytes) -> str:
+    # Only the channel header (before the first item) is scrubbed
+    head, sep, rest = content.partition(b"<item")
+    return hashlib.sha256(_FEED_VOLATILE_RE.sub(b"", head) + sep + rest).hexdigest()
+
+
+def record_feed_response(url: str, content: bytes, elapsed: float):
+    """Saves <name>.xml + <name>.json ({"url", "ts", "elapsed"}) under FEED_RECORD_DIR (read by feed_replay.py)."""
+    try:
+        os.makedirs(FEED_RECORD_DIR, exist_ok=True)
+        ts = time.time()
+        name = f"{hashlib.sha1(url.encode('utf-8')).hexdigest()[:12]}-{int(ts * 1000)}"
+        with open(os.path.join(FEED_RECORD_DIR, name + ".xml"), "wb") as f:
+            f.write(content)
+        with open(os.path.join(FEED_RECORD_DIR, name + ".json"), "w", encoding="utf-8") as f:
+            json.dump({"url": url, "ts": ts, "elapsed": round(elapsed, 4), "bytes": len(content)}, f)
+    except Exception:
+        pass
+
+
+def fetch_feed(url: str, extract, timeout: float) -> list[dict]:
+    """
+    GET url through the validator cache; extract(parsed_feed) -> list[dict] runs only when the
+    feed really changed. Always returns fresh dict copies (dedupe() mutates items).
+    """
+    cache = get_feed_cache()
+    cached = cache.get(url)
+
+    headers = dict(HEADERS)
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    metrics = get_metrics()
+    try:
+        with metrics.time("ozy_stage_seconds", stage="fetch_http"):
+            r = get_http_session().get(url, headers=headers, timeout=timeout)
+            if r.status_code == 304 and cached:
+                metrics.inc("ozy_feed_requests_total", result="not_modified")
+                return [dict(x) for x in cached["items"]]
+            r.raise_for_status()
+    except Exception:
+        metrics.inc("ozy_feed_requests_total", result="error")
+        raise
+
+    body_hash = _feed_body_hash(r.content)
+    if cached and cached.get("body_hash") == body_hash:
+        metrics.inc("ozy_feed_requests_total", result="unchanged")
+        items = cached["items"]
+    else:
+        metrics.inc("ozy_feed_requests_total", result="changed")
+        if FEED_RECORD_DIR:
+            record_feed_response(url, r.content, r.elapsed.total_seconds())
+        import feedparser
+        with metrics.time("ozy_stage_seconds", stage="parse"):
+            items = extract(feedparser.parse(r.content))
+        metrics.inc("ozy_stage_items_total", len(items), stage="parse")
+
+    cache.put(url, {
+        "etag": r.headers.get("ETag", ""),
+        "last_modified": r.headers.get("Last-Modified", ""),
+        "body_hash": body_hash,
+        "items": items,
+    })
+    return [dict(x) for x in items]
+
+
+def _entries_to_items(parsed, max_entries: int, link_fn=None) -> list[dict]:
     items = []
-    for e in parsed.entries[:60]:
+    for e in parsed.entries[:max_entries]:
         title = getattr(e, "title", "") or ""
         link = getattr(e, "link", "") or ""
-        published = getattr(e, "published", "") or ""
+        published = getattr(e, "published", "") or getattr(e, "updated", "") or ""
         summary = getattr(e, "summary", "") or ""
-        ts = safe_parse_time(published)
+        if link_fn is not None:
+            link = link_fn(link)
 
-        items.append({
+        # "_ts" is filled later (only for entries not seen before)
+        item = {
             "source": "OZYTARGET.COM",
             "title": title.strip(),
             "link": link.strip(),
             "time": published.strip(),
             "summary": summary.strip(),
-            "_ts": ts,
-        })
+        }
+        # feedparser already parsed the date (UTC struct_time): no string parsing needed later
+        parsed_time = getattr(e, "published_parsed", None) or getattr(e, "updated_parsed", None)
+        if parsed_time:
+            try:
+                item["_ts_feed"] = float(calendar.timegm(parsed_time))
+            except Exception:
+                pass
+        items.append(item)
+    return items
+
+
+def _google_entries_to_items(parsed) -> list[dict]:
+    return _entries_to_items(parsed, GOOGLE_MAX_ENTRIES_PER_QUERY)
+
+
+def _unwrap_bing_link(link: str) -> str:
+    # Bing RSS links are apiclick.aspx redirects; the article URL is in ?url=
+    # (canonicalization drops queries, so unwrapped links are required for dedupe)
+    try:
+        parsed = urlparse(link)
+        if "bing.com" in (parsed.netloc or "") and "apiclick" in (parsed.path or "").lower():
+            target = (parse_qs(parsed.query).get("url") or [""])[0]
+            return target or link
+    except Exception:
+        pass
+    return link
+
+
+def _bing_entries_to_items(parsed) -> list[dict]:
+    return _entries_to_items(parsed, BING_MAX_ENTRIES_PER_QUERY, link_fn=_unwrap_bing_link)
+
+
+def _rss_entries_to_items(parsed) -> list[dict]:
+    return _entries_to_items(parsed, RSS_MAX_ENTRIES_PER_FEED)
+
+
+def _tag_query(items: list[dict], terms: list[str] | None) -> list[dict]:
+    # The keyword shard behind an item: session views use it for body-only matches
+    if terms:
+        tagged = tuple(t.lower() for t in terms)
+        for it in items:
+            it["_query_terms"] = tagged
     return items
 
 
+def fetch_feeds(urls: list[str], extract, timeout: float, pool: str = "feeds", queries: list[list[str]] | None = None) -> list[dict]:
+    """
+    Fetches several feed URLs concurrently (the `pool` source's executor), each with its own timeout.
+    Failed/slow URLs are skipped; raises only if ALL fail. A shard still queued or running at the
+    deadline counts as a failed feed request (result="cancelled" / "timeout").
+    Results are concatenated in URL order (merge happens in dedupe()).
+    queries: keyword shard per URL, kept on its items as "_query_terms".
+    """
+    queries = queries or [None] * len(urls)
+    if len(urls) == 1:
+        return _tag_query(fetch_feed(urls[0], extract, timeout=timeout), queries[0])
+
+    executor = get_fetch_executor(pool)
+    futures = [executor.submit(fetch_feed, u, extract, timeout) for u in urls]
+    wait(futures, timeout=timeout + 3)
+
+    metrics = get_metrics()
+    items: list[dict] = []
+    first_error = None
+    ok = 0
+    for f, terms in zip(futures, queries):
+        if not f.done():
+            result = "cancelled" if f.cancel() else "timeout"
+            metrics.inc("ozy_feed_requests_total", result=result)
+            first_error = first_error or TimeoutError(f"{pool} shard {result} after {timeout + 3:g}s")
+            continue
+        try:
+            items.extend(_tag_query(f.result(), terms))
+            ok += 1
+        except Exception as e:
+            first_error = first_error or e
+
+    if not ok and first_error is not None:
+        raise first_error
+    return items
+
+
+def fetch_google_news(keywords: list[str]) -> list[dict]:
+    urls = [GOOGLE_NEWS_RSS.format(q=quote(q)) for q in plan_google_queries(keywords)]
+    return fetch_feeds(urls, _google_entries_to_items, timeout=GOOGLE_SHARD_TIMEOUT_SECONDS, pool="google",
+                       queries=shard_keywords(keywords))
+
+
+def fetch_bing_news(keywords: list[str]) -> list[dict]:
+    shards = shard_keywords(keywords)
+    urls = [BING_NEWS_RSS.format(q=quote(" OR ".join(terms))) for terms in shards]
+    return fetch_feeds(urls, _bing_entries_to_items, timeout=GOOGLE_SHARD_TIMEOUT_SECONDS, pool="bing", queries=shards)
+
+
 # =========================
-# PIPELINE (cached)
+# SOURCES (pluggable adapters)
+# - each source: own timeout, retry budget and circuit breaker
+# - all sources run concurrently; one slow/failing source never delays the rest
 # =========================
-feed_box = st.container()
+class CircuitBreaker:
+    """
+    closed → (N consecutive failures) → open → (cooldown) → half-open: one trial call
+    → closed on success / open again on failure.
+    """
+
+    def __init__(self, failure_threshold: int, cooldown_seconds: float):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.cooldown_seconds = float(cooldown_seconds)
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_ts = 0.0
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._failures < self.failure_threshold:
+                return "closed"
+            if (time.time() - self._opened_ts) >= self.cooldown_seconds:
+                return "half-open"
+            return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._failures < self.failure_threshold:
+                return True
+            if (time.time() - self._opened_ts) < self.cooldown_seconds or self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._failures >= self.failure_threshold:
+                self._opened_ts = time.time()
+
+
+class SourceUnavailable(RuntimeError):
+    """NewsSource.run() got no answer: skipped (circuit open) or failed after its retries."""
+
+    def __init__(self, name: str, reason: str, skipped: bool = False):
+        super().__init__(f"{name}: {reason}")
+        self.name = name
+        self.skipped = skipped
+
+
+class NewsSource:
+    """
+    Adapter interface. Subclasses implement fetch_raw(keywords) -> raw items
+    ({"source", "title", "link", "time", "summary"}); run() adds retries, breaker and stats
+    and raises SourceUnavailable instead of returning nothing (an empty list is a real answer).
+    """
+
+    name = "source"
+
+    def __init__(self, timeout_seconds: float = 15.0, retries: int = 1):
+        self.timeout_seconds = float(timeout_seconds)
+        self.retries = max(0, int(retries))
+        self.breaker = CircuitBreaker(SOURCE_BREAKER_FAILURES, SOURCE_BREAKER_COOLDOWN_SECONDS)
+        self.stats = {"fetches": 0, "failures": 0, "skipped": 0, "last_latency": 0.0, "last_items": 0, "last_error": "", "last_ts": 0.0}
+
+    def fetch_raw(self, keywords: list[str]) -> list[dict]:
+        raise NotImplementedError
+
+    def run(self, keywords: list[str]) -> list[dict]:
+        if not self.breaker.allow():
+            self.stats["skipped"] += 1
+            get_metrics().inc("ozy_source_failures_total", source=self.name, reason="circuit_open")
+            raise SourceUnavailable(self.name, "circuit open", skipped=True)
+
+        started = time.time()
+        deadline = started + self.timeout_seconds
+        error = None
+        for _ in range(1 + self.retries):
+            try:
+                items = self.fetch_raw(keywords)
+                if time.time() > deadline:
+                    raise TimeoutError(f"{self.name} answered after {self.timeout_seconds:g}s")
+                for it in items:
+                    it["_feed"] = self.name
+                self.breaker.record_success()
+                self._record(started, len(items), "")
+                return items
+            except Exception as e:
+                error = e
+                if time.time() >= deadline:
+                    break
+
+        self.breaker.record_failure()
+        self.stats["failures"] += 1
+        reason = f"{type(error).__name__}: {str(error)[:120]}"
+        self._record(started, 0, reason)
+        raise SourceUnavailable(self.name, reason)
+
+    def _record(self, started: float, n_items: int, error: str):
+        get_metrics().observe("ozy_source_fetch_seconds", time.time() - started, source=self.name)
+        if error:
+            get_metrics().inc("ozy_source_failures_total", source=self.name, reason="error")
+        self.stats["fetches"] += 1
+        self.stats["last_latency"] = round(time.time() - started, 3)
+        self.stats["last_items"] = n_items
+        self.stats["last_error"] = error
+        self.stats["last_ts"] = time.time()
+
+
+class GoogleNewsSource(NewsSource):
+    name = "google"
+
+    def fetch_raw(self, keywords: list[str]) -> list[dict]:
+        return fetch_google_news(keywords)
+
+
+class BingNewsSource(NewsSource):
+    name = "bing"
+
+    def fetch_raw(self, keywords: list[str]) -> list[dict]:
+        return fetch_bing_news(keywords)
+
+
+class RssFeedSource(NewsSource):
+    """Fixed feed (keywords ignored; the institutional filter decides what stays)."""
+
+    def __init__(self, name: str, url: str, **kw):
+        super().__init__(**kw)
+        self.name = name
+        self.url = url
+
+    def fetch_raw(self, keywords: list[str]) -> list[dict]:
+        return fetch_feed(self.url, _rss_entries_to_items, timeout=self.timeout_seconds)
+
+
+def build_default_sources() -> dict[str, NewsSource]:
+    available = [
+        GoogleNewsSource(timeout_seconds=GOOGLE_SHARD_TIMEOUT_SECONDS + 3, retries=1),
+        BingNewsSource(timeout_seconds=GOOGLE_SHARD_TIMEOUT_SECONDS + 3, retries=1),
+        RssFeedSource("fed", FED_PRESS_RSS, timeout_seconds=10, retries=1),
+        RssFeedSource("bls", BLS_LATEST_RSS, timeout_seconds=10, retries=1),
+    ]
+    return {s.name: s for s in available if s.name in NEWS_SOURCES}
+
+
+@process_resource
+def get_source_registry() -> dict[str, NewsSource]:
+    # Process-wide: breakers + stats survive reruns. Add sources with register_source().
+    return build_default_sources()
+
+
+def register_source(source: NewsSource):
+    get_source_registry()[source.name] = source
 
-@st.cache_data(ttl=AUTO_REFRESH_SECONDS, show_spinner=False)
-def fetch_all_sources_cached(keywords: list[str], min_kw: int, max_noise: int, cache_buster: int = 0) -> list[dict]:
-    # IMPORTANT:
-    # "cache_buster" MUST be used inside the function so Streamlit cache key changes.
-    _ = int(cache_buster)
 
+@process_resource
+def get_source_executor() -> ThreadPoolExecutor:
+    # Separate from the shard pool so a source never waits for its own shards' workers
+    return ThreadPoolExecutor(max_workers=8, thread_name_prefix="ozy-source")
+
+
+def fetch_from_sources(keywords: list[str]) -> list[dict]:
+    """
+    Items from every source that answered. Raises RuntimeError when none did (all failed or
+    circuit-open): the caller keeps its last good headlines instead of publishing an empty cycle.
+    """
+    sources = list(get_source_registry().values())
+    if not sources:
+        return []
+
+    executor = get_source_executor()
+    started = time.time()
+    futures = [(src, executor.submit(src.run, keywords)) for src in sources]
+
+    # Each source only gets its own deadline; a late one is dropped (run() counts it as a failure)
     items: list[dict] = []
+    answered = 0
+    problems: list[str] = []
+    for src, f in futures:
+        remaining = started + src.timeout_seconds + 1 - time.time()
+        try:
+            items.extend(f.result(timeout=max(0.0, remaining)))
+            answered += 1
+        except SourceUnavailable as e:
+            problems.append(str(e))
+        except Exception as e:
+            problems.append(f"{src.name}: {type(e).__name__}: {str(e)[:120]}")
+    if not answered:
+        raise RuntimeError("all news sources failed (" + "; ".join(problems) + ")")
+    return items
 
-    try:
-        items.extend(fetch_google_news(keywords))
-    except Exception:
-        pass
 
-    items = dedupe(items)
-    items = filter_institutional(items, min_kw=min_kw, max_noise=max_noise)
-    items = [score_bloomberg(x) for x in items]
+# =========================
+# PIPELINE
+# =========================
+feed_box = st.container()
+
+SEEN_REJECTED = "rejected"
+SEEN_IN_DB = "in_db"
+
+
+class SeenIndex:
+    """
+    Bounded in-memory index of item hashes already handled by ingestion (LRU).
+    Values:
+      - scored item dict  → accepted before: reuse as-is (no parse / score / DB)
+      - SEEN_REJECTED     → filtered out before (reasons never get better with time)
+      - SEEN_IN_DB        → seeded from DB at startup: score once for the UI, but never re-upsert/alert
+    One index per (min_kw, max_noise) since acceptance depends on them.
+    """
+
+    def __init__(self, max_items: int):
+        self.max_items = max(100, int(max_items))
+        self._lock = threading.Lock()
+        self._items: OrderedDict[str, dict | str] = OrderedDict()
+
+    def get(self, item_hash: str):
+        with self._lock:
+            v = self._items.get(item_hash)
+            if v is not None:
+                self._items.move_to_end(item_hash)
+            return v
+
+    def put(self, item_hash: str, value):
+        with self._lock:
+            self._items[item_hash] = value
+            self._items.move_to_end(item_hash)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def forget(self, hashes: list[str]):
+        with self._lock:
+            for h in hashes:
+                self._items.pop(h, None)
+
+    def seed(self, hashes: list[str]):
+        with self._lock:
+            for h in hashes[: self.max_items]:
+                self._items.setdefault(h, SEEN_IN_DB)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+def _ensure_ts(item: dict) -> dict:
+    # Publish time is parsed lazily: only entries that reach filtering pay for it
+    if "_ts" not in item:
+        item["_ts"] = item.get("_ts_feed") or safe_parse_time(item.get("time") or "")
+    return item
+
+
+def fetch_all_sources(keywords: list[str], min_kw: int, max_noise: int, index: SeenIndex | None = None) -> tuple[list[dict], list[dict]]:
+    """
+    Returns (current headlines, headlines never ingested before).
+    With an index, known entries skip time parsing, filtering and scoring;
+    only the second list needs DB writes / alerts.
+    """
+    metrics = get_metrics()
+    items = fetch_from_sources(keywords)
+    with metrics.time("ozy_stage_seconds", stage="dedupe"):
+        items = dedupe(items)
+    metrics.inc("ozy_stage_items_total", len(items), stage="dedupe")
+
+    current: list[dict] = []
+    fresh: list[dict] = []
+    in_db: set[str] = set()
+    now_ts = time.time()
+    max_age_sec = float(MAX_ARTICLE_AGE_HOURS) * 3600.0
+    for a in items:
+        h = make_item_hash((a.get("title") or "").strip(), (a.get("link") or "").strip(), canonical_link=a.get("_canonical_link", ""))
+        a["_item_hash"] = h
+        known = index.get(h) if index is not None else None
+        if isinstance(known, dict):
+            if (now_ts - float(known.get("_ts") or 0.0)) > max_age_sec:
+                index.put(h, SEEN_REJECTED)
+            else:
+                current.append(known)
+            continue
+        if known == SEEN_REJECTED:
+            continue
+        if known == SEEN_IN_DB:
+            in_db.add(h)
+        fresh.append(_ensure_ts(a))
+
+    with metrics.time("ozy_stage_seconds", stage="filter"):
+        accepted = filter_institutional(fresh, min_kw=min_kw, max_noise=max_noise)
+    with metrics.time("ozy_stage_seconds", stage="score"):
+        scored = {x["_item_hash"]: x for x in (score_bloomberg(a) for a in accepted)}
+    with metrics.time("ozy_stage_seconds", stage="cluster"):
+        stories = get_story_index()
+        for x in scored.values():
+            stories.assign(x)
+    metrics.inc("ozy_stage_items_total", len(fresh), stage="filter")
+    metrics.inc("ozy_stage_items_total", len(accepted), stage="score")
+    metrics.inc("ozy_stage_items_total", len(scored), stage="cluster")
+
+    new_items: list[dict] = []
+    for a in fresh:
+        h = a["_item_hash"]
+        x = scored.get(h)
+        if index is not None:
+            index.put(h, x if x is not None else SEEN_REJECTED)
+        if x is None:
+            continue
+        current.append(x)
+        if h not in in_db:
+            new_items.append(x)
 
     # Most recent first (you requested recency first)
-    items.sort(key=lambda x: x.get("_ts", 0.0), reverse=True)
-    return items
+    current.sort(key=lambda x: x.get("_ts", 0.0), reverse=True)
+    new_items.sort(key=lambda x: x.get("_ts", 0.0), reverse=True)
+    return current, new_items
+
+
+# =========================
+# INGESTION WORKER (one per process)
+# - Owns fetch → dedupe → filter → score → DB → alerts on a fixed schedule
+# - Sessions only subscribe their keyword set and read a view of the shared snapshot
+# =========================
+INGEST_INTERVAL_SECONDS = int(os.getenv("INGEST_INTERVAL_SECONDS", str(AUTO_REFRESH_SECONDS)))
+INGEST_SUBSCRIPTION_TTL_SECONDS = max(120, 4 * AUTO_REFRESH_SECONDS)  # forget keyword sets no tab asks for
+INGEST_SEEN_MAX_ITEMS = 20000  # bounded seen-hash index (see SeenIndex)
+INGEST_MAX_UNION_KEYWORDS = 120  # cap on the shared query (≈ 12 Google shards)
+INGEST_VIEWS_KEPT = 256  # cached per-session views of the shared snapshot
+
+
+def union_keywords(keyword_sets: list[tuple[str, ...]], limit: int) -> list[str]:
+    """Ordered, case-insensitive union of several keyword sets (capped)."""
+    out: list[str] = []
+    seen = set()
+    for kws in keyword_sets:
+        for kw in kws:
+            k = (kw or "").strip()
+            if not k or k.lower() in seen:
+                continue
+            seen.add(k.lower())
+            out.append(k)
+    return out[:limit]
+
+
+class IngestWorker:
+    """
+    ONE fetch per cycle for the UNION of every active tab's keywords (per filter group),
+    producing a shared, versioned snapshot. Each session only derives its view from it
+    (in-memory keyword filter + one card per story cluster, cached per snapshot version + keyword set).
+    """
+
+    def __init__(self, interval_seconds: int):
+        self.interval_seconds = max(5, int(interval_seconds))
+        self._cond = threading.Condition()
+        self._wake = threading.Event()
+        self._subs: dict[tuple, float] = {}  # (keywords, min_kw, max_noise) -> last time a session asked
+        self._snapshots: dict[tuple, dict] = {}  # (min_kw, max_noise) -> shared snapshot
+        self._views: OrderedDict[tuple, dict] = OrderedDict()  # (group, version, keywords) -> session view
+        self._version = 0
+        self._indexes: dict[tuple, SeenIndex] = {}  # (min_kw, max_noise) -> seen index (worker thread only)
+        self._alert_candidates: deque = deque(maxlen=120)  # newest first, worker thread only
+        self._stories_seeded = False
+        self._retention_checked_ts = 0.0
+        self.last_retention: dict | None = None  # last run_retention() report on this instance
+        self.last_error = ""  # last crashed cycle on this instance ("" once a cycle completes)
+        self._thread = threading.Thread(target=self._run, name="ozy-ingest", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    # ---- session API (cheap, never does I/O) ----
+    def subscribe(self, keywords: list[str], min_kw: int, max_noise: int) -> tuple:
+        key = (tuple(keywords), int(min_kw), int(max_noise))
+        with self._cond:
+            self._subs[key] = time.time()
+            snap = self._snapshots.get(key[1:])
+            missing = {(k or "").strip().lower() for k in keywords} - (snap["keywords_l"] if snap else set()) - {""}
+            # new keywords widen the shared union, but only if they fit under the cap: past it, the
+            # next scheduled cycle decides (recent tabs first) instead of every rerun waking the worker
+            wake = snap is None or (missing and len(snap["keywords_l"]) + len(missing) <= INGEST_MAX_UNION_KEYWORDS)
+        if wake:
+            self._wake.set()
+        return key
+
+    def snapshot(self, key: tuple) -> dict | None:
+        """
+        Session view of the shared snapshot: headlines matching the session keywords, items from
+        fixed feeds (fed, bls: no query behind them), and items that matched their query only in
+        the article body (no keyword in title/summary) when that query held a session keyword.
+        """
+        keywords, group = key[0], key[1:]
+        with self._cond:
+            snap = self._snapshots.get(group)
+            if snap is None:
+                return None
+            view_key = (group, snap["version"], keywords)
+            view = self._views.get(view_key)
+            if view is not None:
+                self._views.move_to_end(view_key)
+                return view
+
+        matcher = get_user_keyword_matcher(list(keywords))
+        union = get_user_keyword_matcher(sorted(snap["keywords_l"]))
+        keywords_l = {(k or "").strip().lower() for k in keywords}
+
+        def _in_view(a: dict) -> bool:
+            terms = a.get("_query_terms")
+            if not terms:
+                return True
+            text = f"{a.get('title', '')}\n{a.get('summary', '')}"
+            if matcher.count(text)["user"] > 0:
+                return True
+            return union.count(text)["user"] == 0 and not keywords_l.isdisjoint(terms)
+
+        items = collapse_stories([a for a in snap["items"] if _in_view(a)])
+        view = dict(snap, items=items)
+        with self._cond:
+            self._views[view_key] = view
+            while len(self._views) > INGEST_VIEWS_KEPT:
+                self._views.popitem(last=False)
+        return view
+
+    def request_refresh(self):
+        self._wake.set()
+
+    def wait_for_update(self, key: tuple, after_version: int, timeout: float) -> bool:
+        """Blocks (bounded) until the shared snapshot behind key is newer than after_version."""
+        deadline = time.time() + timeout
+        with self._cond:
+            while True:
+                snap = self._snapshots.get(key[1:])
+                if snap and snap["version"] > after_version:
+                    return True
+                left = deadline - time.time()
+                if left <= 0:
+                    return False
+                self._cond.wait(left)
+
+    # ---- worker thread ----
+    def _run(self):
+        while True:
+            self._wake.clear()
+            started = time.time()
+            self.run_cycle()
+            self._wake.wait(max(0.0, self.interval_seconds - (time.time() - started)))
+            # woken early (new keywords, refresh button): still keep a minimum gap between cycles
+            time.sleep(max(0.0, started + self.interval_seconds / 4 - time.time()))
+
+    def run_cycle(self):
+        """run_once() that never kills the thread: a crash is counted and shown on every snapshot."""
+        try:
+            self.run_once()
+        except Exception as e:
+            self.last_error = f"Ingest error: {type(e).__name__}: {str(e)[:180]}"
+            get_metrics().inc("ozy_ingest_failures_total", error=type(e).__name__)
+            with self._cond:
+                for group, snap in list(self._snapshots.items()):
+                    self._version += 1
+                    self._snapshots[group] = dict(snap, version=self._version, error=self.last_error)
+                self._cond.notify_all()
+        else:
+            self.last_error = ""
+
+    def run_once(self):
+        now = time.time()
+        with self._cond:
+            for k in [k for k, seen in self._subs.items() if (now - seen) > INGEST_SUBSCRIPTION_TTL_SECONDS]:
+                self._subs.pop(k, None)
+            # most recently active tabs first (they win if the union hits the cap)
+            groups: dict[tuple, list[tuple[str, ...]]] = {}
+            for k, _ in sorted(self._subs.items(), key=lambda kv: kv[1], reverse=True):
+                groups.setdefault(k[1:], []).append(k[0])
+            for g in [g for g in self._snapshots if g not in groups]:
+                self._snapshots.pop(g, None)
+
+        self._seed_stories()
+        with get_metrics().time("ozy_ingest_cycle_seconds"):
+            for group, keyword_sets in groups.items():
+                self._ingest(group, union_keywords(keyword_sets, INGEST_MAX_UNION_KEYWORDS))
+
+        self._maybe_run_retention()
+
+    def _maybe_run_retention(self):
+        now = time.time()
+        # local gate first: the cluster-wide slot check is a DB write
+        if (now - self._retention_checked_ts) < min(RETENTION_INTERVAL_SECONDS, 300):
+            return
+        self._retention_checked_ts = now
+        try:
+            report = run_retention()
+        except Exception as e:
+            report = {"tables": {}, "seconds": 0.0, "ts": now, "error": f"{type(e).__name__}: {str(e)[:160]}"}
+        if report is not None:
+            self.last_retention = report
+
+    def _seed_stories(self):
+        # Rebuild the clusters stored by previous processes (oldest first: founders keep their ids)
+        if self._stories_seeded:
+            return
+        self._stories_seeded = True
+        try:
+            stories = get_story_index()
+            for a in reversed(db_get_news_since(hours=MAX_ARTICLE_AGE_HOURS * 2, limit=STORY_MAX_CLUSTERS)):
+                stories.assign(a)
+        except Exception:
+            pass
+
+    def _index_for(self, min_kw: int, max_noise: int) -> SeenIndex:
+        idx = self._indexes.get((min_kw, max_noise))
+        if idx is None:
+            idx = SeenIndex(INGEST_SEEN_MAX_ITEMS)
+            try:
+                # Seed with what previous processes already stored (skip re-upserts after restart)
+                idx.seed(db_get_item_hashes_since(hours=MAX_ARTICLE_AGE_HOURS * 2, limit=INGEST_SEEN_MAX_ITEMS))
+            except Exception:
+                pass
+            self._indexes[(min_kw, max_noise)] = idx
+        return idx
+
+    def _ingest(self, group: tuple, keywords: list[str]):
+        min_kw, max_noise = group
+        started = time.time()
+        error = ""
+        alerts = []
+        new_items = []
+        try:
+            items, new_items = fetch_all_sources(
+                keywords, min_kw=min_kw, max_noise=max_noise,
+                index=self._index_for(min_kw, max_noise),
+            )
+        except Exception as e:
+            items = None
+            error = f"Scan error: {type(e).__name__}: {str(e)[:180]}"
+
+        metrics = get_metrics()
+        if new_items:
+            try:
+                with metrics.time("ozy_stage_seconds", stage="db_upsert"):
+                    db_upsert_many(new_items)
+                metrics.inc("ozy_stage_items_total", len(new_items), stage="db_upsert")
+            except Exception as e:
+                error = f"DB write error: {type(e).__name__}: {str(e)[:160]}"
+                # not stored => not "seen": retry them next cycle
+                self._index_for(min_kw, max_noise).forget([x.get("_item_hash", "") for x in new_items])
+            else:
+                self._alert_candidates.extendleft(reversed(new_items))
+
+        if self._alert_candidates:
+            try:
+                # Capped per run; leftovers stay candidates (already-alerted ones are skipped)
+                with metrics.time("ozy_stage_seconds", stage="alert_dedupe"):
+                    alerts = alert_on_new_items(list(self._alert_candidates), max_alerts_per_run=6)
+                metrics.inc("ozy_stage_items_total", len(self._alert_candidates), stage="alert_dedupe")
+            except Exception as e:
+                error = error or f"DB write error: {type(e).__name__}: {str(e)[:160]}"
+
+        with self._cond:
+            prev = self._snapshots.get(group)
+            self._version += 1
+            self._snapshots[group] = {
+                # keep last good headlines if this cycle failed
+                "items": items if items is not None else (prev["items"] if prev else []),
+                "ts": time.time() if items is not None else (prev["ts"] if prev else 0.0),
+                "version": self._version,
+                "error": error,
+                "duration": time.time() - started,
+                "keywords_l": {k.lower() for k in keywords} if items is not None else (prev["keywords_l"] if prev else set()),
+            }
+            if alerts:
+                get_alert_ring().publish(alerts)  # before notify: woken sessions see them
+            self._cond.notify_all()
+
+
+@process_resource
+def get_ingest_worker() -> IngestWorker:
+    worker = IngestWorker(INGEST_INTERVAL_SECONDS)
+    worker.start()
+    return worker
+
+
+# =========================
+# STARTUP (once per process)
+# - DB pool + schema, HTTP session, keyword matcher, metrics listener, ingest worker
+# - Gemini model discovery runs in the background (never blocks the first page)
+# - reruns only pay for widgets + rendering
+# =========================
+@process_resource
+def app_startup() -> dict:
+    started = time.perf_counter()
+    steps: dict[str, float] = {}
+
+    for name, init in (
+        ("db_pool", get_db_pool),
+        ("schema", ensure_schema),
+        ("http_session", get_http_session),
+        ("keyword_matcher", lambda: get_keyword_matcher(SCORING_KEYWORD_SETS)),
+        ("metrics_server", start_metrics_server),
+        ("ingest_worker", get_ingest_worker),
+    ):
+        t0 = time.perf_counter()
+        init()
+        steps[name] = round(time.perf_counter() - t0, 4)
+
+    if GEMINI_API_KEY:
+        threading.Thread(target=gemini_pick_model, name="ozy-model-discovery", daemon=True).start()
+
+    seconds = round(time.perf_counter() - started, 4)
+    get_metrics().observe("ozy_cold_start_seconds", seconds)
+    return {"seconds": seconds, "steps": steps, "ts": time.time()}
+
+
+def record_rerun_overhead(phase: str) -> float:
+    """Seconds since this rerun started (observed as ozy_rerun_seconds{phase})."""
+    elapsed = time.perf_counter() - _RERUN_STARTED
+    get_metrics().observe("ozy_rerun_seconds", elapsed, phase=phase)
+    return elapsed
 
 
 # =========================
-# INIT DB
+# INIT (once per process; later reruns get the cached report)
 # =========================
-db_init()
-db_init_alerts()
+startup = app_startup()
 
 
 # =========================
@@ -1553,7 +4543,7 @@ with colC2:
 
 if flush_cache:
     st.cache_data.clear()
-    st.session_state["last_fetch_ts"] = 0.0
+    get_ingest_worker().request_refresh()
     st.success("✅ Cache flushed")
 
 
@@ -1609,45 +4599,16 @@ with col_custom2:
 
 if run_custom_ai and custom_input.strip():
     st.session_state["custom_ai_input"] = custom_input
-    custom_prompt = f"""
-You are a Bloomberg-style markets analyst.
-
-Return ONLY plain text. No JSON. No markdown.
+    custom_prompt = build_custom_ai_prompt(custom_input)
+    # Runs on the AI job pool: this rerun returns at once, later reruns poll the job
+    if submit_session_ai_job("custom", custom_prompt) is None:
+        st.session_state["custom_ai_result"] = AI_QUEUE_FULL_TEXT
 
-CAPTION:
-<1-2 lines terminal-style summary>
-
-REASONING (3 bullets):
-- Claim: ... | Evidence: From input | Why: ...
-- Claim: ... | Evidence: From input | Why: ...
-- Claim: ... | Evidence: From input | Why: ...
-
-═══════════════════════════════════════════════════════════════
-
-📈 BULLISH RECOMMENDATIONS (1-7 DAYS):
-- Asset 1 | Ticker: <SPY/QQQ/etc> | Why: <reason from input>
-- Asset 2 | Ticker: <sector/ticker> | Why: <reason from input>
-- Asset 3 | Ticker: <sector/ticker> | Why: <reason from input>
-
-═══════════════════════════════════════════════════════════════
-
-📉 BEARISH / SHORT CANDIDATES (1-7 DAYS):
-- Asset 1 | Ticker: <sector/ticker> | Why: <risk from input>
-- Asset 2 | Ticker: <sector/ticker> | Why: <risk from input>
-- Asset 3 | Ticker: <sector/ticker> | Why: <risk from input>
-
-═══════════════════════════════════════════════════════════════
-
-INPUT DATA:
-{custom_input}
-""".strip()
-    
-    with st.spinner("⚡ ANALYZER BY OZYTARGET.COM..."):
-        try:
-            custom_result = gemini_generate_text(custom_prompt, debug=True)
-            st.session_state["custom_ai_result"] = custom_result
-        except Exception as e:
-            st.session_state["custom_ai_result"] = f"CAPTION:\nAI ERROR\n\nREASONING:\n- Claim: Exception | Evidence: — | Why: {type(e).__name__}: {str(e)[:180]}"
+custom_job = poll_session_ai_job("custom")
+if custom_job and custom_job["status"] in AI_JOB_ACTIVE:
+    render_ai_job_progress("custom", custom_job)
+elif custom_job:
+    st.session_state["custom_ai_result"] = ai_job_text(custom_job)
 
 if st.session_state.get("custom_ai_result"):
     st.markdown("---")
@@ -1656,44 +4617,55 @@ if st.session_state.get("custom_ai_result"):
 
 
 # =========================
-# AUTO FETCH + STORE (30s real + cache busting en AUTO)
+# LIVE HEADLINES (read-only: the ingestion worker fetches + stores)
 # =========================
-now_ts = time.time()
-should_fetch = force_refresh or ((now_ts - st.session_state.get("last_fetch_ts", 0.0)) >= AUTO_REFRESH_SECONDS)
+ingest_worker = get_ingest_worker()
+feed_key = ingest_worker.subscribe(
+    keywords=manual_keywords if manual_keywords else DEFAULT_KEYWORDS,
+    min_kw=min_kw_hits,
+    max_noise=max_noise_hits,
+)
 
 scan_status = st.empty()  # status estable (sin flicker de spinner)
 
-if should_fetch:
+snap = ingest_worker.snapshot(feed_key)
+if force_refresh:
+    # Manual refresh: wake the worker and wait (bounded) for its next snapshot
     scan_status.caption("Scanning sources… (UI stable)")
-    try:
-        # ✅ CLAVE: auto-refresh TAMBIÉN debe bustear cache.
-        # Usamos bucket por ventana de AUTO_REFRESH_SECONDS para no spamear.
-        # - Manual: buster cambia cada click (int(now_ts))
-        # - Auto: buster cambia cada 30s (bucket)
-        bucket = int(now_ts // AUTO_REFRESH_SECONDS)
-        buster = int(now_ts) if force_refresh else bucket
-
-        fresh = fetch_all_sources_cached(
-            keywords=manual_keywords if manual_keywords else DEFAULT_KEYWORDS,
-            min_kw=min_kw_hits,
-            max_noise=max_noise_hits,
-            cache_buster=buster,
-        )
+    ingest_worker.request_refresh()
+    ingest_worker.wait_for_update(feed_key, after_version=snap["version"] if snap else 0, timeout=20)
+    snap = ingest_worker.snapshot(feed_key)
+
+if snap is None and ingest_worker.last_error:
+    scan_status.warning(ingest_worker.last_error)
+elif snap is None:
+    scan_status.caption("Scanning sources… (first fetch in progress)")
+else:
+    st.session_state["latest_news"] = snap["items"]
+    if snap["error"]:
+        scan_status.warning(snap["error"])
+    else:
+        scan_status.markdown(f"**✅ Updated:** {len(snap['items'])} headlines ({time_ago(snap['ts'])} ago)")
 
-        st.session_state["latest_news"] = fresh
-        st.session_state["last_fetch_ts"] = now_ts
+pull_new_alerts(max_toasts=6)
 
-        try:
-            db_upsert_many(fresh)
-            alert_on_new_items(fresh, max_alerts_per_run=6)
-        except Exception as e:
-            scan_status.warning(f"DB write error: {type(e).__name__}: {str(e)[:160]}")
+if ingest_worker.last_retention:
+    r = ingest_worker.last_retention
+    pruned = ", ".join(f"{t}={n}" for t, n in r["tables"].items())
+    st.caption(f"🧹 Retention {time_ago(r['ts'])} ago: {pruned} ({r['seconds']}s)")
 
-        scan_status.markdown(f"**✅ Updated:** {len(fresh)} headlines")
-    except Exception as e:
-        scan_status.error(f"Scan error: {type(e).__name__}: {str(e)[:180]}")
-else:
-    scan_status.caption("Idle (showing last headlines)")
+with st.expander("📡 Sources", expanded=False):
+    for src in get_source_registry().values():
+        stt = src.stats
+        line = (
+            f"**{src.name}** · {src.breaker.state} · {stt['last_items']} items in {stt['last_latency']}s"
+            f" · fetches={stt['fetches']} failures={stt['failures']} skipped={stt['skipped']}"
+        )
+        if stt["last_error"]:
+            line += f" · last error: {stt['last_error']}"
+        st.markdown(line)
+    sst = get_story_index().stats()
+    st.caption(f"Story clusters: {sst['clusters']} ({sst['multi_source']} reported by several outlets) · {sst['members']} headlines indexed")
 
 
 # =========================
@@ -1701,30 +4673,31 @@ else:
 # =========================
 if run_ai_now:
     latest_now = st.session_state.get("latest_news") or []
-    with st.spinner("📊 Analyzing headlines..."):
-        try:
-            txt = run_manual_ai_analysis(latest_now, debug=True)  # Always debug for manual button
-            st.session_state["ai_manual_result"] = txt
-            st.session_state["ai_manual_ts"] = time.time()
-        except Exception as e:
-            st.session_state["ai_manual_result"] = f"CAPTION:\nAI ERROR\n\nREASONING:\n- Claim: Exception | Evidence: — | Why: {type(e).__name__}: {str(e)[:180]}"
-            st.session_state["ai_manual_ts"] = time.time()
+    if not latest_now:
+        st.session_state["ai_manual_result"] = run_manual_ai_analysis(latest_now)  # canned "no data" answer
+        st.session_state["ai_manual_ts"] = time.time()
+    elif submit_session_ai_job("manual", build_manual_ai_prompt_from_latest(latest_now)) is None:
+        st.session_state["ai_manual_result"] = AI_QUEUE_FULL_TEXT
+        st.session_state["ai_manual_ts"] = time.time()
+
+manual_job = poll_session_ai_job("manual")
+if manual_job and manual_job["status"] not in AI_JOB_ACTIVE:
+    st.session_state["ai_manual_result"] = ai_job_text(manual_job)
+    st.session_state["ai_manual_ts"] = manual_job["finished_ts"] or time.time()
+    st.session_state["ai_manual_trace"] = (manual_job["result"] or {}).get("trace")
 
 
 # =========================
-# AI DIGEST (Hourly) — run AFTER fetch + DB upsert
+# AI DIGEST (Hourly) — reads what the worker already stored
 # =========================
 # Gate: only try AI if we have enough fresh headlines saved (prevents "reasoning on nothing")
 min_items_for_ai = 8
 
-# Picked model (for AI operations, not displayed)
-picked_model = gemini_pick_model()
-
 ai_digest = None
 try:
     # Ensure we reason on the newest state:
-    # - latest_news updated this run (if should_fetch)
-    # - db_upsert_many already executed right above when should_fetch is True
+    # - latest_news = newest worker snapshot
+    # - the worker stores items in the DB before publishing the snapshot
     latest_now = st.session_state.get("latest_news") or []
     if len(latest_now) >= min_items_for_ai:
         ai_digest = maybe_generate_ai_digest()
@@ -1765,6 +4738,8 @@ except Exception as e:
 # =========================
 # RENDER
 # =========================
+pre_render_seconds = record_rerun_overhead("pre_render")
+
 with feed_box:
     col_title, col_controls = st.columns([4, 1])
     with col_title:
@@ -1774,59 +4749,39 @@ with feed_box:
     
     # Show alerts panel first
     render_alerts_panel()
+    render_search_panel()
 
     news = st.session_state.get("latest_news") or []
     if not news:
         st.info("📰 Loading news... (first fetch usually takes a few seconds)")
     else:
-        for a in news[:80]:
-            score = int(a.get('_score', 0))
-            
-            # Check if article contains user's keywords (from keyword input)
-            title = (a.get('title', '')).lower()
-            summary = (a.get('summary', '')).lower()
-            blob = f"{title} {summary}"
-            user_kw_hits = count_hits(blob, st.session_state.get("auto_keywords", []))
-            
-            # Apply color based on score bands (BREAKING > HIGH > MED > WATCH > NEUTRAL > LOW)
-            bg_style = score_to_bg_style(score, user_kw_hits=user_kw_hits)
-            st.markdown(
-                f"""
-<div class="card" style="{bg_style}">
-  <div class="meta">
-    <span class="source">{a.get('source','')}</span>
-    <span>{time_ago(a.get('_ts', 0.0))} ago</span>
-    <span class="badge">score={score}</span>
-    <span class="badge">kw={a.get('_kw_hits', 0)}</span>
-    <span class="badge">noise={a.get('_noise_hits', 0)}</span>
-    <span class="badge">{a.get('_domain','')}</span>
-    <span style="margin-left:10px;">| {a.get('time','')}</span>
-  </div>
-  <div class="title">
-    <a href="{a.get('link','')}" target="_blank" style="color:#e6edf3; text-decoration:none;">
-      {a.get('title','')}
-    </a>
-    <span class="badge" style="margin-left:8px;">{a.get('_reasons','')}</span>
-  </div>
-</div>
-""",
-                unsafe_allow_html=True,
-            )
+        render_tape(news)
 
 # =========================
 # AI OUTPUT (MANUAL) — at the very end of the news list
 # =========================
 ai_txt = st.session_state.get("ai_manual_result")
-if ai_txt:
+if manual_job and manual_job["status"] in AI_JOB_ACTIVE:
+    st.markdown("---")
+    st.markdown("## 🤖 pro-analizer")
+    render_ai_job_progress("manual", manual_job)
+elif ai_txt:
     st.markdown("---")
     st.markdown("## 🤖 pro-analizer")
     st.caption(f"Generated: {time_ago(st.session_state.get('ai_manual_ts', 0.0))} ago")
+    if st.session_state.get("ai_manual_trace"):
+        with st.expander("🧪 Full Gemini Response (debug)", expanded=False):
+            st.json(st.session_state["ai_manual_trace"])
     st.markdown(f"""
     <div style="max-height: 800px; overflow-y: auto; border: 1px solid #1f6feb; padding: 12px; border-radius: 6px; background: rgba(20, 20, 30, 0.92);">
     <pre style="white-space: pre-wrap; word-wrap: break-word; color: #e6edf3; font-family: 'Courier New', monospace; font-size: 12px; margin: 0;">{ai_txt}</pre>
     </div>
     """, unsafe_allow_html=True)
 
+# Pending AI jobs: rerun every few seconds until they land (the 30s autorefresh is too slow)
+if st.session_state.get("ai_jobs"):
+    st_autorefresh(interval=AI_JOB_POLL_SECONDS * 1000, key="ai_job_poll")
+
 # =========================
 # FOOTER
 # =========================
@@ -1840,4 +4795,10 @@ st.markdown(
     </div>
     """,
     unsafe_allow_html=True
-)
\ No newline at end of file
+)
+
+rerun_seconds = record_rerun_overhead("total")
+st.caption(
+    f"⏱ Cold start {startup['seconds']:.2f}s ({time_ago(startup['ts'])} ago) | "
+    f"rerun {rerun_seconds * 1000:.0f} ms (before render {pre_render_seconds * 1000:.0f} ms)"
+)
@@ -0,0 +1,364 @@
+"""
+Headline pipeline + DB benchmark.
+
+Generates synthetic headline corpora (realistic keyword / domain / duplicate mix),
+times each stage per ingest-sized batch and writes JSON results for cross-commit comparison.
+
+  python bench_pipeline.py                                  # 100 .. 1M items, SQLite
+  python bench_pipeline.py --sizes 1000,10000 --pg-dsn postgresql://localhost/news_bench
+  python bench_pipeline.py --compare bench_results/<older>.json
+
+Stages: normalize_url, make_item_hash, dedupe, filter_institutional, score_bloomberg,
+pipeline (dedupe → hash → parse time → filter → score, i.e. fetch_all_sources without network),
+db_upsert_many, db_get_news_since, db_search_news (first page + one keyset page).
+
+Use a throwaway Postgres database: rows are tagged source='BENCH' and deleted at the end.
+"""
+
+import argparse
+import ast
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from email.utils import formatdate
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BENCH_SOURCE = "BENCH"
+
+
+# =========================
+# LOAD NEWS.py AS A LIBRARY
+# (definitions only: the Streamlit page body is skipped)
+# =========================
+def _calls_streamlit(node: ast.AST) -> bool:
+    # e.g. feed_box = st.container()
+    for sub in ast.walk(node):
+        if isinstance(sub, ast.Call) and isinstance(sub.func, ast.Attribute):
+            owner = sub.func.value
+            if isinstance(owner, ast.Name) and owner.id == "st":
+                return True
+    return False
+
+
+def load_news_module(path: str = os.path.join(HERE, "NEWS.py")) -> dict:
+    """
+    Executes imports, constants, functions and classes of NEWS.py, stopping at the
+    first top-level statement of the page body (startup = app_startup()).
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    body = []
+    for node in tree.body:
+        call = getattr(node, "value", None)
+        if isinstance(call, ast.Call) and isinstance(call.func, ast.Name) and call.func.id == "app_startup":
+            break
+        if isinstance(node, ast.Expr):
+            continue
+        if isinstance(node, (ast.Assign, ast.AnnAssign)) and _calls_streamlit(node):
+            continue
+        body.append(node)
+
+    ns = {"__name__": "news_bench", "__file__": path}
+    exec(compile(ast.Module(body=body, type_ignores=[]), path, "exec"), ns)
+    return ns
+
+
+# =========================
+# SYNTHETIC CORPUS
+# =========================
+OTHER_DOMAINS = ["yahoo.com", "investing.com", "benzinga.com", "forbes.com", "fxstreet.com", "kitco.com", "axios.com"]
+FILLER = ["markets", "stocks", "traders", "investors", "week", "session", "outlook", "data", "report", "update"]
+
+
+def _zipf_choice(rnd: random.Random, seq: list, s: float = 1.1):
+    # Rank-weighted choice: few keywords dominate, long tail (like real headlines)
+    weights = [1.0 / ((i + 1) ** s) for i in range(len(seq))]
+    return rnd.choices(seq, weights=weights, k=1)[0]
+
+
+class CorpusGenerator:
+    """
+    Deterministic headline stream. Mix (approx.): 50% whitelisted domains, 15% blacklisted,
+    35% other; ~8% noise words, ~5% clickbait, ~5% blocked topics, ~10% wire phrases,
+    ~15% duplicates (same story, tracking params / http / www variants), 10% older than the window.
+    """
+
+    def __init__(self, ns: dict, seed: int):
+        self.ns = ns
+        self.seed = seed
+        self.inst = list(ns["INSTITUTIONAL_KEYWORDS"])
+        self.noise = list(ns["NOISE_KEYWORDS"])
+        self.clickbait = list(ns["CLICKBAIT_PHRASES"])
+        self.blocked = list(ns["NEGATIVE_KEYWORDS"])
+        self.wire = list(ns["WIRE_PHRASES"])
+        self.modal = list(ns["MODAL_WEAK_WORDS"])
+        self.white = list(ns["SOURCE_WHITELIST"])
+        self.black = list(ns["SOURCE_BLACKLIST"])
+        self.max_age_hours = float(ns["MAX_ARTICLE_AGE_HOURS"])
+
+    def item(self, i: int, now: float) -> dict:
+        rnd = random.Random(f"{self.seed}:{i}")
+        if i > 0 and rnd.random() < 0.15:
+            # duplicate of a recent story, different URL decoration
+            base = self.item(rnd.randint(max(0, i - 50), i - 1), now)
+            base["link"] = base["link"].replace("https://www.", rnd.choice(["http://", "https://"])) + rnd.choice(["?utm_source=rss", "?utm_medium=feed&utm_campaign=x", "/"])
+            return base
+
+        r = rnd.random()
+        domain = rnd.choice(self.white) if r < 0.5 else (rnd.choice(self.black) if r < 0.65 else rnd.choice(OTHER_DOMAINS))
+
+        words = [_zipf_choice(rnd, self.inst) for _ in range(rnd.randint(0, 3))]
+        words += rnd.sample(FILLER, 3)
+        if rnd.random() < 0.08:
+            words.append(rnd.choice(self.noise))
+        if rnd.random() < 0.05:
+            words.append(rnd.choice(self.clickbait))
+        if rnd.random() < 0.05:
+            words.append(rnd.choice(self.blocked))
+        if rnd.random() < 0.15:
+            words.append(rnd.choice(self.modal))
+        rnd.shuffle(words)
+        title = " ".join(words).capitalize() + f" #{i}"
+
+        summary = f"{title}. " + (rnd.choice(self.wire) + ". " if rnd.random() < 0.10 else "") + " ".join(rnd.choices(FILLER, k=12))
+        age_h = rnd.uniform(self.max_age_hours, self.max_age_hours * 1.5) if rnd.random() < 0.10 else rnd.uniform(0, self.max_age_hours)
+
+        return {
+            "source": BENCH_SOURCE,
+            "title": title,
+            "link": f"https://www.{domain}/news/{self.seed}-{i}",
+            "time": formatdate(now - age_h * 3600, usegmt=True),
+            "summary": summary,
+        }
+
+    def batches(self, size: int, batch_size: int):
+        now = time.time()
+        for start in range(0, size, batch_size):
+            yield [self.item(i, now) for i in range(start, min(size, start + batch_size))]
+
+
+# =========================
+# TIMING
+# =========================
+def _percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    s = sorted(values)
+    k = min(len(s) - 1, max(0, int(round(q * (len(s) - 1)))))
+    return s[k]
+
+
+def summarize(stage: str, backend: str, size: int, n_items: int, latencies: list[float]) -> dict:
+    total = sum(latencies)
+    return {
+        "stage": stage,
+        "backend": backend,
+        "size": size,
+        "items": n_items,
+        "batches": len(latencies),
+        "seconds": round(total, 6),
+        "items_per_sec": round(n_items / total, 1) if total > 0 else 0.0,
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+    }
+
+
+class StageTimer:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = {}
+        self.items: dict[str, int] = {}
+
+    def run(self, stage: str, n_items: int, fn, *args):
+        t0 = time.perf_counter()
+        out = fn(*args)
+        self.latencies.setdefault(stage, []).append(time.perf_counter() - t0)
+        self.items[stage] = self.items.get(stage, 0) + n_items
+        return out
+
+
+def bench_cpu_stages(ns: dict, gen: CorpusGenerator, size: int, batch_size: int, min_kw: int, max_noise: int, timer: StageTimer, on_scored=None):
+    normalize = ns["_normalize_url"]
+    make_hash = ns["make_item_hash"]
+    dedupe = ns["dedupe"]
+    filt = ns["filter_institutional"]
+    score = ns["score_bloomberg"]
+    ensure_ts = ns["_ensure_ts"]
+    fetch_all_sources = ns["fetch_all_sources"]
+
+    for batch in gen.batches(size, batch_size):
+        n = len(batch)
+        links = [a["link"] for a in batch]
+        timer.run("normalize_url", n, lambda: [normalize(u) for u in links])
+        timer.run("make_item_hash", n, lambda: [make_hash(a["title"], a["link"]) for a in batch])
+
+        unique = timer.run("dedupe", n, dedupe, [dict(a) for a in batch])
+        for a in unique:
+            ensure_ts(a)
+        kept = timer.run("filter_institutional", len(unique), filt, unique, min_kw, max_noise)
+        scored = timer.run("score_bloomberg", len(kept), lambda: [score(a) for a in kept])
+
+        # whole pipeline as the ingest worker runs it (sources replaced by this batch)
+        copies = [dict(a) for a in batch]
+        ns["fetch_from_sources"] = lambda keywords, _items=copies: _items
+        timer.run("pipeline", n, fetch_all_sources, [], min_kw, max_noise)
+
+        if on_scored is not None:
+            on_scored(scored)
+
+
+# =========================
+# DB BACKENDS
+# =========================
+def open_backend(ns: dict, backend: str, pg_dsn: str, sqlite_path: str):
+    if backend == "postgres":
+        pool = ns["PostgresPool"](pg_dsn, 1, 4)
+    else:
+        pool = ns["SqlitePool"](sqlite_path)
+    ns["get_db_pool"] = lambda: pool
+    ns["db_migrate"]()
+    return pool
+
+
+def cleanup_backend(ns: dict):
+    with ns["db_conn"](write=True) as (kind, conn):
+        cur = conn.cursor()
+        p = "%s" if kind == "postgres" else "?"
+        cur.execute(f"DELETE FROM news_items WHERE source = {p};", (BENCH_SOURCE,))
+        conn.commit()
+
+
+def bench_db(ns: dict, backend: str, size: int, args, rows_per_batch: list[list[dict]]) -> list[dict]:
+    timer = StageTimer()
+    for rows in rows_per_batch:
+        timer.run("db_upsert_many", len(rows), ns["db_upsert_many"], rows)
+
+    got = 0
+    for _ in range(args.query_repeats):
+        out = timer.run("db_get_news_since", 0, ns["db_get_news_since"], 24, args.query_limit)
+        got += len(out)
+    timer.items["db_get_news_since"] = got
+
+    # ranked full-text search: common + rare corpus keywords, first page then the next keyset page
+    terms = ns["INSTITUTIONAL_KEYWORDS"][:5] + ns["INSTITUTIONAL_KEYWORDS"][-5:]
+    got = 0
+    for i in range(args.query_repeats):
+        out, cursor = timer.run("db_search_news", 0, ns["db_search_news"], terms[i % len(terms)])
+        got += len(out)
+        if cursor is not None:
+            out, _ = timer.run("db_search_news", 0, ns["db_search_news"], terms[i % len(terms)], ns["SEARCH_PAGE_SIZE"], cursor)
+            got += len(out)
+    timer.items["db_search_news"] = got
+
+    return [summarize(stage, backend, size, timer.items[stage], lat) for stage, lat in timer.latencies.items()]
+
+
+# =========================
+# MAIN
+# =========================
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return ""
+
+
+def compare(current: dict, baseline_path: str):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    base = {(r["backend"], r["size"], r["stage"]): r for r in baseline.get("results", [])}
+
+    print(f"\nvs {baseline_path} ({baseline.get('meta', {}).get('commit', '?')})")
+    print(f"{'backend':9} {'size':>8} {'stage':22} {'items/s':>12} {'Δ':>8} {'p99 ms':>10} {'Δ':>8}")
+    for r in current["results"]:
+        b = base.get((r["backend"], r["size"], r["stage"]))
+        if not b:
+            continue
+        d_ips = (r["items_per_sec"] / b["items_per_sec"] - 1) * 100 if b["items_per_sec"] else 0.0
+        d_p99 = (r["p99_ms"] / b["p99_ms"] - 1) * 100 if b["p99_ms"] else 0.0
+        print(f"{r['backend']:9} {r['size']:>8} {r['stage']:22} {r['items_per_sec']:>12} {d_ips:>+7.1f}% {r['p99_ms']:>10} {d_p99:>+7.1f}%")
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Benchmark the NEWS.py headline pipeline and DB layer")
+    p.add_argument("--sizes", default="100,1000,10000,100000,1000000")
+    p.add_argument("--batch-size", type=int, default=500, help="items per ingest cycle (latency percentiles are per batch)")
+    p.add_argument("--min-kw", type=int, default=1)
+    p.add_argument("--max-noise", type=int, default=0)
+    p.add_argument("--backends", default="sqlite,postgres", help="postgres runs only with --pg-dsn / BENCH_DATABASE_URL")
+    p.add_argument("--pg-dsn", default=os.getenv("BENCH_DATABASE_URL", ""))
+    p.add_argument("--no-db", action="store_true", help="CPU stages only")
+    p.add_argument("--query-repeats", type=int, default=50)
+    p.add_argument("--query-limit", type=int, default=500)
+    p.add_argument("--seed", type=int, default=7)
+    p.add_argument("--out", default="", help="results file (default bench_results/<ts>-<commit>.json)")
+    p.add_argument("--compare", default="", help="earlier results file to diff against")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    ns = load_news_module()
+    gen = CorpusGenerator(ns, args.seed)
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+
+    backends = [] if args.no_db else [b.strip() for b in args.backends.split(",") if b.strip()]
+    if "postgres" in backends and not args.pg_dsn:
+        backends.remove("postgres")
+
+    results: list[dict] = []
+    tmpdir = tempfile.mkdtemp(prefix="news-bench-")
+    for size in sizes:
+        batch_size = max(1, min(args.batch_size, size))
+
+        # DB stages reuse the scored rows of the CPU run (no regeneration in the timed path)
+        scored_batches: list[list[dict]] = []
+        timer = StageTimer()
+        bench_cpu_stages(ns, gen, size, batch_size, args.min_kw, args.max_noise, timer, on_scored=scored_batches.append if backends else None)
+        for stage, lat in timer.latencies.items():
+            results.append(summarize(stage, "cpu", size, timer.items[stage], lat))
+
+        for backend in backends:
+            sqlite_path = os.path.join(tmpdir, f"bench-{size}.db")
+            try:
+                open_backend(ns, backend, args.pg_dsn, sqlite_path)
+                results.extend(bench_db(ns, backend, size, args, scored_batches))
+                cleanup_backend(ns)
+            except Exception as e:
+                print(f"[{backend}] size={size} skipped: {type(e).__name__}: {e}", file=sys.stderr)
+
+        for r in results:
+            if r["size"] == size:
+                print(f"{r['backend']:9} {size:>8} {r['stage']:22} {r['items_per_sec']:>12} items/s  p50={r['p50_ms']}ms  p99={r['p99_ms']}ms")
+
+    commit = git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "ts": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args) | {"pg_dsn": bool(args.pg_dsn)},
+        },
+        "results": results,
+    }
+
+    out = args.out or os.path.join(HERE, "bench_results", f"{time.strftime('%Y%m%d-%H%M%S')}-{commit or 'nogit'}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults: {out}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Offline feed replay server (stand-in for news.google.com / bing.com RSS).
+
+Serves RSS recorded by NEWS.py (FEED_RECORD_DIR) or synthetic feeds of any size,
+with injectable latency, jitter and errors. Stdlib only.
+
+  python feed_replay.py --dir recordings --port 8765
+  python feed_replay.py --synthetic-items 500 --new-per-request 10 --latency-ms 80 --jitter-ms 40 --error-rate 0.05
+
+Then point the app at it:
+  GOOGLE_NEWS_RSS="http://127.0.0.1:8765/rss/search?q={q}&hl=en-US&gl=US&ceid=US:en"
+  BING_NEWS_RSS="http://127.0.0.1:8765/news/search?q={q}&format=rss"
+  NEWS_SOURCES=google,bing
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape
+
+
+# =========================
+# RECORDINGS
+# =========================
+def recording_key(url: str) -> str:
+    """Recordings are keyed by path + query (host differs between live and replay)."""
+    u = urlparse(url)
+    return f"{u.path}?{u.query}" if u.query else u.path
+
+
+def load_recordings(directory: str) -> dict[str, list[bytes]]:
+    """
+    {key: [body, ...]} in recording order. Each recording is <name>.xml + <name>.json
+    ({"url", "ts", ...}) as written by NEWS.py record_feed_response().
+    """
+    out: dict[str, list[tuple[float, bytes]]] = {}
+    if not directory or not os.path.isdir(directory):
+        return {}
+
+    for name in os.listdir(directory):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(directory, name), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(os.path.join(directory, name[:-5] + ".xml"), "rb") as f:
+                body = f.read()
+        except Exception:
+            continue
+        out.setdefault(recording_key(meta.get("url", "")), []).append((float(meta.get("ts") or 0.0), body))
+
+    return {k: [body for _, body in sorted(v, key=lambda x: x[0])] for k, v in out.items()}
+
+
+# =========================
+# SYNTHETIC FEEDS
+# =========================
+SYNTH_DOMAINS = [
+    "reuters.com", "bloomberg.com", "wsj.com", "ft.com", "cnbc.com", "apnews.com",
+    "marketwatch.com", "barrons.com", "federalreserve.gov", "bls.gov",
+    "yahoo.com", "benzinga.com", "investing.com", "fool.com", "seekingalpha.com",
+]
+SYNTH_TEMPLATES = [
+    "{kw} rises as Treasury yields climb after FOMC minutes",
+    "{kw}: Fed officials signal patience on rate cuts",
+    "Stocks slip as {kw} weighs on S&P 500",
+    "BREAKING: {kw} moves after CPI surprise",
+    "{kw} options activity spikes ahead of earnings",
+    "Oil and {kw} in focus as OPEC meets",
+    "Analysts say {kw} could surge 300% — you won't believe why",
+    "{kw} liquidity concerns grow in funding markets",
+    "Dollar steadies; {kw} traders eye payrolls",
+    "Exclusive: {kw} talks stall, sources say",
+]
+
+
+def query_terms(q: str) -> list[str]:
+    """'(a OR b) when:1d -x' -> ['a', 'b']."""
+    inner = q.split(")", 1)[0].lstrip("(") if q.startswith("(") else q.split(" when:", 1)[0]
+    terms = [t.strip() for t in inner.split(" OR ") if t.strip()]
+    return terms or ["markets"]
+
+
+def synthetic_feed(key: str, n_items: int, generation: int, new_per_request: int, seed: int, base_ts: float) -> bytes:
+    """
+    Deterministic RSS for (key, generation): the window slides by new_per_request items
+    per generation, so repeated requests look like a live feed with fresh stories
+    (new_per_request=0 => byte-identical bodies, exercises ETag / body-hash reuse).
+    """
+    qs = parse_qs(urlparse(key).query)
+    terms = query_terms((qs.get("q") or [""])[0])
+    start = generation * max(0, new_per_request)
+    now = base_ts + start * 60
+
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<rss version="2.0"><channel>',
+        f"<title>replay: {escape(' OR '.join(terms))}</title>",
+        f"<lastBuildDate>{formatdate(now, usegmt=True)}</lastBuildDate>",
+    ]
+    for i in range(start + n_items - 1, start - 1, -1):
+        rnd = random.Random(f"{seed}:{key}:{i}")
+        kw = rnd.choice(terms)
+        domain = rnd.choice(SYNTH_DOMAINS)
+        title = rnd.choice(SYNTH_TEMPLATES).format(kw=kw)
+        link = f"https://www.{domain}/markets/{hashlib.sha1(f'{key}:{i}'.encode()).hexdigest()[:16]}"
+        published = formatdate(now - (start + n_items - 1 - i) * 60, usegmt=True)
+        parts.append(
+            "<item>"
+            f"<title>{escape(title)} - {escape(domain)}</title>"
+            f"<link>{escape(link)}</link>"
+            f"<guid>{escape(link)}</guid>"
+            f"<pubDate>{published}</pubDate>"
+            f"<description>{escape(title)}. Synthetic item {i} for {escape(kw)}.</description>"
+            "</item>"
+        )
+    parts.append("</channel></rss>")
+    return "".join(parts).encode("utf-8")
+
+
+# =========================
+# SERVER
+# =========================
+class ReplayState:
+    def __init__(self, args):
+        self.args = args
+        self.recordings = load_recordings(args.dir)
+        self.rng = random.Random(args.seed)
+        self.started_ts = time.time()
+        self._lock = threading.Lock()
+        self._hits: dict[str, int] = {}
+        self.stats = {"requests": 0, "recorded": 0, "synthetic": 0, "not_modified": 0, "errors": 0, "stalls": 0, "missing": 0}
+
+    def next_generation(self, key: str) -> int:
+        with self._lock:
+            n = self._hits.get(key, 0)
+            self._hits[key] = n + 1
+            self.stats["requests"] += 1
+            return n
+
+    def count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def delay(self) -> float:
+        a = self.args
+        with self._lock:
+            jitter = self.rng.uniform(-a.jitter_ms, a.jitter_ms) if a.jitter_ms else 0.0
+            return max(0.0, (a.latency_ms + jitter) / 1000.0)
+
+    def roll(self, rate: float) -> bool:
+        if rate <= 0:
+            return False
+        with self._lock:
+            return self.rng.random() < rate
+
+
+def make_handler(state: ReplayState):
+    class ReplayHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, fmt, *args):
+            if state.args.verbose:
+                super().log_message(fmt, *args)
+
+        def _send(self, code: int, body: bytes = b"", headers: dict | None = None):
+            self.send_response(code)
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if body:
+                self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/healthz":
+                return self._send(200, b"ok", {"Content-Type": "text/plain"})
+            if self.path == "/_stats":
+                return self._send(200, json.dumps(state.stats).encode(), {"Content-Type": "application/json"})
+
+            key = recording_key(self.path)
+            generation = state.next_generation(key)
+            time.sleep(state.delay())
+
+            if state.roll(state.args.stall_rate):
+                state.count("stalls")
+                time.sleep(state.args.stall_seconds)
+            if state.roll(state.args.error_rate):
+                state.count("errors")
+                code = state.rng.choice(state.args.error_codes)
+                return self._send(code, f"injected {code}".encode(), {"Content-Type": "text/plain"})
+
+            bodies = state.recordings.get(key)
+            if bodies:
+                state.count("recorded")
+                body = bodies[generation % len(bodies)]
+            elif state.args.synthetic_items > 0:
+                state.count("synthetic")
+                body = synthetic_feed(key, state.args.synthetic_items, generation, state.args.new_per_request, state.args.seed, state.started_ts)
+            else:
+                state.count("missing")
+                return self._send(404, b"no recording", {"Content-Type": "text/plain"})
+
+            etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+            if self.headers.get("If-None-Match") == etag:
+                state.count("not_modified")
+                return self._send(304, b"", {"ETag": etag})
+            self._send(200, body, {"Content-Type": "application/rss+xml; charset=utf-8", "ETag": etag})
+
+    return ReplayHandler
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Offline RSS replay server for NEWS.py")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--dir", default="", help="recordings directory (FEED_RECORD_DIR output)")
+    p.add_argument("--synthetic-items", type=int, default=100, help="items per synthetic feed (0 = 404 when no recording)")
+    p.add_argument("--new-per-request", type=int, default=5, help="fresh synthetic items per repeated request")
+    p.add_argument("--latency-ms", type=float, default=0.0)
+    p.add_argument("--jitter-ms", type=float, default=0.0)
+    p.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with an error code")
+    p.add_argument("--error-codes", type=lambda s: [int(x) for x in s.split(",")], default=[500, 503, 429])
+    p.add_argument("--stall-rate", type=float, default=0.0, help="fraction of requests held for --stall-seconds")
+    p.add_argument("--stall-seconds", type=float, default=30.0)
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--verbose", action="store_true")
+    return p.parse_args(argv)
+
+
+def serve(args) -> ThreadingHTTPServer:
+    state = ReplayState(args)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(state))
+    server.daemon_threads = True
+    server.replay_state = state
+    return server
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    server = serve(args)
+    n_rec = sum(len(v) for v in server.replay_state.recordings.values())
+    print(f"Replay server on http://{args.host}:{server.server_port} ({n_rec} recorded responses, synthetic={args.synthetic_items})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def news(tmp_path, monkeypatch):
+    """NEWS.py definitions (see bench_pipeline.load_news_module) over a fresh SQLite file and fresh process resources."""
+    from bench_pipeline import load_news_module
+
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "news.db"))
+    monkeypatch.setenv("DATABASE_URL", "")
+    sys.modules.pop("_ozytarget_process", None)
+    ns = load_news_module()
+    ns["ensure_schema"]()
+    yield ns
+    sys.modules.pop("_ozytarget_process", None)
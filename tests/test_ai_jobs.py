@@ -0,0 +1,38 @@
+import time
+
+
+def _wait(jobs, job_id: str) -> dict:
+    deadline = time.time() + 5
+    while True:
+        job = jobs.get(job_id)
+        if job["status"] not in ("queued", "running") or time.time() > deadline:
+            return job
+        time.sleep(0.01)
+
+
+def test_identical_prompts_share_a_finished_job(news):
+    jobs = news["AiJobQueue"](1, 4, 8)
+    calls = []
+    first = jobs.submit("manual", "p", lambda: calls.append(1) or "ok")
+    _wait(jobs, first)
+
+    assert jobs.submit("manual", "p", lambda: calls.append(1) or "ok") == first
+    assert len(calls) == 1
+
+
+def test_due_digest_with_an_unchanged_prompt_is_generated_again(news):
+    calls = []
+    news["gemini_generate_json"] = lambda prompt: calls.append(prompt) or {"caption": f"digest {len(calls)}"}
+    news["AI_DIGEST_EVERY_SECONDS"] = 0  # every call is due
+    memo = news["get_digest_memo"]()
+    jobs = news["get_ai_jobs"]()
+
+    news["maybe_generate_ai_digest"]()
+    first = _wait(jobs, memo["job"])
+    ts = memo["ts"]
+    news["maybe_generate_ai_digest"]()
+    second = _wait(jobs, memo["job"])
+
+    assert second["id"] != first["id"] and second["status"] == "done"
+    assert len(calls) == 2 and calls[0] == calls[1]
+    assert memo["content"] == {"caption": "digest 2"} and memo["ts"] > ts
@@ -0,0 +1,60 @@
+import threading
+import time
+
+import pytest
+
+
+def _counter(news, result: str) -> float:
+    return news["get_metrics"]()._counters.get(("ozy_feed_requests_total", (("result", result),)), 0.0)
+
+
+def test_full_keyword_union_fetches_every_shard(news):
+    keywords = [f"kw{i}" for i in range(news["INGEST_MAX_UNION_KEYWORDS"])]
+    urls = news["plan_google_queries"](keywords)
+    assert len(urls) <= news["GOOGLE_SHARD_WORKERS"]
+
+    running = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def fetch_feed(url, extract, timeout):
+        with lock:
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+        time.sleep(0.2)
+        with lock:
+            running["now"] -= 1
+        return [{"title": url}]
+
+    news["fetch_feed"] = fetch_feed
+    items = news["fetch_feeds"](urls, None, timeout=1, pool="google")
+    assert [a["title"] for a in items] == urls
+    assert running["peak"] == len(urls)
+    assert _counter(news, "cancelled") == 0
+
+
+def test_shards_dropped_at_deadline_are_counted(news):
+    news["GOOGLE_SHARD_WORKERS"] = 1
+    release = threading.Event()
+
+    def fetch_feed(url, extract, timeout):
+        if url == "slow":
+            release.wait(10)
+        return [{"title": url}]
+
+    news["fetch_feed"] = fetch_feed
+    try:
+        with pytest.raises(TimeoutError):
+            news["fetch_feeds"](["slow", "queued-1", "queued-2"], None, timeout=0.1, pool="tiny")
+    finally:
+        release.set()
+    assert _counter(news, "timeout") == 1
+    assert _counter(news, "cancelled") == 2
+
+
+def test_google_items_carry_their_query_shard(news):
+    news["GOOGLE_QUERY_MAX_TERMS"] = 2
+    news["fetch_feed"] = lambda url, extract, timeout: [{"title": url}]
+
+    items = news["fetch_google_news"](["Fed", "ECB", "BoJ"])
+
+    assert [a["_query_terms"] for a in items] == [("fed", "ecb"), ("boj",)]
@@ -0,0 +1,24 @@
+import time
+
+from urllib3.response import HTTPResponse
+
+
+def test_retry_after_is_capped(news):
+    news["HTTP_RETRY_AFTER_MAX_SECONDS"] = 0.2
+    retry = news["get_http_session"]().get_adapter("https://news.google.com").max_retries
+    assert isinstance(retry, news["CappedRetry"])
+
+    response = HTTPResponse(status=429, headers={"Retry-After": "3600"})
+    assert retry.get_retry_after(response) == 0.2
+    started = time.time()
+    assert retry.sleep_for_retry(response)
+    assert time.time() - started < 1.0
+
+    # the cap survives the per-attempt copies urllib3 makes
+    assert isinstance(retry.increment(method="GET", url="/", response=response), news["CappedRetry"])
+
+
+def test_retry_after_absent_or_small_is_kept(news):
+    retry = news["get_http_session"]().get_adapter("https://news.google.com").max_retries
+    assert retry.get_retry_after(HTTPResponse(status=503)) is None
+    assert retry.get_retry_after(HTTPResponse(status=503, headers={"Retry-After": "1"})) == 1
@@ -0,0 +1,110 @@
+def _scored(title: str) -> dict:
+    return {"title": title, "link": f"https://www.reuters.com/{abs(hash(title))}", "_ts": 1.0, "_item_hash": str(abs(hash(title)))}
+
+
+def test_failed_cycle_keeps_last_good_snapshot(news):
+    calls = {"n": 0}
+
+    def fetch_all_sources(keywords, min_kw, max_noise, index=None):
+        calls["n"] += 1
+        if calls["n"] > 1:
+            raise ConnectionError("feeds unreachable")
+        return [_scored("Fed holds rates")], []
+
+    news["fetch_all_sources"] = fetch_all_sources
+    worker = news["IngestWorker"](5)
+    key = worker.subscribe(["Fed"], 1, 0)
+
+    worker._ingest(key[1:], ["Fed"])
+    good = dict(worker._snapshots[key[1:]])
+    worker._ingest(key[1:], ["Fed"])
+    failed = worker._snapshots[key[1:]]
+
+    assert failed["items"] == good["items"]
+    assert failed["ts"] == good["ts"]
+    assert failed["keywords_l"] == {"fed"}
+    assert failed["error"].startswith("Scan error: ConnectionError")
+
+
+def test_first_cycle_failure_publishes_empty_snapshot_with_error(news):
+    def fetch_all_sources(keywords, min_kw, max_noise, index=None):
+        raise ConnectionError("feeds unreachable")
+
+    news["fetch_all_sources"] = fetch_all_sources
+    worker = news["IngestWorker"](5)
+    key = worker.subscribe(["Fed"], 1, 0)
+    worker._ingest(key[1:], ["Fed"])
+
+    snap = worker._snapshots[key[1:]]
+    assert snap["items"] == [] and snap["ts"] == 0.0
+    assert "feeds unreachable" in snap["error"]
+
+
+def test_crashed_cycle_is_recorded(news):
+    news["fetch_all_sources"] = lambda keywords, min_kw, max_noise, index=None: ([_scored("Fed holds rates")], [])
+    worker = news["IngestWorker"](5)
+    key = worker.subscribe(["Fed"], 1, 0)
+    worker.run_cycle()
+    assert worker.last_error == ""
+    version = worker.snapshot(key)["version"]
+
+    def crash():
+        raise ValueError("boom")
+
+    worker.run_once = crash
+    worker.run_cycle()  # must not raise
+
+    snap = worker.snapshot(key)
+    assert worker.last_error == "Ingest error: ValueError: boom"
+    assert snap["error"] == worker.last_error and snap["version"] > version
+    assert [a["title"] for a in snap["items"]] == ["Fed holds rates"]
+    counters = news["get_metrics"]()._counters
+    assert counters[("ozy_ingest_failures_total", (("error", "ValueError"),))] == 1
+
+
+def test_tabs_past_the_union_cap_do_not_wake_the_worker(news):
+    news["fetch_all_sources"] = lambda keywords, min_kw, max_noise, index=None: ([], [])
+    worker = news["IngestWorker"](60)
+    first = [f"alpha{i}" for i in range(80)]
+    second = [f"beta{i}" for i in range(80)]
+
+    worker.subscribe(first, 1, 0)
+    worker.subscribe(second, 1, 0)
+    assert worker._wake.is_set()  # no snapshot yet
+    worker._wake.clear()
+    worker.run_once()
+    assert len(worker._snapshots[(1, 0)]["keywords_l"]) == 120
+
+    for _ in range(5):  # reruns of both tabs
+        worker.subscribe(first, 1, 0)
+        worker.subscribe(second, 1, 0)
+    assert not worker._wake.is_set()
+
+
+def test_new_keywords_that_fit_under_the_cap_wake_the_worker(news):
+    news["fetch_all_sources"] = lambda keywords, min_kw, max_noise, index=None: ([], [])
+    worker = news["IngestWorker"](60)
+    worker.subscribe(["Fed"], 1, 0)
+    worker.run_once()
+    worker._wake.clear()
+
+    worker.subscribe(["Fed"], 1, 0)
+    assert not worker._wake.is_set()
+    worker.subscribe(["ECB"], 1, 0)
+    assert worker._wake.is_set()
+
+
+def test_session_view_keeps_fixed_feeds_and_body_matches(news):
+    fed = dict(_scored("Board announces discount rate action"), _feed="fed")
+    body = dict(_scored("Markets wrap: stocks slip"), _feed="google", _query_terms=("payrolls", "cpi"))
+    other_tab = dict(_scored("CPI cools in March"), _feed="google", _query_terms=("payrolls", "cpi"))
+    plain = dict(_scored("Payrolls beat forecasts"), _feed="google", _query_terms=("payrolls", "cpi"))
+    news["fetch_all_sources"] = lambda keywords, min_kw, max_noise, index=None: ([fed, body, other_tab, plain], [])
+
+    worker = news["IngestWorker"](60)
+    payrolls = worker.subscribe(["payrolls"], 1, 0)
+    cpi = worker.subscribe(["CPI"], 1, 0)
+    worker.run_once()
+
+    assert {a["title"] for a in worker.snapshot(payrolls)["items"]} == {fed["title"], body["title"], plain["title"]}
+    assert {a["title"] for a in worker.snapshot(cpi)["items"]} == {fed["title"], body["title"], other_tab["title"]}
@@ -0,0 +1,42 @@
+import threading
+
+GETTERS = [
+    "get_http_session",
+    "get_feed_cache",
+    "get_source_registry",
+    "get_metrics",
+    "get_db_pool",
+    "get_story_index",
+]
+
+
+def _from_thread(fn):
+    out = {}
+    t = threading.Thread(target=lambda: out.setdefault("value", fn()))
+    t.start()
+    t.join(10)
+    return out["value"]
+
+
+def test_getters_return_one_object_across_plain_threads(news):
+    # st.cache_resource would rebuild these on every call outside a script run (ingest / fetch threads)
+    for name in GETTERS:
+        getter = news[name]
+        first = _from_thread(getter)
+        assert _from_thread(getter) is first, name
+        assert getter() is first, name
+
+
+def test_keyword_matcher_is_shared_per_argument(news):
+    sets = news["SCORING_KEYWORD_SETS"]
+    matcher = _from_thread(lambda: news["get_keyword_matcher"](sets))
+    assert _from_thread(lambda: news["get_keyword_matcher"](sets)) is matcher
+    assert news["get_keyword_matcher"]((("user", ("fed",)),)) is not matcher
+
+
+def test_values_outlive_a_reloaded_script(news):
+    # A Streamlit rerun re-executes NEWS.py: the new function objects must find the same values
+    from bench_pipeline import load_news_module
+
+    session = news["get_http_session"]()
+    assert load_news_module()["get_http_session"]() is session
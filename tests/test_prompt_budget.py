@@ -0,0 +1,41 @@
+import time
+
+
+def _archive(n: int) -> list[dict]:
+    now = time.time()
+    return [
+        {
+            "title": f"Archive story {i} about copper tariffs and mine output {i * 7}",
+            "link": f"https://www.ft.com/content/archive-{i}",
+            "_domain": "ft.com",
+            "_ts": now - 20 * 86400 + i,
+            "_score": i % 5,
+            "_story_id": "",
+        }
+        for i in range(n)
+    ]
+
+
+def test_digest_prompt_leaves_live_story_index_alone(news):
+    live = news["get_story_index"]()
+    current = {"title": "Fed holds rates steady", "link": "https://www.reuters.com/fed", "_domain": "reuters.com", "_ts": time.time(), "_score": 9}
+    live.assign(current)
+    before = live.stats()
+
+    fresh = {"title": "Treasury auction tails badly", "link": "https://www.wsj.com/auction", "_domain": "wsj.com",
+             "_ts": time.time(), "_score": 5, "_story_id": ""}  # 24h DB row stored without a story id
+
+    prompt = news["build_digest_prompt"]([dict(current), fresh], _archive(40), budget=20000)
+
+    assert "Archive story" in prompt and "Treasury auction" in prompt
+    assert live.stats() == before
+
+
+def test_digest_context_still_collapses_duplicates(news):
+    dup = _archive(1)[0]
+    rows = [dict(dup), dict(dup, link="https://www.wsj.com/copper", _domain="wsj.com")]
+
+    prompt = news["build_digest_prompt"]([], rows, budget=20000)
+
+    assert prompt.count("Archive story 0") == 1
+    assert "sources=2" in prompt
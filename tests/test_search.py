@@ -0,0 +1,64 @@
+import time
+
+
+def _rows(start: int, n: int, word: str) -> list[dict]:
+    now = time.time()
+    return [
+        {
+            "title": f"{word} update number {i}",
+            "summary": f"Treasury {word} story {i}",
+            "link": f"https://www.reuters.com/markets/{word}-{i}",
+            "_ts": now - (start + n - i),
+            "_score": i % 7,
+        }
+        for i in range(start, start + n)
+    ]
+
+
+def _page_all(news, query: str, limit: int, between=None) -> list[str]:
+    seen: list[str] = []
+    cursor = None
+    pages = 0
+    while True:
+        page, cursor = news["db_search_news"](query, limit=limit, after=cursor)
+        seen += [a["link"] for a in page]
+        pages += 1
+        if between is not None and pages == 1:
+            between()
+        if cursor is None:
+            return seen
+
+
+def test_paging_has_no_duplicates_or_gaps_while_rows_arrive(news):
+    news["SEARCH_RANK_WINDOW"] = 25  # several windows with a small archive
+    news["db_upsert_many"](_rows(0, 110, "yields"))
+    expected = {a["link"] for a in _rows(0, 110, "yields")}
+
+    # new matching rows land between page 1 and page 2
+    links = _page_all(news, "yields", limit=20, between=lambda: news["db_upsert_many"](_rows(1000, 60, "yields")))
+
+    assert len(links) == len(set(links))
+    assert set(links) == expected
+
+
+def test_paging_ignores_relevance_drift_from_new_rows(news):
+    # rows of varying length next to non-matching ones: new rows move bm25 idf and average length
+    rows = _rows(0, 60, "yields")
+    for i, a in enumerate(rows):
+        a["summary"] += " with extra context" * (i % 9)
+    news["db_upsert_many"](rows + _rows(200, 60, "payrolls"))
+    expected = {a["link"] for a in rows}
+
+    def _arrivals():
+        news["db_upsert_many"](_rows(1000, 200, "yields") + _rows(2000, 200, "payrolls"))
+
+    links = _page_all(news, "yields", limit=7, between=_arrivals)
+
+    assert len(links) == len(set(links))
+    assert set(links) == expected
+
+
+def test_new_rows_show_up_in_a_new_search(news):
+    news["db_upsert_many"](_rows(0, 5, "payrolls"))
+    news["db_upsert_many"](_rows(100, 5, "payrolls"))
+    assert len(_page_all(news, "payrolls", limit=3)) == 10
@@ -0,0 +1,78 @@
+import time
+
+import pytest
+
+
+def _item(title: str) -> dict:
+    return {
+        "source": "Test",
+        "title": f"{title} - reuters.com",
+        "link": f"https://www.reuters.com/markets/{abs(hash(title))}",
+        "time": time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime()),
+        "summary": "FOMC Treasury yields",
+    }
+
+
+def _fake_source(news, name: str, behaviour: dict):
+    class FakeSource(news["NewsSource"]):
+        def fetch_raw(self, keywords):
+            if behaviour["fail"]:
+                raise ConnectionError("down")
+            return [_item(t) for t in behaviour["titles"]]
+
+    src = FakeSource(timeout_seconds=2, retries=0)
+    src.name = name
+    return src
+
+
+def _install(news, *sources):
+    registry = news["get_source_registry"]()
+    registry.clear()
+    for src in sources:
+        news["register_source"](src)
+
+
+def test_run_raises_when_source_fails(news):
+    src = _fake_source(news, "a", {"fail": True, "titles": []})
+    with pytest.raises(news["SourceUnavailable"]):
+        src.run(["FOMC"])
+    assert src.stats["failures"] == 1
+
+
+def test_fetch_from_sources_keeps_partial_answers(news):
+    _install(
+        news,
+        _fake_source(news, "up", {"fail": False, "titles": ["Fed holds rates"]}),
+        _fake_source(news, "down", {"fail": True, "titles": []}),
+    )
+    assert [a["_feed"] for a in news["fetch_from_sources"](["FOMC"])] == ["up"]
+
+
+def test_fetch_from_sources_raises_when_all_fail(news):
+    _install(
+        news,
+        _fake_source(news, "a", {"fail": True, "titles": []}),
+        _fake_source(news, "b", {"fail": True, "titles": []}),
+    )
+    with pytest.raises(RuntimeError, match="all news sources failed"):
+        news["fetch_from_sources"](["FOMC"])
+
+
+def test_outage_keeps_previous_snapshot(news):
+    state = {"fail": False, "titles": ["Fed holds rates as Treasury yields climb"]}
+    _install(news, _fake_source(news, "a", state), _fake_source(news, "b", state))
+    worker = news["IngestWorker"](5)  # not started: cycles are driven by hand
+    key = worker.subscribe(["FOMC", "Treasury"], 1, 0)
+    group = key[1:]
+
+    worker._ingest(group, ["FOMC", "Treasury"])
+    before = worker.snapshot(key)
+    assert len(before["items"]) == 1 and before["error"] == ""
+
+    state["fail"] = True
+    worker._ingest(group, ["FOMC", "Treasury"])
+    after = worker.snapshot(key)
+    assert after["version"] > before["version"]
+    assert [a["title"] for a in after["items"]] == [a["title"] for a in before["items"]]
+    assert after["ts"] == before["ts"]
+    assert "all news sources failed" in after["error"]